@@ -2,36 +2,116 @@ import re
 import os
 import fitz
 import pdfplumber
+import openpyxl
+import multiprocessing
 import pandas as pd
-from datetime import datetime
+from itertools import repeat
+from datetime import date
 from abc import ABC, abstractmethod
+from typing import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+
+from .parse_cache import AbstractParseCacheHandler
 
 
 class AbstractSyupplyer(ABC):
+    # Меняется вместе с результатом разбора: старые записи кэша с другой версией просто не находятся
+    parserVersion: str = "1"
+
     @abstractmethod
-    def __init__(self, logerHandler):
+    def __init__(self, logerHandler, parseCacheHandler = None):
         super().__init__()
         self.logerHandler = logerHandler
+        self.parseCacheHandler: AbstractParseCacheHandler | None = parseCacheHandler
 
     @abstractmethod
-    def preprocessing_data(self, dataPath:str)-> pd.DataFrame:
+    def preprocessing_data(self, dataPath:str, fileHash:str | None = None)-> pd.DataFrame:
         pass
 
-class AlfaPreprocessingDataFileHandler(AbstractSyupplyer):
-    def __init__(self, logerHandler):
-        super().__init__(logerHandler)
-    
-    def preprocessing_data(self, dataPath:str)-> pd.DataFrame:
+    def cached_parse(self, dataPath: str, parse: Callable[[], pd.DataFrame], fileHash: str | None = None) -> pd.DataFrame:
+        # Тот же файл (повтор упавшей загрузки, отладка) второй раз не разбирается: результат берется из кэша
+        if self.parseCacheHandler is None:
+            return parse()
+        cacheKey = self.parseCacheHandler.make_key(type(self).__name__, self.parserVersion, dataPath, fileHash)
+        df = self.parseCacheHandler.get(cacheKey)
+        if df is None:
+            df = parse()
+            self.parseCacheHandler.put(cacheKey, df)
+        return df
 
-        df = pd.read_excel(dataPath)
+    def cached_chunks(self, dataPath: str, parseChunks: Callable[[], Iterator[pd.DataFrame]],
+                      fileHash: str | None = None) -> Iterator[pd.DataFrame]:
+        # То же для потокового разбора: попадание отдает куски из кэша, промах пишет куски в кэш по мере разбора
+        if self.parseCacheHandler is None:
+            yield from parseChunks()
+            return
+        cacheKey = self.parseCacheHandler.make_key(type(self).__name__, self.parserVersion, dataPath, fileHash)
+        cachedChunks = self.parseCacheHandler.get_chunks(cacheKey)
+        if cachedChunks is not None:
+            yield from cachedChunks
+            return
+        yield from self.parseCacheHandler.put_chunks(cacheKey, parseChunks())
 
-        columnsNameIndex = df[df['Unnamed: 0'] == 'Дата операции'].index.to_list()[0]
-        df.columns = [x.replace('\xa0',' ') if isinstance(x,str) else f"Unnamed {ind}"  for ind,x in enumerate(df.iloc[columnsNameIndex].values)]
-        df = df.iloc[columnsNameIndex+1:].reset_index(drop=True)
-        df = df.iloc[:df[df['Дата операции'].isna()].index.min()]
+    @staticmethod
+    def parse_amounts(values: pd.Series, removeChars: str) -> pd.Series:
+        # "-1\xa0234,50 ₽" -> -1234.5: лишние символы одной регуляркой, запятая -> точка
+        cleaned = values.str.replace(f"[{re.escape(removeChars)}]", "", regex=True).str.replace(",", ".", regex=False)
+        return cleaned.astype("float64")
 
-        df = df[[x for x in df.columns if 'Unnamed' not in x]]
+    @staticmethod
+    def parse_dates(values: pd.Series, dateFormat: str) -> pd.Series:
+        # Различных дат в выписке немного: to_datetime только по уникальным значениям, обратно - по кодам factorize.
+        # HOLD - операция еще не проведена, такие строки получают 1970-01-01 по маске
+        isHold = values == "HOLD"
+        codes, uniqueValues = pd.factorize(values.where(~isHold), use_na_sentinel=False)
+        uniqueDates = pd.to_datetime(pd.Series(uniqueValues, dtype=object), format=dateFormat).dt.date.to_numpy(dtype=object)
+        return pd.Series(uniqueDates[codes], index=values.index, dtype=object).where(~isHold, date(1970, 1, 1))
 
+class AlfaPreprocessingDataFileHandler(AbstractSyupplyer):
+    def __init__(self, logerHandler, parseCacheHandler = None, chunkSize: int = 5000):
+        super().__init__(logerHandler, parseCacheHandler)
+        self.chunkSize = chunkSize
+    
+    def preprocessing_data(self, dataPath:str, fileHash:str | None = None)-> pd.DataFrame:
+        return self.cached_parse(dataPath, lambda: self.parse_statement(dataPath), fileHash)
+
+    def preprocessing_chunks(self, dataPath:str, fileHash:str | None = None) -> Iterator[pd.DataFrame]:
+        return self.cached_chunks(dataPath, lambda: self.iter_statement_chunks(dataPath), fileHash)
+
+    def parse_statement(self, dataPath:str)-> pd.DataFrame:
+        return pd.concat(list(self.iter_statement_chunks(dataPath)), ignore_index=True)
+
+    def iter_statement_chunks(self, dataPath:str, chunkSize: int | None = None) -> Iterator[pd.DataFrame]:
+        # read_only: openpyxl читает лист строка за строкой, в памяти не больше chunkSize строк выписки.
+        # Шапка выписки пропускается до строки с 'Дата операции', таблица кончается на первой строке без даты
+        chunkSize = chunkSize or self.chunkSize
+        workbook = openpyxl.load_workbook(dataPath, read_only=True, data_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            for header in rows:
+                if header and header[0] == 'Дата операции':
+                    break
+            else:
+                raise ValueError("Header row 'Дата операции' not found in statement")
+
+            columns = [x.replace('\xa0',' ') if isinstance(x,str) else f"Unnamed {ind}" for ind,x in enumerate(header)]
+            keepIndexes = [ind for ind, x in enumerate(columns) if 'Unnamed' not in x]
+            keepColumns = [columns[ind] for ind in keepIndexes]
+
+            chunk, isYielded = [], False
+            for row in rows:
+                if not row or row[0] is None:
+                    break
+                chunk.append([row[ind] if ind < len(row) else None for ind in keepIndexes])
+                if len(chunk) >= chunkSize:
+                    yield self.normalize_frame(pd.DataFrame(chunk, columns=keepColumns))
+                    chunk, isYielded = [], True
+            if chunk or not isYielded:
+                yield self.normalize_frame(pd.DataFrame(chunk, columns=keepColumns))
+        finally:
+            workbook.close()
+
+    def normalize_frame(self, df: pd.DataFrame) -> pd.DataFrame:
         df = df.rename(columns={
             "Дата операции": "operationDate",
             "Дата проводки": "postingDate",
@@ -42,34 +122,51 @@ class AlfaPreprocessingDataFileHandler(AbstractSyupplyer):
             "Статус ": "status",
         })
 
-        df["currencyAmount"] = [float(x.replace("\xa0",'').replace(",",'.')) for x in df["currencyAmount"]]
-        df["operationDate"] = [datetime.strptime(x,"%d.%m.%Y").date() if x != "HOLD" else datetime(1970,1,1).date() for x in df["operationDate"]]
-        df["postingDate"] = [datetime.strptime(x,"%d.%m.%Y").date() if x != "HOLD" else datetime(1970,1,1).date() for x in df["postingDate"]]
+        df["currencyAmount"] = self.parse_amounts(df["currencyAmount"], "\xa0")
+        df["operationDate"] = self.parse_dates(df["operationDate"], "%d.%m.%Y")
+        df["postingDate"] = self.parse_dates(df["postingDate"], "%d.%m.%Y")
 
         return df
 
 class TinkoffPreprocessingDataFileHandler(AbstractSyupplyer):
-    def __init__(self, logerHandler):
-        super().__init__(logerHandler)
+    def __init__(self, logerHandler, pageWorkers: int = 1, pagesPerWorker: int = 200, parseCacheHandler = None):
+        super().__init__(logerHandler, parseCacheHandler)
+        self.pageWorkers = pageWorkers
+        self.pagesPerWorker = pagesPerWorker
 
     @staticmethod
-    def extract_tinkoff_pymupdf(pdfPath, excelPath, writeExcel=False) -> pd.DataFrame:
-        doc = fitz.open(pdfPath)
+    def extract_tinkoff_page_rows(pdfPath, pageStart: int, pageStop: int) -> list:
+        # Каждый воркер открывает документ сам: fitz.Document между процессами не передается
         rows = []
-
-        for page in doc:
-            blocks = page.get_text("blocks")
-            for b in blocks:
-                text = b[4]
-                if "описание" in text.lower() and "дата" in text.lower():
-                    # нашли начало таблицы
-                    continue
-
-                if "₽" in text:  # heuristic: строки таблицы содержат ₽
-                    parts = [x.strip() for x in text.split("  ") if x.strip()]
-                    rows.append(parts)
-
-        df = pd.DataFrame(rows)
+        with fitz.open(pdfPath) as doc:
+            for page in doc.pages(pageStart, pageStop):
+                blocks = page.get_text("blocks")
+                for b in blocks:
+                    text = b[4]
+                    if "описание" in text.lower() and "дата" in text.lower():
+                        # нашли начало таблицы
+                        continue
+
+                    if "₽" in text:  # heuristic: строки таблицы содержат ₽
+                        parts = [x.strip() for x in text.split("  ") if x.strip()]
+                        rows.append(parts)
+        return rows
+
+    @classmethod
+    def extract_tinkoff_pymupdf(cls, pdfPath, excelPath, writeExcel=False, pageWorkers: int = 1, pagesPerWorker: int = 200) -> pd.DataFrame:
+        with fitz.open(pdfPath) as doc:
+            pageCount = doc.page_count
+
+        # Диапазоны страниц по pagesPerWorker; map отдает результаты в порядке диапазонов, т.е. страниц
+        pageStarts = list(range(0, pageCount, pagesPerWorker))
+        if pageWorkers > 1 and len(pageStarts) > 1:
+            pageStops = [min(x + pagesPerWorker, pageCount) for x in pageStarts]
+            with ProcessPoolExecutor(max_workers=min(pageWorkers, len(pageStarts)), mp_context=multiprocessing.get_context("spawn")) as pool:
+                pageRows = list(pool.map(cls.extract_tinkoff_page_rows, repeat(pdfPath), pageStarts, pageStops))
+        else:
+            pageRows = [cls.extract_tinkoff_page_rows(pdfPath, 0, pageCount)]
+
+        df = pd.DataFrame([row for rows in pageRows for row in rows])
         if writeExcel:
             df.to_excel(excelPath, index=False)
 
@@ -77,32 +174,32 @@ class TinkoffPreprocessingDataFileHandler(AbstractSyupplyer):
 
     @staticmethod
     def filter_rows_by_date(df: pd.DataFrame) -> pd.DataFrame:
-        datePattern = re.compile(r"^\s*\d{2}\.\d{2}\.\d{2,4}")
-        filteredRows = []
-        for _, row in df.iterrows():
-            cell = row.iloc[0]
-            if not isinstance(cell, str):
-                continue
-            # Проверяем каждую подстроку, но ВОЗВРАЩАЕМ всю строку
-            lines = cell.split("\n")
-            if any(datePattern.match(line.strip()) for line in lines):
-                filteredRows.append(row)
-
-        return pd.DataFrame(filteredRows)
-
-    def preprocessing_data(self, dataPath: str, excelDataPath: str | None = None, writeExcel: bool = False) -> pd.DataFrame:
+        # Строка таблицы остается, если хоть одна подстрока первой ячейки начинается с даты (?m - ^ на каждой строке)
+        startsWithDate = df[0].str.contains(r"(?m)^\s*\d{2}\.\d{2}\.\d{2,4}", regex=True, na=False)
+        return df[startsWithDate.astype(bool)]
+
+    def preprocessing_data(self, dataPath: str, excelDataPath: str | None = None, writeExcel: bool = False,
+                           fileHash: str | None = None) -> pd.DataFrame:
+        # Выгрузка сырых строк в Excel - отладочный режим, он всегда идет мимо кэша
+        if writeExcel:
+            return self.parse_statement(dataPath, excelDataPath, writeExcel)
+        return self.cached_parse(dataPath, lambda: self.parse_statement(dataPath), fileHash)
+
+    def parse_statement(self, dataPath: str, excelDataPath: str | None = None, writeExcel: bool = False) -> pd.DataFrame:
         df = self.extract_tinkoff_pymupdf(
             pdfPath=dataPath,
             excelPath=excelDataPath,
-            writeExcel=writeExcel
+            writeExcel=writeExcel,
+            pageWorkers=self.pageWorkers,
+            pagesPerWorker=self.pagesPerWorker,
         )
 
         df = pd.DataFrame([x.split('\n') for x in self.filter_rows_by_date(df)[0].to_list()],
                           columns=["operationDate", "postingDate", "amount", "currencyAmount", "description", 'description2'])
 
-        df["currencyAmount"] = [float(x.replace("\xa0", '').replace(",", '.').replace("+", '').replace("₽", '').replace(" ", '')) for x in df["currencyAmount"]]
-        df["amount"] = [float(x.replace("\xa0", '').replace(",", '.').replace("+", '').replace("₽", '').replace(" ", '')) for x in df["amount"]]
-        df["operationDate"] = [datetime.strptime(x, "%d.%m.%y").date() if x != "HOLD" else datetime(1970, 1, 1).date() for x in df["operationDate"]]
-        df["postingDate"] = [datetime.strptime(x, "%d.%m.%y").date() if x != "HOLD" else datetime(1970, 1, 1).date() for x in df["postingDate"]]
+        df["currencyAmount"] = self.parse_amounts(df["currencyAmount"], "\xa0+₽ ")
+        df["amount"] = self.parse_amounts(df["amount"], "\xa0+₽ ")
+        df["operationDate"] = self.parse_dates(df["operationDate"], "%d.%m.%y")
+        df["postingDate"] = self.parse_dates(df["postingDate"], "%d.%m.%y")
 
         return df
\ No newline at end of file
@@ -1,10 +1,14 @@
 import os
 import json
+import hashlib
+import zipfile
+from contextlib import aclosing
+import pandas as pd
 from decimal import Decimal
 from pydantic import BaseModel
 from datetime import datetime, date
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Mapping, Tuple, List
+from typing import Any, AsyncIterator, Callable, Counter, Dict, Iterable, Mapping, Sequence, Tuple, List
 from sqlalchemy import types as satypes
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
@@ -12,27 +16,59 @@ from .schema import *
 from ..logers.loger_handlers import LogerHandler
 from ..db.db_handlers import AbstractDataBaseHandler
 from ..db.orm_models.abstract_models import AbstractBankTransactions
-from .bank_file_preprocessing import AlfaPreprocessingDataFileHandler, TinkoffPreprocessingDataFileHandler
+from .bank_file_preprocessing import AbstractSyupplyer, AlfaPreprocessingDataFileHandler, TinkoffPreprocessingDataFileHandler
+from .parsing_pool import AbstractParsingPoolHandler
+from .bank_slugs import BankSlugs
 
 
 class AbstractBankFileHandler(ABC):
+    # Служебные колонки таблицы, которые клиенту не отдаются: отпечаток строки нужен только для дедупликации
+    internalColumns: Tuple[str, ...] = ("rowFingerprint",)
+
     @abstractmethod
-    def __init__(self, logerHandler, dbHandler, dbt):
+    def __init__(self, logerHandler, dbHandler, dbt, parsingPoolHandler = None):
         super().__init__()
         self.logerHandler:LogerHandler = logerHandler
         self.dbHandler:AbstractDataBaseHandler = dbHandler
         self.dbt:AbstractBankTransactions = dbt 
+        self.parsingPoolHandler:AbstractParsingPoolHandler | None = parsingPoolHandler
+
+    @abstractmethod
+    def get_data(self, columnFilters:List, orderBy:List = (), columns:Sequence[str] | None = None, limit:int | None = None):
+        pass
+
+    @abstractmethod
+    def stream_data(self, columnFilters:List, orderBy:List = (), columns:Sequence[str] | None = None):
+        pass
 
     @abstractmethod
-    def get_data(self, columnFilters:List):
+    def get_aggregated_data(self, aggregations:Dict, columnFilters:List, groupBy:Dict | None = None):
         pass
     
     @abstractmethod
-    def insert_file(self, userID:int, filePath:str):
+    def insert_file(self, userID:int, filePath:str, categoryResolver:Callable | None = None, fileName:str | None = None):
+        pass
+
+    @abstractmethod
+    def parse_file(self, filePath:str, fileHash:str | None = None):
         pass
 
     @abstractmethod
-    def insert_data(self, addTransactionData):
+    def is_statement_file(self, filePath:str) -> bool:
+        pass
+
+    @abstractmethod
+    def prepare_insert_frame(self, userID:int, df:pd.DataFrame, fileName:str, categoryResolver:Callable | None = None,
+                             seenRowKeys:Counter | None = None) -> pd.DataFrame:
+        pass
+
+    @abstractmethod
+    def insert_frame(self, userID:int, df:pd.DataFrame, fileName:str, categoryResolver:Callable | None = None,
+                     seenRowKeys:Counter | None = None):
+        pass
+
+    @abstractmethod
+    def insert_data(self, addTransactionData, categoryResolver:Callable | None = None):
         pass
     
     @abstractmethod
@@ -43,35 +79,129 @@ class AbstractBankFileHandler(ABC):
     def update_data(self):
         pass
 
+    @staticmethod
+    def _resolved_category_values(categoryResolver:Callable | None, **matchData) -> Dict[str, Any]:
+        # Кастомная категория считается один раз при вставке и хранится в строке транзакции
+        categoryItem = None
+        if categoryResolver is not None:
+            categoryItem = categoryResolver({k: (None if pd.isna(v) else v) for k, v in matchData.items()})
+        if categoryItem is None:
+            return {"resolvedCategoryID": None, "resolvedCategory": None}
+        return {"resolvedCategoryID": categoryItem.get("id"), "resolvedCategory": categoryItem.get("categoryName")}
+
+    @staticmethod
+    def _row_fingerprints(userID:int, slug:str, frame:pd.DataFrame, amountColumn:str = "currencyAmount",
+                          seenRowKeys:Counter | None = None) -> List[str]:
+        # Отпечаток строки выписки: userID|slug|дата|сумма|описание без регистра и лишних пробелов|номер среди одинаковых.
+        # Номер по порядку в файле оставляет честные повторы (две одинаковые покупки за день), а повторная загрузка
+        # того же периода дает те же отпечатки и отсекается уникальным индексом
+        description = frame["description"].fillna("").astype(str).str.replace(r"\s+", " ", regex=True).str.strip().str.lower()
+        rowKeys = (f"{userID}|{slug}|" + frame["operationDate"].astype(str) + "|"
+                   + frame[amountColumn].map("{:.2f}".format) + "|" + description)
+        ordinals = rowKeys.groupby(rowKeys, sort=False).cumcount()
+        if seenRowKeys is not None:
+            # Файл вставляется кусками: номер продолжается с предыдущих кусков. Ключи хранятся 16-байтными дайджестами
+            keyDigests = [hashlib.blake2b(x.encode(), digest_size=16).digest() for x in rowKeys]
+            ordinals = ordinals + [seenRowKeys[x] for x in keyDigests]
+            seenRowKeys.update(keyDigests)
+        return [hashlib.sha256(f"{rowKey}|{ordinal}".encode()).hexdigest() for rowKey, ordinal in zip(rowKeys, ordinals)]
+
+    @classmethod
+    def _resolved_category_frame(cls, categoryResolver:Callable | None, matchFrame:pd.DataFrame) -> pd.DataFrame:
+        # object-колонки, чтобы id категории не превратился во float из-за пропусков
+        resolvedValues = [cls._resolved_category_values(categoryResolver, **matchData) for matchData in matchFrame.to_dict("records")]
+        return pd.DataFrame(resolvedValues, index=matchFrame.index, columns=["resolvedCategoryID", "resolvedCategory"], dtype=object)
+
+    async def _preprocess_file(self, preprocessingHandler:AbstractSyupplyer, filePath:str, fileHash:str | None = None) -> pd.DataFrame:
+        # Без пула разбор идет как раньше - синхронно в текущем потоке
+        if self.parsingPoolHandler is None:
+            return preprocessingHandler.preprocessing_data(filePath, fileHash=fileHash)
+        return await self.parsingPoolHandler.parse(preprocessingHandler, filePath, fileHash)
+
+    async def iter_file_chunks(self, filePath:str, fileHash:str | None = None) -> AsyncIterator[pd.DataFrame]:
+        # По умолчанию файл разбирается целиком (пул процессов, кэш) и отдается одним куском
+        yield await self.parse_file(filePath, fileHash)
+
+    def client_columns(self) -> List[str]:
+        return [name for name in self.dbt.__table__.columns.keys() if name not in self.internalColumns]
+
+    async def insert_frames(self, insertFrames:Iterable[pd.DataFrame]):
+        # Готовые к вставке куски одного файла пишутся одной транзакцией: либо файл целиком, либо ничего
+        return await self.dbHandler.insert_bulk_batches(self.dbt, insertFrames, conflictColumns=("rowFingerprint",))
+
+    async def update_resolved_category(self, columnFilters:List, categoryID:int | None, categoryName:str | None):
+        return await self.dbHandler.update_data(
+            self.dbt, {"resolvedCategoryID": categoryID, "resolvedCategory": categoryName}, columnFilters)
+
 class AlfaBankHandler(AbstractBankFileHandler):
-    def __init__(self, logerHandler, dbHandler, dbt, preprocessingHandler):
-        super().__init__(logerHandler, dbHandler, dbt)
+    slug: str = BankSlugs.ALFA
+
+    def __init__(self, logerHandler, dbHandler, dbt, preprocessingHandler, parsingPoolHandler = None, streamingMinSize:int | None = None):
+        super().__init__(logerHandler, dbHandler, dbt, parsingPoolHandler)
         self.preprocessingHandler:AlfaPreprocessingDataFileHandler = preprocessingHandler
+        self.streamingMinSize:int | None = streamingMinSize
         
-    async def get_data(self, columnFilters:List):
-        return await self.dbHandler.get_table_data([self.dbt], columnFilters)
-
-    async def insert_file(self, userID:int, filePath:str):
-        df = self.preprocessingHandler.preprocessing_data(filePath)
-        insertPull = []
-        for _,row in df.iterrows():
-            insertPull.append(
-                self.dbt(
-                    userID = userID,
-                    fileName = filePath.split(os.sep)[-1],
-                    operationDate = row.operationDate,
-                    postingDate = row.postingDate,
-                    code = row.code,
-                    category = row.category,
-                    description = row.description,
-                    currencyAmount = row.currencyAmount,
-                    status = row.status
-                    )
-                )
-        createBankTransactions = await self.dbHandler.insert_data(insertPull)
-        return createBankTransactions
-
-    async def insert_data(self, addTransactionData: CreateHandlerBankTransactions):
+    async def get_data(self, columnFilters:List, orderBy:List = (), columns:Sequence[str] | None = None, limit:int | None = None):
+        # columns - только нужные колонки словарями, без ORM-объектов
+        if columns is None:
+            return await self.dbHandler.get_table_data([self.dbt], columnFilters, orderBy=orderBy, limit=limit)
+        return await self.dbHandler.get_table_data(self.dbHandler.table_columns(self.dbt, columns), columnFilters, orderBy=orderBy, limit=limit, asDicts=True)
+
+    def stream_data(self, columnFilters:List, orderBy:List = (), columns:Sequence[str] | None = None) -> AsyncIterator[Dict]:
+        return self.dbHandler.stream_table_data(self.dbHandler.table_columns(self.dbt, columns), columnFilters, orderBy=orderBy)
+
+    async def get_aggregated_data(self, aggregations:Dict, columnFilters:List, groupBy:Dict | None = None):
+        return await self.dbHandler.get_aggregated_data(aggregations, columnFilters, groupBy)
+
+    async def parse_file(self, filePath:str, fileHash:str | None = None) -> pd.DataFrame:
+        return await self._preprocess_file(self.preprocessingHandler, filePath, fileHash)
+
+    async def iter_file_chunks(self, filePath:str, fileHash:str | None = None) -> AsyncIterator[pd.DataFrame]:
+        # Большая выгрузка читается потоково (openpyxl read_only) кусками по chunkSize строк, целиком в памяти не бывает.
+        # Разбор идет в пуле процессов с его таймаутом, куски проходят через кэш разбора
+        if self.streamingMinSize is None or os.path.getsize(filePath) < self.streamingMinSize:
+            yield await self.parse_file(filePath, fileHash)
+            return
+
+        if self.parsingPoolHandler is None:
+            # Без пула разбор идет как раньше - синхронно в текущем потоке
+            for chunk in self.preprocessingHandler.preprocessing_chunks(filePath, fileHash):
+                yield chunk
+            return
+
+        async with aclosing(self.parsingPoolHandler.iter_chunks(self.preprocessingHandler, filePath, fileHash)) as chunks:
+            async for chunk in chunks:
+                yield chunk
+
+    def is_statement_file(self, filePath:str) -> bool:
+        # Выписка Альфы - xlsx, т.е. zip-архив с книгой Excel внутри
+        if not zipfile.is_zipfile(filePath):
+            return False
+        try:
+            with zipfile.ZipFile(filePath) as zf:
+                return "xl/workbook.xml" in zf.namelist()
+        except zipfile.BadZipFile:
+            return False
+
+    def prepare_insert_frame(self, userID:int, df:pd.DataFrame, fileName:str, categoryResolver:Callable | None = None,
+                             seenRowKeys:Counter | None = None) -> pd.DataFrame:
+        insertFrame = df[["operationDate", "postingDate", "code", "category", "description", "currencyAmount", "status"]].assign(
+            userID = userID,
+            fileName = fileName,
+        )
+        insertFrame = insertFrame.join(self._resolved_category_frame(categoryResolver, df[["description", "code"]]))
+        insertFrame["rowFingerprint"] = self._row_fingerprints(userID, self.slug, df, seenRowKeys=seenRowKeys)
+        return insertFrame
+
+    async def insert_frame(self, userID:int, df:pd.DataFrame, fileName:str, categoryResolver:Callable | None = None,
+                           seenRowKeys:Counter | None = None):
+        return await self.insert_frames([self.prepare_insert_frame(userID, df, fileName, categoryResolver, seenRowKeys)])
+
+    async def insert_file(self, userID:int, filePath:str, categoryResolver:Callable | None = None, fileName:str | None = None):
+        df = await self.parse_file(filePath)
+        return await self.insert_frame(userID, df, fileName or filePath.split(os.sep)[-1], categoryResolver)
+
+    async def insert_data(self, addTransactionData: CreateHandlerBankTransactions, categoryResolver:Callable | None = None):
         createBankTransaction = await self.dbHandler.insert_data(
             data=(self.dbt(
                 userID = addTransactionData.userID,
@@ -82,7 +212,8 @@ class AlfaBankHandler(AbstractBankFileHandler):
                 category = None,
                 description = addTransactionData.description,
                 currencyAmount = addTransactionData.currencyAmount,
-                status = None
+                status = None,
+                **self._resolved_category_values(categoryResolver, description=addTransactionData.description)
                 ),
             )
         )
@@ -196,49 +327,55 @@ class AlfaBankHandler(AbstractBankFileHandler):
         return valid, skipped
 
     async def update_data(self, transactionID:int, updatesData: AlfaHandlerUpdateData):
-        async with self.dbHandler.create_session()() as sess:
-            try:
-                obj = await sess.get(self.dbt, transactionID)  # AsyncSession.get
-                if obj is None:
-                    return None
-                valid, _ = self.__normalize_updates_for_model(updatesData.to_dict())
-                for k, v in valid.items():
-                    setattr(obj, k, v)
-                await sess.commit()
-                await sess.refresh(obj)
-                return obj
-            except (IntegrityError, SQLAlchemyError):
-                await sess.rollback()
-                raise
+        valid, _ = self.__normalize_updates_for_model(updatesData.to_dict())
+        return await self.dbHandler.update_by_id(self.dbt, transactionID, valid)
 
 class TinkoffBankHandler(AbstractBankFileHandler):
-    def __init__(self, logerHandler, dbHandler, dbt, preprocessingHandler):
-        super().__init__(logerHandler, dbHandler, dbt)
+    slug: str = BankSlugs.TINKOFF
+
+    def __init__(self, logerHandler, dbHandler, dbt, preprocessingHandler, parsingPoolHandler = None):
+        super().__init__(logerHandler, dbHandler, dbt, parsingPoolHandler)
         self.preprocessingHandler: TinkoffPreprocessingDataFileHandler = preprocessingHandler
         
-    async def get_data(self, columnFilters:List):
-        return await self.dbHandler.get_table_data([self.dbt], columnFilters)
-
-    async def insert_file(self, userID:int, filePath:str):
-        df = self.preprocessingHandler.preprocessing_data(filePath)
-        insertPull = []
-        for _,row in df.iterrows():
-            insertPull.append(
-                self.dbt(
-                    userID = userID,
-                    fileName = filePath.split(os.sep)[-1],
-                    operationDate = row.operationDate,
-                    postingDate = row.postingDate,
-                    description = row.description,
-                    description2 = row.description2,
-                    currencyAmount = row.currencyAmount,
-                    amount = row.amount
-                    )
-                )
-        createBankTransactions = await self.dbHandler.insert_data(insertPull)
-        return createBankTransactions
-
-    async def insert_data(self, addTransactionData: CreateHandlerBankTransactions):       
+    async def get_data(self, columnFilters:List, orderBy:List = (), columns:Sequence[str] | None = None, limit:int | None = None):
+        # columns - только нужные колонки словарями, без ORM-объектов
+        if columns is None:
+            return await self.dbHandler.get_table_data([self.dbt], columnFilters, orderBy=orderBy, limit=limit)
+        return await self.dbHandler.get_table_data(self.dbHandler.table_columns(self.dbt, columns), columnFilters, orderBy=orderBy, limit=limit, asDicts=True)
+
+    def stream_data(self, columnFilters:List, orderBy:List = (), columns:Sequence[str] | None = None) -> AsyncIterator[Dict]:
+        return self.dbHandler.stream_table_data(self.dbHandler.table_columns(self.dbt, columns), columnFilters, orderBy=orderBy)
+
+    async def get_aggregated_data(self, aggregations:Dict, columnFilters:List, groupBy:Dict | None = None):
+        return await self.dbHandler.get_aggregated_data(aggregations, columnFilters, groupBy)
+
+    async def parse_file(self, filePath:str, fileHash:str | None = None) -> pd.DataFrame:
+        return await self._preprocess_file(self.preprocessingHandler, filePath, fileHash)
+
+    def is_statement_file(self, filePath:str) -> bool:
+        # Выписка Тинькофф - PDF, узнается по сигнатуре в начале файла
+        with open(filePath, "rb") as f:
+            return f.read(5) == b"%PDF-"
+
+    def prepare_insert_frame(self, userID:int, df:pd.DataFrame, fileName:str, categoryResolver:Callable | None = None,
+                             seenRowKeys:Counter | None = None) -> pd.DataFrame:
+        insertFrame = df[["operationDate", "postingDate", "description", "description2", "currencyAmount", "amount"]].assign(
+            userID = userID,
+            fileName = fileName,
+        )
+        insertFrame = insertFrame.join(self._resolved_category_frame(categoryResolver, df[["description", "description2"]]))
+        insertFrame["rowFingerprint"] = self._row_fingerprints(userID, self.slug, df, seenRowKeys=seenRowKeys)
+        return insertFrame
+
+    async def insert_frame(self, userID:int, df:pd.DataFrame, fileName:str, categoryResolver:Callable | None = None,
+                           seenRowKeys:Counter | None = None):
+        return await self.insert_frames([self.prepare_insert_frame(userID, df, fileName, categoryResolver, seenRowKeys)])
+
+    async def insert_file(self, userID:int, filePath:str, categoryResolver:Callable | None = None, fileName:str | None = None):
+        df = await self.parse_file(filePath)
+        return await self.insert_frame(userID, df, fileName or filePath.split(os.sep)[-1], categoryResolver)
+
+    async def insert_data(self, addTransactionData: CreateHandlerBankTransactions, categoryResolver:Callable | None = None):       
         createBankTransaction = await self.dbHandler.insert_data(
             data=(self.dbt(
                 userID = addTransactionData.userID,
@@ -249,6 +386,7 @@ class TinkoffBankHandler(AbstractBankFileHandler):
                 description2 = None,
                 currencyAmount = addTransactionData.currencyAmount,
                 amount = None,
+                **self._resolved_category_values(categoryResolver, description=addTransactionData.description)
                 ),
             )
         )
@@ -363,32 +501,47 @@ class TinkoffBankHandler(AbstractBankFileHandler):
         return valid, skipped
 
     async def update_data(self, transactionID:int, updatesData: TinkoffHandlerUpdateData):
-        async with self.dbHandler.create_session()() as sess:
-            try:
-                obj = await sess.get(self.dbt, transactionID)  # AsyncSession.get
-                if obj is None:
-                    return None
-                valid, _ = self.__normalize_updates_for_model(updatesData.to_dict())
-                for k, v in valid.items():
-                    setattr(obj, k, v)
-                await sess.commit()
-                await sess.refresh(obj)
-                return obj
-            except (IntegrityError, SQLAlchemyError):
-                await sess.rollback()
-                raise
+        valid, _ = self.__normalize_updates_for_model(updatesData.to_dict())
+        return await self.dbHandler.update_by_id(self.dbt, transactionID, valid)
 
 class CashBankHandler(AbstractBankFileHandler):
     def __init__(self, logerHandler, dbHandler, dbt):
         super().__init__(logerHandler, dbHandler, dbt)
    
-    async def get_data(self, columnFilters:List):
-        return await self.dbHandler.get_table_data([self.dbt], columnFilters)
+    async def get_data(self, columnFilters:List, orderBy:List = (), columns:Sequence[str] | None = None, limit:int | None = None):
+        # columns - только нужные колонки словарями, без ORM-объектов
+        if columns is None:
+            return await self.dbHandler.get_table_data([self.dbt], columnFilters, orderBy=orderBy, limit=limit)
+        return await self.dbHandler.get_table_data(self.dbHandler.table_columns(self.dbt, columns), columnFilters, orderBy=orderBy, limit=limit, asDicts=True)
+
+    def stream_data(self, columnFilters:List, orderBy:List = (), columns:Sequence[str] | None = None) -> AsyncIterator[Dict]:
+        return self.dbHandler.stream_table_data(self.dbHandler.table_columns(self.dbt, columns), columnFilters, orderBy=orderBy)
+
+    async def get_aggregated_data(self, aggregations:Dict, columnFilters:List, groupBy:Dict | None = None):
+        return await self.dbHandler.get_aggregated_data(aggregations, columnFilters, groupBy)
+
+    async def parse_file(self, filePath:str = None, fileHash:str | None = None) -> pd.DataFrame:
+        # Наличные вносятся только вручную, файла выписки у них нет
+        return pd.DataFrame()
 
-    async def insert_file(self):
+    def is_statement_file(self, filePath:str = None) -> bool:
+        return False
+
+    def prepare_insert_frame(self, userID:int, df:pd.DataFrame, fileName:str, categoryResolver:Callable | None = None,
+                             seenRowKeys:Counter | None = None) -> pd.DataFrame:
+        return pd.DataFrame()
+
+    async def insert_frame(self, userID:int, df:pd.DataFrame, fileName:str, categoryResolver:Callable | None = None,
+                           seenRowKeys:Counter | None = None):
+        return []
+
+    async def insert_frames(self, insertFrames:Iterable[pd.DataFrame]):
+        return []
+
+    async def insert_file(self, userID:int = None, filePath:str = None, categoryResolver:Callable | None = None, fileName:str | None = None):
         return None
 
-    async def insert_data(self, addTransactionData: CreateHandlerBankTransactions):
+    async def insert_data(self, addTransactionData: CreateHandlerBankTransactions, categoryResolver:Callable | None = None):
         createBankTransaction = await self.dbHandler.insert_data(
             data=(self.dbt(
                     userID = addTransactionData.userID,
@@ -398,6 +551,7 @@ class CashBankHandler(AbstractBankFileHandler):
                     currencyAmount = addTransactionData.currencyAmount,
                     status = None,
                     fileName=addTransactionData.fileName,
+                    **self._resolved_category_values(categoryResolver, description=addTransactionData.description)
                 ),
             )
         )
@@ -512,18 +666,6 @@ class CashBankHandler(AbstractBankFileHandler):
         return valid, skipped
 
     async def update_data(self, transactionID:int, updatesData: CashHandlerUpdateData):
-        async with self.dbHandler.create_session()() as sess:
-            try:
-                obj = await sess.get(self.dbt, transactionID)  # AsyncSession.get
-                if obj is None:
-                    return None
-                valid, _ = self.__normalize_updates_for_model(updatesData.to_dict())
-                for k, v in valid.items():
-                    setattr(obj, k, v)
-                await sess.commit()
-                await sess.refresh(obj)
-                return obj
-            except (IntegrityError, SQLAlchemyError):
-                await sess.rollback()
-                raise
+        valid, _ = self.__normalize_updates_for_model(updatesData.to_dict())
+        return await self.dbHandler.update_by_id(self.dbt, transactionID, valid)
 
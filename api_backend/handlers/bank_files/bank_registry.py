@@ -1,6 +1,7 @@
 from fastapi import HTTPException, status
 from typing import Dict, Type
 from .bank_load_handlers import AbstractBankFileHandler
+from .bank_transactions_view import AbstractBankTransactionsViewHandler
 from .schema import RegistryConstSchema
 
 class BankHandlerRegistry:
@@ -8,12 +9,16 @@ class BankHandlerRegistry:
         self._handlers: Dict[str, AbstractBankFileHandler] = {}
         self._handlers_const: Dict[str,RegistryConstSchema] = {}
         self.slugNameList:list = []
+        self._view_handler: AbstractBankTransactionsViewHandler | None = None
 
     def register(self, bankSlug: str, handlerObj: Type[AbstractBankFileHandler], const:RegistryConstSchema | Dict = {}):
         self._handlers[bankSlug] = handlerObj
         self._handlers_const[bankSlug] = const
         self.slugNameList.append(bankSlug)
 
+    def register_view(self, viewHandler: AbstractBankTransactionsViewHandler):
+        self._view_handler = viewHandler
+
     def _is_slug_exist(self, slug:str):
         if slug in self._handlers:
             return True
@@ -29,4 +34,20 @@ class BankHandlerRegistry:
     
     def get_const(self, bankSlug: str) -> RegistryConstSchema:
         self._error_ifslug_does_not_registered(bankSlug)
-        return self._handlers_const[bankSlug]
\ No newline at end of file
+        return self._handlers_const[bankSlug]
+
+    def get_view_handler(self) -> AbstractBankTransactionsViewHandler:
+        if self._view_handler is None:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Bank transactions view does not registered")
+        return self._view_handler
+
+    def detect_slug(self, filePath: str) -> str | None:
+        # Банк файла определяется по содержимому: первый обработчик, узнавший свой формат
+        for slug, handler in self._handlers.items():
+            if handler.is_statement_file(filePath):
+                return slug
+        return None
+
+    def error_if_slugs_does_not_registered(self, slugs: list[str]):
+        for slug in slugs:
+            self._error_ifslug_does_not_registered(slug)
\ No newline at end of file
@@ -0,0 +1,115 @@
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, List, Sequence
+from sqlalchemy import select, union_all, literal, null, cast, func, case, String
+
+from ..logers.loger_handlers import LogerHandler
+from ..db.db_handlers import AbstractDataBaseHandler
+from .bank_load_handlers import AbstractBankFileHandler
+
+
+class AbstractBankTransactionsViewHandler(ABC):
+    # Нормализованный набор колонок общий для всех банковских таблиц
+    viewColumns: List[str] = [
+        "id",
+        "userID",
+        "fileName",
+        "operationDate",
+        "postingDate",
+        "code",
+        "category",
+        "description",
+        "description2",
+        "currencyAmount",
+        "amount",
+        "status",
+        "resolvedCategoryID",
+        "resolvedCategory",
+    ]
+
+    @abstractmethod
+    def __init__(self, logerHandler, dbHandler, bankHandlers):
+        super().__init__()
+        self.logerHandler: LogerHandler = logerHandler
+        self.dbHandler: AbstractDataBaseHandler = dbHandler
+        self.bankHandlers: Dict[str, AbstractBankFileHandler] = bankHandlers
+
+    @abstractmethod
+    def get_data(self, columnFilters: Sequence, orderBy: Sequence = (), limit: int | None = None, columns: Sequence[str] | None = None):
+        pass
+
+    @abstractmethod
+    def stream_data(self, columnFilters: Sequence, orderBy: Sequence = (), columns: Sequence[str] | None = None):
+        pass
+
+    @abstractmethod
+    def get_aggregated_data(self, aggregations: Dict, columnFilters: Sequence, groupBy: Dict | None = None):
+        pass
+
+    @abstractmethod
+    def get_top_data_by_slug(self, columnFilters: Sequence, orderBy: Sequence, limit: int):
+        pass
+
+
+class BankTransactionsViewHandler(AbstractBankTransactionsViewHandler):
+    """UNION ALL всех банковских таблиц с колонкой slug: один запрос вместо цикла по BankSlugs."""
+
+    def __init__(self, logerHandler, dbHandler, bankHandlers):
+        super().__init__(logerHandler, dbHandler, bankHandlers)
+        self.dbt = self._build_view()
+
+    def _build_view(self):
+        columnTypes = {}
+        for bankHandler in self.bankHandlers.values():
+            for column in bankHandler.dbt.__table__.columns:
+                columnTypes.setdefault(column.name, column.type)
+
+        slugSelects = []
+        for slug, bankHandler in self.bankHandlers.items():
+            table = bankHandler.dbt.__table__
+            slugSelects.append(select(
+                *[table.c[name].label(name) if name in table.c else cast(null(), columnTypes.get(name, String)).label(name)
+                  for name in self.viewColumns],
+                literal(slug, String).label("slug"),
+            ))
+
+        return union_all(*slugSelects).subquery("bank_transactions")
+
+    def slug_order(self, slugs: Sequence[str], slugColumn=None):
+        # Порядок банков в ответе такой же, как в запросе клиента
+        slugColumn = self.dbt.c.slug if slugColumn is None else slugColumn
+        return case({slug: position for position, slug in enumerate(slugs)}, value=slugColumn, else_=len(slugs))
+
+    def to_slug_dict(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        # Обратно к колонкам исходной таблицы банка (без нормализованных пустых полей)
+        return {name: row[name] for name in self.bankHandlers[row["slug"]].client_columns()}
+
+    async def get_data(self, columnFilters: Sequence, orderBy: Sequence = (), limit: int | None = None,
+                       columns: Sequence[str] | None = None) -> List[Dict[str, Any]]:
+        # columns - имена колонок представления (вместе со slug), по умолчанию все
+        return await self.dbHandler.get_table_data(self.dbHandler.table_columns(self.dbt, columns), columnFilters,
+                                                   orderBy=orderBy, limit=limit, asDicts=True)
+
+    def stream_data(self, columnFilters: Sequence, orderBy: Sequence = (), columns: Sequence[str] | None = None) -> AsyncIterator[Dict[str, Any]]:
+        return self.dbHandler.stream_table_data(self.dbHandler.table_columns(self.dbt, columns), columnFilters, orderBy=orderBy)
+
+    async def get_aggregated_data(self, aggregations: Dict, columnFilters: Sequence, groupBy: Dict | None = None) -> List[Dict[str, Any]]:
+        return await self.dbHandler.get_aggregated_data(aggregations, columnFilters, groupBy)
+
+    async def get_top_data_by_slug(self, columnFilters: Sequence, orderBy: Sequence, limit: int) -> Dict[str, List[Dict[str, Any]]]:
+        rowNumber = func.row_number().over(partition_by=self.dbt.c.slug, order_by=orderBy).label("rowNumber")
+        rankedView = select(*self.dbt.c, rowNumber)
+        for f in columnFilters:
+            rankedView = rankedView.where(f)
+        rankedView = rankedView.subquery("ranked_bank_transactions")
+
+        viewData = await self.dbHandler.get_table_data(
+            [rankedView.c[name] for name in self.viewColumns + ["slug"]],
+            (rankedView.c.rowNumber <= limit,),
+            orderBy=(self.slug_order(list(self.bankHandlers), rankedView.c.slug), rankedView.c.rowNumber),
+        )
+
+        topData: Dict[str, List[Dict[str, Any]]] = {slug: [] for slug in self.bankHandlers}
+        for row in viewData:
+            row = row._asdict()
+            topData[row["slug"]].append(self.to_slug_dict(row))
+        return topData
@@ -0,0 +1,49 @@
+import pickle
+import tempfile
+import pandas as pd
+from typing import Iterator, List
+
+
+class FrameSpool:
+    """Буфер кусков одного файла между разбором и вставкой: первый кусок в памяти, остальные - во временном файле.
+
+    Файл вставляется одной транзакцией уже после разбора, поэтому писатель базы не ждет парсер,
+    а потоковая выгрузка не собирается в памяти целиком.
+    """
+
+    def __init__(self, memoryFrames: int = 1):
+        self.memoryFrames: int = memoryFrames
+        self.frames: List[pd.DataFrame] = []
+        self.spoolFile = None
+        self.spooledCount: int = 0
+
+    def append(self, frame: pd.DataFrame):
+        if len(self.frames) < self.memoryFrames:
+            self.frames.append(frame)
+            return
+        if self.spoolFile is None:
+            self.spoolFile = tempfile.TemporaryFile()
+        # Временный файл пишет и читает только этот процесс - pickle здесь безопасен
+        pickle.dump(frame, self.spoolFile, protocol=pickle.HIGHEST_PROTOCOL)
+        self.spooledCount += 1
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        yield from self.frames
+        if self.spoolFile is None:
+            return
+        self.spoolFile.seek(0)
+        for _ in range(self.spooledCount):
+            yield pickle.load(self.spoolFile)
+
+    def close(self):
+        self.frames = []
+        if self.spoolFile is not None:
+            self.spoolFile.close()
+            self.spoolFile = None
+        self.spooledCount = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excInfo):
+        self.close()
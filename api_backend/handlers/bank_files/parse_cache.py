@@ -0,0 +1,192 @@
+import os
+import json
+import hashlib
+import zipfile
+import tempfile
+import numpy as np
+import pandas as pd
+from datetime import date
+from typing import Iterable, Iterator
+from abc import ABC, abstractmethod
+
+from ..logers.loger_handlers import LogerHandler
+
+
+class AbstractParseCacheHandler(ABC):
+    @abstractmethod
+    def __init__(self, logerHandler, cacheDir, maxSize):
+        super().__init__()
+        self.logerHandler: LogerHandler = logerHandler
+        self.cacheDir: str = cacheDir
+        self.maxSize: int = maxSize
+
+    @abstractmethod
+    def make_key(self, parserName: str, parserVersion: str, dataPath: str, fileHash: str | None = None) -> str:
+        pass
+
+    @abstractmethod
+    def get(self, cacheKey: str) -> pd.DataFrame | None:
+        pass
+
+    @abstractmethod
+    def put(self, cacheKey: str, df: pd.DataFrame):
+        pass
+
+    @abstractmethod
+    def get_chunks(self, cacheKey: str) -> Iterator[pd.DataFrame] | None:
+        pass
+
+    @abstractmethod
+    def put_chunks(self, cacheKey: str, chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        pass
+
+
+class NpzParseCacheHandler(AbstractParseCacheHandler):
+    """Кэш результатов разбора выписок на диске: один .npz на файл, ключ - парсер, его версия и SHA-256 файла.
+
+    Работает из воркеров пула процессов: запись через временный файл и os.replace, LRU - по mtime файлов кэша.
+    """
+
+    hashChunkSize: int = 1024 * 1024
+
+    def __init__(self, logerHandler, cacheDir: str, maxSize: int = 256 * 1024 * 1024):
+        super().__init__(logerHandler, cacheDir, maxSize)
+
+    def make_key(self, parserName: str, parserVersion: str, dataPath: str, fileHash: str | None = None) -> str:
+        # fileHash - SHA-256 файла, если он уже посчитан при загрузке; иначе файл хешируется здесь
+        if fileHash is None:
+            fileSha = hashlib.sha256()
+            with open(dataPath, "rb") as f:
+                while chunk := f.read(self.hashChunkSize):
+                    fileSha.update(chunk)
+            fileHash = fileSha.hexdigest()
+        return f"{parserName}-{parserVersion}-{fileHash}"
+
+    def _cache_path(self, cacheKey: str) -> str:
+        return os.path.join(self.cacheDir, f"{cacheKey}.npz")
+
+    @staticmethod
+    def _encode_column(values: pd.Series):
+        # Колонки без pickle: числа как есть, даты -> datetime64[D], строки -> unicode-массив; пропуски - маской.
+        # Колонку с чем-то другим (смесь типов) не кэшируем - вернется None
+        if values.dtype.kind in "fiub":
+            return "number", values.to_numpy(), None
+
+        isMissing = values.isna().to_numpy()
+        presentValues = values[~isMissing]
+        if presentValues.map(type).eq(date).all() and len(presentValues):
+            return "date", values.where(~isMissing, None).to_numpy(dtype="datetime64[D]"), isMissing
+        if presentValues.map(type).eq(str).all():
+            return "str", values.where(~isMissing, "").to_numpy(dtype=str), isMissing
+        return None
+
+    @staticmethod
+    def _decode_column(kind: str, values: np.ndarray, isMissing: np.ndarray | None) -> pd.Series:
+        if kind == "number":
+            return pd.Series(values)
+        if kind == "date":
+            decoded = pd.Series(values.astype(object), dtype=object)
+        else:
+            decoded = pd.Series(values, dtype=object)
+        return decoded.where(~isMissing, None)
+
+    def get(self, cacheKey: str) -> pd.DataFrame | None:
+        cachedChunks = self.get_chunks(cacheKey)
+        if cachedChunks is None:
+            return None
+        try:
+            frames = list(cachedChunks)
+        except (KeyError, ValueError, OSError):
+            return None
+        return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+    def put(self, cacheKey: str, df: pd.DataFrame):
+        for _ in self.put_chunks(cacheKey, [df]):
+            pass
+
+    def get_chunks(self, cacheKey: str) -> Iterator[pd.DataFrame] | None:
+        # Запись кэша - один или несколько кусков (потоковый разбор), куски читаются из файла по одному
+        cachePath = self._cache_path(cacheKey)
+        try:
+            cached = np.load(cachePath, allow_pickle=False)
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+        try:
+            chunkCount = int(cached["chunkCount"])
+            # Попадание освежает файл для LRU
+            os.utime(cachePath)
+        except (KeyError, ValueError, OSError):
+            cached.close()
+            return None
+        return self._iter_cached_chunks(cached, chunkCount)
+
+    def _iter_cached_chunks(self, cached, chunkCount: int) -> Iterator[pd.DataFrame]:
+        with cached:
+            for chunkInd in range(chunkCount):
+                columns = json.loads(str(cached[f"columns_{chunkInd}"]))
+                yield pd.DataFrame({name: self._decode_column(kind, cached[f"values_{chunkInd}_{ind}"],
+                                                              cached[f"missing_{chunkInd}_{ind}"] if kind != "number" else None)
+                                    for ind, (name, kind) in enumerate(columns)})
+
+    def put_chunks(self, cacheKey: str, chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        # Куски проходят насквозь и по дороге дописываются во временный zip; в кэш он попадает только целиком,
+        # когда поток дошел до конца. Кусок, который не кодируется, отменяет запись, но не разбор
+        os.makedirs(self.cacheDir, exist_ok=True)
+        fileDescriptor, tmpPath = tempfile.mkstemp(prefix="parse_", suffix=".tmp", dir=self.cacheDir)
+        isCacheable = True
+        try:
+            with os.fdopen(fileDescriptor, "wb") as f, zipfile.ZipFile(f, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+                chunkCount = 0
+                for chunk in chunks:
+                    if isCacheable:
+                        isCacheable = self._write_chunk(zf, chunkCount, chunk)
+                        chunkCount += 1
+                    yield chunk
+                if isCacheable:
+                    self._write_array(zf, "chunkCount", np.array(chunkCount))
+            if isCacheable:
+                os.replace(tmpPath, self._cache_path(cacheKey))
+        finally:
+            if os.path.exists(tmpPath):
+                os.remove(tmpPath)
+        if isCacheable:
+            self._evict()
+
+    @staticmethod
+    def _write_array(zf: zipfile.ZipFile, name: str, values: np.ndarray):
+        # Тот же формат, что у np.savez: массив .npy внутри zip
+        with zf.open(f"{name}.npy", "w", force_zip64=True) as f:
+            np.lib.format.write_array(f, np.asanyarray(values), allow_pickle=False)
+
+    def _write_chunk(self, zf: zipfile.ZipFile, chunkInd: int, df: pd.DataFrame) -> bool:
+        encodedColumns = [self._encode_column(df[name]) for name in df.columns]
+        if any(x is None for x in encodedColumns):
+            return False
+        for ind, (kind, values, isMissing) in enumerate(encodedColumns):
+            self._write_array(zf, f"values_{chunkInd}_{ind}", values)
+            if isMissing is not None:
+                self._write_array(zf, f"missing_{chunkInd}_{ind}", isMissing)
+        columns = [(name, kind) for name, (kind, _, _) in zip(df.columns, encodedColumns)]
+        self._write_array(zf, f"columns_{chunkInd}", np.array(json.dumps(columns, ensure_ascii=False)))
+        return True
+
+    def _evict(self):
+        # Самые давно использованные файлы удаляются, пока кэш не уложится в maxSize
+        cacheFiles = []
+        for entry in os.scandir(self.cacheDir):
+            if entry.name.endswith(".npz"):
+                try:
+                    fileStat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                cacheFiles.append((fileStat.st_mtime, fileStat.st_size, entry.path))
+
+        totalSize = sum(x[1] for x in cacheFiles)
+        for _, fileSize, cachePath in sorted(cacheFiles):
+            if totalSize <= self.maxSize:
+                break
+            try:
+                os.remove(cachePath)
+            except FileNotFoundError:
+                pass
+            totalSize -= fileSize
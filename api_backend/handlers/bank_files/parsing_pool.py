@@ -0,0 +1,174 @@
+import queue
+import asyncio
+import itertools
+import multiprocessing
+import pandas as pd
+from abc import ABC, abstractmethod
+from typing import AsyncIterator
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from fastapi import HTTPException, status
+
+from ..logers.loger_handlers import LogerHandler
+from .bank_file_preprocessing import AbstractSyupplyer
+
+
+def put_statement_chunks(preprocessingHandler: AbstractSyupplyer, dataPath: str, fileHash: str | None,
+                         chunkQueue, stopEvent, putTimeout: float):
+    # Выполняется в воркере пула: куски потокового разбора уходят в очередь менеджера, None - конец выписки.
+    # Очередь ограничена - воркер ждет, пока родитель заберет кусок; stopEvent - родитель больше не читает
+    chunks = preprocessingHandler.preprocessing_chunks(dataPath, fileHash)
+    try:
+        for chunk in itertools.chain(chunks, [None]):
+            if not _put_until_stopped(chunkQueue, chunk, stopEvent, putTimeout):
+                return
+    finally:
+        chunks.close()
+
+
+def _put_until_stopped(chunkQueue, chunk, stopEvent, putTimeout: float) -> bool:
+    while not stopEvent.is_set():
+        try:
+            chunkQueue.put(chunk, timeout=putTimeout)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+class AbstractParsingPoolHandler(ABC):
+    @abstractmethod
+    def __init__(self, logerHandler, maxWorkers, parseTimeout):
+        super().__init__()
+        self.logerHandler: LogerHandler = logerHandler
+        self.maxWorkers: int = maxWorkers
+        self.parseTimeout: float | None = parseTimeout
+
+    @abstractmethod
+    def parse(self, preprocessingHandler: AbstractSyupplyer, dataPath: str, fileHash: str | None = None) -> pd.DataFrame:
+        pass
+
+    @abstractmethod
+    def iter_chunks(self, preprocessingHandler: AbstractSyupplyer, dataPath: str, fileHash: str | None = None) -> AsyncIterator[pd.DataFrame]:
+        pass
+
+    @abstractmethod
+    def shutdown(self):
+        pass
+
+
+class ProcessParsingPoolHandler(AbstractParsingPoolHandler):
+    """Разбор PDF/Excel выписок в пуле процессов, чтобы тяжелый парсинг не блокировал event loop."""
+
+    # Сколько раз повторить разбор на новом пуле, если воркер умер посреди разбора
+    brokenPoolRetries: int = 1
+    # Потоковый разбор: сколько кусков может ждать родителя в очереди и как часто проверять воркер и таймаут
+    streamQueueSize: int = 2
+    streamPollSeconds: float = 0.5
+
+    def __init__(self, logerHandler, maxWorkers: int = 2, parseTimeout: float | None = 120.0):
+        super().__init__(logerHandler, maxWorkers, parseTimeout)
+        self.pool: ProcessPoolExecutor | None = None
+        self.slots: asyncio.Semaphore | None = None
+        self.manager = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # Пул создается лениво: воркеры не стартуют при импорте приложения.
+        # spawn, а не fork - в родителе уже крутятся потоки aiosqlite
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.maxWorkers, mp_context=multiprocessing.get_context("spawn"))
+        return self.pool
+
+    def _get_manager(self):
+        # Очереди кусков потокового разбора живут в процессе-менеджере: обычную очередь воркеру пула не передать
+        if self.manager is None:
+            self.manager = multiprocessing.get_context("spawn").Manager()
+        return self.manager
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        # Не больше maxWorkers разборов одновременно: таймаут считается от старта разбора, а не от очереди в пул
+        if self.slots is None:
+            self.slots = asyncio.Semaphore(self.maxWorkers)
+        return self.slots
+
+    def _terminate_pool(self, pool: ProcessPoolExecutor | None = None):
+        # Зависший воркер нельзя отменить через future, поэтому пул гасим целиком и пересоздаем при следующем разборе.
+        # pool - пул, на котором случилась ошибка: уже пересозданный соседним разбором пул не трогаем
+        if pool is not None and pool is not self.pool:
+            return
+        pool, self.pool = self.pool, None
+        if pool is None:
+            return
+        for process in list((pool._processes or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    async def parse(self, preprocessingHandler: AbstractSyupplyer, dataPath: str, fileHash: str | None = None) -> pd.DataFrame:
+        async with self._get_slots():
+            for _ in range(self.brokenPoolRetries + 1):
+                pool = self._get_pool()
+                try:
+                    future = asyncio.wrap_future(pool.submit(preprocessingHandler.preprocessing_data, dataPath, fileHash=fileHash))
+                    return await asyncio.wait_for(future, timeout=self.parseTimeout)
+                except asyncio.TimeoutError:
+                    self._terminate_pool(pool)
+                    raise HTTPException(status_code=status.HTTP_408_REQUEST_TIMEOUT,
+                                        detail=f"File parsing exceeded {self.parseTimeout} seconds")
+                except BrokenProcessPool:
+                    # Воркер умер (OOM, падение в PyMuPDF/openpyxl) - сломанный пул больше ничего не примет.
+                    # Меняем его на новый и повторяем разбор; если упадет снова, ошибка только у этого файла
+                    self._terminate_pool(pool)
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                detail="File parsing worker crashed")
+
+    async def iter_chunks(self, preprocessingHandler: AbstractSyupplyer, dataPath: str,
+                          fileHash: str | None = None) -> AsyncIterator[pd.DataFrame]:
+        # Потоковый разбор большой выписки в пуле: куски приходят в родителя по мере разбора через ограниченную очередь.
+        # Таймаут считается на весь файл, упавший воркер - как в parse, только без повтора: куски уже могли уйти
+        async with self._get_slots():
+            manager = await asyncio.to_thread(self._get_manager)
+            chunkQueue = manager.Queue(maxsize=self.streamQueueSize)
+            stopEvent = manager.Event()
+            loop = asyncio.get_running_loop()
+            deadline = None if self.parseTimeout is None else loop.time() + self.parseTimeout
+            pool = self._get_pool()
+            future = None
+            try:
+                future = asyncio.wrap_future(pool.submit(put_statement_chunks, preprocessingHandler, dataPath, fileHash,
+                                                         chunkQueue, stopEvent, self.streamPollSeconds))
+                while True:
+                    try:
+                        chunk = await asyncio.to_thread(chunkQueue.get, True, self.streamPollSeconds)
+                    except queue.Empty:
+                        if future.done():
+                            # Воркер завершился, а конца выписки в очереди нет - ошибка разбора или падение процесса
+                            future.result()
+                        if deadline is not None and loop.time() > deadline:
+                            raise asyncio.TimeoutError
+                        continue
+                    if chunk is None:
+                        break
+                    yield chunk
+                await future
+            except asyncio.TimeoutError:
+                self._terminate_pool(pool)
+                raise HTTPException(status_code=status.HTTP_408_REQUEST_TIMEOUT,
+                                    detail=f"File parsing exceeded {self.parseTimeout} seconds")
+            except BrokenProcessPool:
+                self._terminate_pool(pool)
+                raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                    detail="File parsing worker crashed")
+            finally:
+                # Родитель больше не читает (конец, ошибка или вставка прервала обход) - воркер бросает разбор,
+                # а его результат (в т.ч. падение погашенного пула) уже никому не нужен
+                stopEvent.set()
+                if future is not None and not future.done():
+                    future.cancel()
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+            self.pool = None
+        if self.manager is not None:
+            self.manager.shutdown()
+            self.manager = None
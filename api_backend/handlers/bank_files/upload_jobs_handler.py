@@ -0,0 +1,60 @@
+import uuid
+from datetime import datetime
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List
+from sqlalchemy.sql.elements import ColumnElement
+
+from ..logers.loger_handlers import LogerHandler
+from ..db.db_handlers import AbstractDataBaseHandler
+from ..db.orm_models.abstract_models import AbstractUploadJobsCatalog
+
+
+class AbstractUploadJobsHandler(ABC):
+
+    @abstractmethod
+    def __init__(self, dbt, logerHandler, dbHandler):
+        super().__init__()
+        self.logerHandler: LogerHandler = logerHandler
+        self.dbHandler: AbstractDataBaseHandler = dbHandler
+        self.dbt: AbstractUploadJobsCatalog = dbt
+
+    @abstractmethod
+    def add_job(self, userID: int, slug: str, fileName: str, filePath: str, fileHash: str):
+        pass
+
+    @abstractmethod
+    def update_job(self, jobID: str, values: Dict[str, Any]):
+        pass
+
+    @abstractmethod
+    def get_jobs(self, filterBy: Iterable[ColumnElement[bool]], orderBy: Iterable = ()):
+        pass
+
+
+class UploadJobsHandler(AbstractUploadJobsHandler):
+    """Задачи загрузки выписок в sqlite: статус и счетчики переживают рестарт приложения."""
+
+    def __init__(self, dbt, logerHandler, dbHandler):
+        super().__init__(dbt, logerHandler, dbHandler)
+
+    async def add_job(self, userID: int, slug: str, fileName: str, filePath: str, fileHash: str) -> Dict[str, Any]:
+        createdAt = datetime.now()
+        createdJob = await self.dbHandler.insert_data(data=(self.dbt(
+            id=uuid.uuid4().hex,
+            userID=userID,
+            slug=slug,
+            fileName=fileName,
+            filePath=filePath,
+            fileHash=fileHash,
+            status="queued",
+            createdAt=createdAt,
+            updatedAt=createdAt,
+        ),))
+        return createdJob[0]
+
+    async def update_job(self, jobID: str, values: Dict[str, Any]) -> int:
+        return await self.dbHandler.update_data(self.dbt, {**values, "updatedAt": datetime.now()}, (self.dbt.id == jobID,))
+
+    async def get_jobs(self, filterBy: Iterable[ColumnElement[bool]], orderBy: Iterable = ()) -> List[Dict[str, Any]]:
+        gotJobs = await self.dbHandler.get_table_data([self.dbt], filterBy, orderBy=orderBy)
+        return [x.to_dict() for x in gotJobs]
@@ -0,0 +1,45 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict
+
+from ..logers.loger_handlers import LogerHandler
+from ..db.db_handlers import AbstractDataBaseHandler
+from ..db.orm_models.abstract_models import AbstractUploadedFilesCatalog
+
+
+class AbstractUploadedFilesHandler(ABC):
+
+    @abstractmethod
+    def __init__(self, dbt, logerHandler, dbHandler):
+        super().__init__()
+        self.logerHandler: LogerHandler = logerHandler
+        self.dbHandler: AbstractDataBaseHandler = dbHandler
+        self.dbt: AbstractUploadedFilesCatalog = dbt
+
+    @abstractmethod
+    def get_file(self, userID: int, slug: str, fileHash: str):
+        pass
+
+    @abstractmethod
+    def add_file(self, userID: int, slug: str, fileHash: str, fileName: str, loadedRows: int):
+        pass
+
+
+class UploadedFilesHandler(AbstractUploadedFilesHandler):
+    """Реестр загруженных выписок по SHA-256 содержимого: повторная загрузка того же файла не парсится."""
+
+    def __init__(self, dbt, logerHandler, dbHandler):
+        super().__init__(dbt, logerHandler, dbHandler)
+
+    async def get_file(self, userID: int, slug: str, fileHash: str) -> Dict[str, Any] | None:
+        gotFiles = await self.dbHandler.get_table_data(
+            self.dbHandler.table_columns(self.dbt), (self.dbt.userID == userID, self.dbt.slug == slug, self.dbt.fileHash == fileHash),
+            limit=1, asDicts=True)
+        return gotFiles[0] if gotFiles else None
+
+    async def add_file(self, userID: int, slug: str, fileHash: str, fileName: str, loadedRows: int):
+        # Две одновременные загрузки одного файла: вторая запись тихо пропускается уникальным индексом
+        return await self.dbHandler.insert_bulk_data(
+            self.dbt,
+            [{"userID": userID, "slug": slug, "fileHash": fileHash, "fileName": fileName, "loadedRows": loadedRows}],
+            conflictColumns=("userID", "slug", "fileHash"),
+        )
@@ -6,7 +6,7 @@ from abc import ABC, abstractmethod
 from sqlalchemy import types as satypes
 from sqlalchemy.sql.elements import ColumnElement
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
-from typing import Iterable, Any, Dict, Mapping, Tuple
+from typing import Iterable, Any, Dict, Mapping, Sequence, Tuple
 
 from .schema import AddCategoryConditionsSchema, UpdateDataConditionsSchema
 from ...handlers.logers.loger_handlers import LogerHandler
@@ -36,7 +36,7 @@ class AbstractTransactionCategoryConditionsHandler(ABC):
         pass
 
     @abstractmethod
-    def get_category_conditions(self, filterBy:Iterable[ColumnElement[bool]]):
+    def get_category_conditions(self, filterBy:Iterable[ColumnElement[bool]], orderBy:Iterable = (), columns:Sequence[str] | None = None):
         pass
 
 class TransactionCategoryConditionsHandler(AbstractTransactionCategoryConditionsHandler):
@@ -157,21 +157,11 @@ class TransactionCategoryConditionsHandler(AbstractTransactionCategoryConditions
         return valid, skipped
 
     async def update_category_conditions(self, updateDate:UpdateDataConditionsSchema):
-        async with self.dbHandler.create_session()() as sess:
-            try:
-                obj = await sess.get(self.dbt, updateDate.conditionID)  # AsyncSession.get
-                if obj is None:
-                    return None
-
-                valid, _ = self.__normalize_updates_for_model(updateDate.to_dict())
-                for k, v in valid.items():
-                    setattr(obj, k, v)
-                await sess.commit()
-                await sess.refresh(obj)
-                return obj
-            except (IntegrityError, SQLAlchemyError):
-                await sess.rollback()
-                raise
-
-    async def get_category_conditions(self, filterBy:Iterable[ColumnElement[bool]]):
-        return await self.dbHandler.get_table_data([self.dbt], filterBy)
+        valid, _ = self.__normalize_updates_for_model(updateDate.to_dict())
+        return await self.dbHandler.update_by_id(self.dbt, updateDate.conditionID, valid)
+
+    async def get_category_conditions(self, filterBy:Iterable[ColumnElement[bool]], orderBy:Iterable = (), columns:Sequence[str] | None = None):
+        # columns - только нужные колонки словарями, без ORM-объектов
+        if columns is None:
+            return await self.dbHandler.get_table_data([self.dbt], filterBy, orderBy=orderBy)
+        return await self.dbHandler.get_table_data(self.dbHandler.table_columns(self.dbt, columns), filterBy, orderBy=orderBy, asDicts=True)
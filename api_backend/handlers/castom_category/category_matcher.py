@@ -0,0 +1,142 @@
+from collections import OrderedDict, defaultdict, deque
+from typing import Any, Dict, List, Optional
+
+
+class AhoCorasickAutomaton:
+    """Автомат Ахо-Корасик: за один проход по тексту находит минимальное значение среди совпавших шаблонов."""
+
+    def __init__(self):
+        self.transitions: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.best: List[Optional[int]] = [None]
+
+    def add_pattern(self, pattern: str, value: int) -> None:
+        state = 0
+        for char in pattern:
+            nextState = self.transitions[state].get(char)
+            if nextState is None:
+                nextState = len(self.transitions)
+                self.transitions[state][char] = nextState
+                self.transitions.append({})
+                self.fail.append(0)
+                self.best.append(None)
+            state = nextState
+        if self.best[state] is None or value < self.best[state]:
+            self.best[state] = value
+
+    def build(self) -> None:
+        # BFS по бору: суффиксные ссылки + минимум по всем шаблонам, оканчивающимся в узле
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nextState in self.transitions[state].items():
+                failState = self.fail[state]
+                while failState and char not in self.transitions[failState]:
+                    failState = self.fail[failState]
+                self.fail[nextState] = self.transitions[failState].get(char, 0)
+
+                failBest = self.best[self.fail[nextState]]
+                if failBest is not None and (self.best[nextState] is None or failBest < self.best[nextState]):
+                    self.best[nextState] = failBest
+                queue.append(nextState)
+
+    def search_min(self, text: str, stopAt: Optional[int] = None) -> Optional[int]:
+        transitions, fail, best = self.transitions, self.fail, self.best
+        state = 0
+        found: Optional[int] = None
+        for char in text:
+            while state and char not in transitions[state]:
+                state = fail[state]
+            state = transitions[state].get(char, 0)
+            value = best[state]
+            if value is not None and (found is None or value < found):
+                found = value
+                if stopAt is not None and found <= stopAt:
+                    break
+        return found
+
+
+class CategoryRulesMatcher:
+    """Скомпилированный набор правил пользователя.
+
+    isExact-условия - словарь значение -> индекс категории, остальные - автомат Ахо-Корасик
+    по склеенной строке полей. Побеждает первая по порядку категория, как в исходном переборе.
+    """
+
+    def __init__(self, categorys: List[Dict[str, Any]], matchFields: List[str]):
+        self.categorys = categorys
+        self.matchFields = matchFields
+        self.exactConditions: Dict[str, int] = {}
+        self.automaton = AhoCorasickAutomaton()
+        self.hasSubstringConditions = False
+
+        for categoryIndex, categoryItem in enumerate(categorys):
+            for condition in categoryItem.get("categoryConditions") or []:
+                conditionValue = self.normalize_text(condition.get("conditionValue"))
+                if not conditionValue:
+                    continue
+                if bool(condition.get("isExact", False)):
+                    self.exactConditions.setdefault(conditionValue, categoryIndex)
+                else:
+                    self.automaton.add_pattern(conditionValue, categoryIndex)
+                    self.hasSubstringConditions = True
+        self.automaton.build()
+
+    @staticmethod
+    def normalize_text(text: Any) -> str:
+        return ("" if text is None else str(text)).strip()
+
+    def match_index(self, transaction: Dict[str, Any]) -> Optional[int]:
+        matchValues = [self.normalize_text(transaction.get(fieldName)) for fieldName in self.matchFields]
+
+        found: Optional[int] = None
+        for fieldValue in matchValues:
+            categoryIndex = self.exactConditions.get(fieldValue)
+            if categoryIndex is not None and (found is None or categoryIndex < found):
+                found = categoryIndex
+
+        if self.hasSubstringConditions and found != 0:
+            joinedHaystack = " | ".join([v for v in matchValues if v])
+            categoryIndex = self.automaton.search_min(joinedHaystack, stopAt=0)
+            if categoryIndex is not None and (found is None or categoryIndex < found):
+                found = categoryIndex
+
+        return found
+
+    def match(self, transaction: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        categoryIndex = self.match_index(transaction)
+        return None if categoryIndex is None else self.categorys[categoryIndex]
+
+
+class CategoryRulesCache:
+    """LRU-кэш скомпилированных правил по userID с ограниченным размером.
+
+    version растет при каждой инвалидации: результат загрузки, начатой до записи в категории,
+    не попадет в кэш поверх свежих правил.
+    """
+
+    def __init__(self, maxSize: int = 256):
+        self.maxSize = maxSize
+        self.items: OrderedDict[int, CategoryRulesMatcher] = OrderedDict()
+        self.versions: Dict[int, int] = defaultdict(int)
+
+    def get(self, userID: int) -> Optional[CategoryRulesMatcher]:
+        categoryMatcher = self.items.get(userID)
+        if categoryMatcher is not None:
+            self.items.move_to_end(userID)
+        return categoryMatcher
+
+    def version(self, userID: int) -> int:
+        return self.versions[userID]
+
+    def put(self, userID: int, categoryMatcher: CategoryRulesMatcher, version: int) -> None:
+        if version != self.versions[userID]:
+            return
+        self.items[userID] = categoryMatcher
+        self.items.move_to_end(userID)
+        while len(self.items) > self.maxSize:
+            self.items.popitem(last=False)
+
+    def invalidate(self, userID: int) -> None:
+        self.versions[userID] += 1
+        self.items.pop(userID, None)
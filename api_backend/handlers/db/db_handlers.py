@@ -1,7 +1,10 @@
 # sqlalchemy = "==2.0.42"
 # aiosqlite = "==0.21.0"
-from typing import List, Sequence, Tuple, Any
-from sqlalchemy import select, delete as sa_delete
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Iterable, List, Mapping, Sequence, Tuple, Any, Dict
+import pandas as pd
+from sqlalchemy import event, select, func, delete as sa_delete, update as sa_update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
     async_sessionmaker,
@@ -20,45 +23,309 @@ class AbstractDataBaseHandler(ABC):
     def get_table_data(self,columns, columnFilters):
         pass
 
+    @abstractmethod
+    def stream_table_data(self, columns, columnFilters, orderBy, batchSize):
+        pass
+
+    @staticmethod
+    def table_columns(table, columnNames: Sequence[str] | None = None) -> List:
+        # Колонки модели/таблицы/подзапроса по именам (все - если имена не заданы) для проекции в get_table_data
+        table = getattr(table, "__table__", table)
+        return list(table.c) if columnNames is None else [table.c[name] for name in columnNames]
+
+    @abstractmethod
+    def get_aggregated_data(self, aggregations, columnFilters, groupBy):
+        pass
+
     @abstractmethod
     def insert_data(self, data) -> None:
         pass
 
+    @abstractmethod
+    def insert_bulk_data(self, table, data, conflictColumns) -> List[int]:
+        pass
+
+    @abstractmethod
+    def insert_bulk_batches(self, table, batches, conflictColumns) -> List[int]:
+        pass
+
+    @abstractmethod
+    def update_data(self, table, values, columnFilters) -> None:
+        pass
+
+    @abstractmethod
+    def update_by_id(self, table, objectID, values):
+        pass
+
     @abstractmethod
     def delete_data(self, table, columnFilters) -> None:
         pass
 
 class SqliteHandlerAsync(AbstractDataBaseHandler):
-    def __init__(self, url: str = "sqlite+aiosqlite:///database/database.db"):
-        self.engine = create_async_engine(url, echo=False, future=True)
+    periodFormats: Dict[str, str] = {
+        "day": "%Y-%m-%d",
+        "month": "%Y-%m",
+        "year": "%Y",
+    }
+
+    # Профиль соединения по умолчанию. WAL: читатели не ждут вставку выписки, писатель не ждет читателей.
+    # synchronous=NORMAL в WAL не портит базу, при падении ОС теряются только последние коммиты.
+    # cache_size < 0 - в KiB (64 MiB на соединение), busy_timeout - в мс
+    defaultPragmas: Dict[str, Any] = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -64 * 1024,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    }
+
+    def __init__(self, url: str = "sqlite+aiosqlite:///database/database.db", pragmas: Dict[str, Any] | None = None,
+                 readPoolSize: int = 5, groupCommitSize: int = 64):
+        # Запись и чтение разведены по разным движкам. engine/Session - единственное пишущее соединение (pool_size=1):
+        # все записи sqlite все равно идут по одной, зато не спорят за блокировку и не ловят "database is locked".
+        # readEngine - пул соединений только на чтение, в WAL они читают параллельно с записью
+        self.engine = create_async_engine(url, echo=False, future=True, pool_size=1, max_overflow=0)
         self.Session: async_sessionmaker[AsyncSession] = async_sessionmaker(
             self.engine, expire_on_commit=False
         )
+        self.readEngine = create_async_engine(url, echo=False, future=True, pool_size=readPoolSize, max_overflow=0)
+        self.ReadSession: async_sessionmaker[AsyncSession] = async_sessionmaker(
+            self.readEngine, expire_on_commit=False
+        )
+        self.pragmas: Dict[str, Any] = dict(self.defaultPragmas if pragmas is None else pragmas)
+        event.listen(self.engine.sync_engine, "connect", self._apply_write_pragmas)
+        event.listen(self.engine.sync_engine, "begin", self._begin_immediate)
+        event.listen(self.readEngine.sync_engine, "connect", self._apply_read_pragmas)
+
+        self.groupCommitSize: int = groupCommitSize
+        self.writeQueue: asyncio.Queue | None = None
+        self.writerTask: asyncio.Task | None = None
+
+    def _apply_pragmas(self, dbapiConnection, pragmas: Dict[str, Any]):
+        # PRAGMA выполняются на каждом новом соединении пула; journal_mode=WAL сохраняется в файле базы
+        cursor = dbapiConnection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    def _apply_write_pragmas(self, dbapiConnection, connectionRecord):
+        # Транзакцией управляем сами (см. _begin_immediate), иначе драйвер sqlite3 ломает SAVEPOINT
+        dbapiConnection.isolation_level = None
+        self._apply_pragmas(dbapiConnection, self.pragmas)
+
+    def _apply_read_pragmas(self, dbapiConnection, connectionRecord):
+        self._apply_pragmas(dbapiConnection, {**self.pragmas, "query_only": "ON"})
+
+    @staticmethod
+    def _begin_immediate(conn):
+        # Блокировка записи берется сразу при BEGIN, а не на первом INSERT посреди транзакции
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
 
     def create_session(self) -> async_sessionmaker[AsyncSession]:
-        return self.Session
+        # Наружу отдаются только сессии чтения: сессия на единственном пишущем соединении встала бы в очередь
+        # за писателем (и за pool_timeout). Все записи идут через _write - insert_*/update_*/delete_data
+        return self.ReadSession
+
+    def _get_write_queue(self) -> asyncio.Queue:
+        # Очередь и писатель создаются в работающем event loop при первой записи (и заново, если loop сменился)
+        loop = asyncio.get_running_loop()
+        if self.writerTask is None or self.writerTask.done() or self.writerTask.get_loop() is not loop:
+            self.writeQueue = asyncio.Queue()
+            self.writerTask = loop.create_task(self._writer_loop(self.writeQueue))
+        return self.writeQueue
+
+    async def _writer_loop(self, writeQueue: asyncio.Queue):
+        # Групповой коммит: все записи, накопившиеся в очереди (не больше groupCommitSize), идут одной транзакцией.
+        # Каждая запись - в своем SAVEPOINT: ошибка откатывает только ее, остальные коммитятся
+        while True:
+            batch = [await writeQueue.get()]
+            while len(batch) < self.groupCommitSize and not writeQueue.empty():
+                batch.append(writeQueue.get_nowait())
+            isStopping = None in batch
+            batch = [x for x in batch if x is not None]
+
+            results = []
+            try:
+                async with self.Session() as sess:
+                    for operation, future in batch:
+                        try:
+                            async with sess.begin_nested():
+                                results.append((future, await operation(sess), None))
+                        except Exception as e:
+                            results.append((future, None, e))
+                    await sess.commit()
+            except Exception as e:
+                results = [(future, None, e) for _, future in batch]
+
+            for future, result, error in results:
+                if future.done():
+                    continue
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(error)
+            if isStopping:
+                return
+
+    async def _write(self, operation: Callable[[AsyncSession], Awaitable[Any]]) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        self._get_write_queue().put_nowait((operation, future))
+        return await future
+
+    async def close(self):
+        if self.writerTask is not None and not self.writerTask.done():
+            self.writeQueue.put_nowait(None)
+            await self.writerTask
+        self.writerTask = None
+        self.writeQueue = None
 
     async def get_table_data(self, columns: List, columnFilters: Sequence, *args,**kwargs) -> List:
-        async with self.Session() as sess:
+        async with self.ReadSession() as sess:
             stmt = select(*columns)
             for f in columnFilters:
                 stmt = stmt.where(f)
+            if kwargs.get('orderBy'):
+                stmt = stmt.order_by(*kwargs.get('orderBy'))
             if kwargs.get('limit'):
                 stmt = stmt.limit(kwargs.get('limit'))
             result = await sess.execute(stmt)
+            if kwargs.get('asDicts'):
+                # Проекция колонок -> обычные словари: без ORM-объектов и identity map
+                return [dict(x) for x in result.mappings().all()]
             return result.scalars().all() if len(columns) == 1 else result.all()
 
+    async def stream_table_data(self, columns: List, columnFilters: Sequence, orderBy: Sequence = (), batchSize: int = 1000) -> AsyncIterator[Dict[str, Any]]:
+        # Строки словарями по мере чтения курсора: в памяти не больше batchSize строк.
+        # Соединение чтения занято до конца обхода (или до закрытия генератора, если клиент отвалился)
+        async with self.ReadSession() as sess:
+            stmt = select(*columns)
+            for f in columnFilters:
+                stmt = stmt.where(f)
+            if orderBy:
+                stmt = stmt.order_by(*orderBy)
+            result = await sess.stream(stmt.execution_options(yield_per=batchSize))
+            async for partition in result.mappings().partitions():
+                for row in partition:
+                    yield dict(row)
+
+    @classmethod
+    def period_expression(cls, column, period: str):
+        # Date хранится в sqlite строкой 'YYYY-MM-DD', поэтому период режем через strftime
+        if period not in cls.periodFormats:
+            raise ValueError(f"Unsupported period: {period}")
+        return func.strftime(cls.periodFormats[period], column)
+
+    async def get_aggregated_data(self, aggregations: Dict[str, Any], columnFilters: Sequence = (), groupBy: Dict[str, Any] | None = None) -> List[Dict[str, Any]]:
+        # aggregations/groupBy: {"имя поля в ответе": sql выражение}
+        groupBy = groupBy or {}
+        async with self.ReadSession() as sess:
+            stmt = select(
+                *[expression.label(name) for name, expression in groupBy.items()],
+                *[expression.label(name) for name, expression in aggregations.items()],
+            )
+            for f in columnFilters:
+                stmt = stmt.where(f)
+            if groupBy:
+                stmt = stmt.group_by(*groupBy.values()).order_by(*groupBy.values())
+            result = await sess.execute(stmt)
+            return [dict(x) for x in result.mappings().all()]
+
     async def insert_data(self, data: List[Any]) -> None:
-        async with self.Session() as sess:
+        async def operation(sess: AsyncSession):
             sess.add_all(data)
-            await sess.commit()
+            await sess.flush()
+
+        await self._write(operation)
         return [x.to_dict() for x in data]
 
+    @staticmethod
+    def _bulk_records(data: pd.DataFrame | Dict[str, Sequence] | List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # DataFrame / словарь колонок -> список строк с python-значениями (NaN -> None)
+        if isinstance(data, pd.DataFrame):
+            frame = data.astype(object)
+            return frame.where(frame.notna(), None).to_dict("records")
+        if isinstance(data, Mapping):
+            columnNames = list(data.keys())
+            return [dict(zip(columnNames, values)) for values in zip(*data.values())]
+        return list(data)
+
+    async def insert_bulk_data(self, table, data: pd.DataFrame | Dict[str, Sequence] | List[Dict[str, Any]], conflictColumns: Sequence[str] = ()) -> List[int]:
+        return await self.insert_bulk_batches(table, [data], conflictColumns)
+
+    async def insert_bulk_batches(self, table, batches: Iterable[pd.DataFrame | Dict[str, Sequence] | List[Dict[str, Any]]],
+                                  conflictColumns: Sequence[str] = ()) -> List[int]:
+        # Один Core INSERT executemany без ORM-объекта на строку: sqlalchemy пачкует его в multi-VALUES ... RETURNING.
+        # sort_by_parameter_order на sqlite откатывает пачки к вставке по одной строке, поэтому id просто сортируем:
+        # rowid внутри одной записи выдаются по возрастанию в порядке строк.
+        # conflictColumns - уникальный индекс для ON CONFLICT DO NOTHING: такие строки пропускаются и id не получают.
+        # batches - куски одной записи (например, выписка, разобранная потоково): все идут одной операцией писателя,
+        # т.е. в одной транзакции, и читаются по одному - в памяти не больше двух кусков
+        table = getattr(table, "__table__", table)
+        stmt = sqlite_insert(table)
+        if conflictColumns:
+            stmt = stmt.on_conflict_do_nothing(index_elements=list(conflictColumns))
+        stmt = stmt.returning(table.c.id)
+
+        batchIterator = iter(batches)
+
+        def next_records() -> List[Dict[str, Any]] | None:
+            # Чтение куска (FrameSpool распаковывает его из временного файла) и перевод в строки - в потоке,
+            # а не в event loop и не в операции писателя
+            batch = next(batchIterator, None)
+            return None if batch is None else self._bulk_records(batch)
+
+        firstRecords = await asyncio.to_thread(next_records)
+
+        async def operation(sess: AsyncSession):
+            insertedIDs, records = [], firstRecords
+            while records is not None:
+                # Следующий кусок готовится, пока вставляется текущий: писатель занят только INSERT
+                nextRecords = asyncio.ensure_future(asyncio.to_thread(next_records))
+                try:
+                    if records:
+                        result = await sess.execute(stmt, records)
+                        insertedIDs += result.scalars().all()
+                except BaseException:
+                    await asyncio.gather(nextRecords, return_exceptions=True)
+                    raise
+                records = await nextRecords
+            return sorted(insertedIDs)
+
+        return await self._write(operation)
+
+    async def update_data(self, table, values: Dict[str, Any], columnFilters: Sequence = ()) -> int:
+        stmt = sa_update(table).values(**values)
+        for f in columnFilters:
+            stmt = stmt.where(f)
+
+        async def operation(sess: AsyncSession):
+            result = await sess.execute(stmt)
+            return result.rowcount or 0
+
+        return await self._write(operation)
+
+    async def update_by_id(self, table, objectID: Any, values: Dict[str, Any]) -> Any:
+        # ORM-объект по первичному ключу: присвоить значения и вернуть обновленный объект (None - если строки нет)
+        async def operation(sess: AsyncSession):
+            obj = await sess.get(table, objectID)
+            if obj is None:
+                return None
+            for k, v in values.items():
+                setattr(obj, k, v)
+            await sess.flush()
+            await sess.refresh(obj)
+            return obj
+
+        return await self._write(operation)
+
     async def delete_data(self, table, columnFilters: Sequence = ()) -> int:
-        async with self.Session() as sess:
-            stmt = sa_delete(table)
-            for f in columnFilters:
-                stmt = stmt.where(f)
+        stmt = sa_delete(table)
+        for f in columnFilters:
+            stmt = stmt.where(f)
+
+        async def operation(sess: AsyncSession):
             result = await sess.execute(stmt)
-            await sess.commit()
-            return result.rowcount or 0
\ No newline at end of file
+            return result.rowcount or 0
+
+        return await self._write(operation)
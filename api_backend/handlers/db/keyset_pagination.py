@@ -0,0 +1,59 @@
+import json
+import base64
+import binascii
+from datetime import date
+from typing import Any, Dict, List, Sequence, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+
+
+class KeysetPaginator:
+    """Keyset-пагинация по убыванию ключа (например operationDate, id): страница - строки строго после курсора.
+
+    Курсор - base64 от JSON со значениями ключа последней строки страницы, для клиента непрозрачен.
+    """
+
+    def __init__(self, keyColumns: Sequence):
+        # Последняя колонка ключа должна делать его уникальным, иначе строки на стыке страниц теряются
+        self.keyColumns = list(keyColumns)
+        self.keyNames: List[str] = [column.name for column in self.keyColumns]
+
+    def order_by(self) -> Tuple:
+        return tuple(column.desc() for column in self.keyColumns)
+
+    def after_filter(self, cursor: str | None) -> Tuple:
+        # Первая страница - без фильтра; дальше (k1, k2, ...) < ключа курсора: SQLite сравнивает row values сам
+        if cursor is None:
+            return ()
+        cursorValues = self.decode_cursor(cursor)
+        return (tuple_(*self.keyColumns) < tuple_(*[cursorValues[name] for name in self.keyNames]),)
+
+    def encode_cursor(self, row: Dict[str, Any]) -> str:
+        keyValues = [row[name].isoformat() if isinstance(row[name], date) else row[name] for name in self.keyNames]
+        return base64.urlsafe_b64encode(json.dumps(keyValues, separators=(",", ":")).encode()).decode()
+
+    def decode_cursor(self, cursor: str) -> Dict[str, Any]:
+        try:
+            keyValues = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if not isinstance(keyValues, list) or len(keyValues) != len(self.keyColumns):
+                raise ValueError("Cursor does not match the sort key")
+            return {name: self._decode_value(column, value)
+                    for name, column, value in zip(self.keyNames, self.keyColumns, keyValues)}
+        except (ValueError, TypeError, binascii.Error):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+
+    @staticmethod
+    def _decode_value(column, value):
+        pythonType = column.type.python_type
+        if pythonType is date:
+            return date.fromisoformat(value)
+        if (pythonType is int and isinstance(value, bool)) or not isinstance(value, pythonType):
+            raise ValueError(f"Cursor value for {column.name} has wrong type")
+        return value
+
+    def page(self, rows: List[Dict[str, Any]], pageSize: int) -> Tuple[List[Dict[str, Any]], str | None]:
+        # rows выбраны с limit=pageSize + 1: лишняя строка только говорит, что следующая страница есть
+        if len(rows) <= pageSize:
+            return rows, None
+        rows = rows[:pageSize]
+        return rows, self.encode_cursor(rows[-1])
@@ -33,6 +33,8 @@ class AbstractBankTransactions(AbstractBaseModel):
     operationDate: Mapped[date] = mapped_column(Date, nullable=False)
     description: Mapped[str] = mapped_column(String, nullable=True)
     currencyAmount: Mapped[float] = mapped_column(Float, nullable=True)
+    resolvedCategoryID: Mapped[int] = mapped_column(Integer, ForeignKey("category.abstract_user_category_catalog.id"), nullable=True)
+    resolvedCategory: Mapped[str] = mapped_column(String, nullable=True)
 
 
 class AbstractAlfaFinancialTransactions(AbstractBankTransactions):
@@ -49,6 +51,7 @@ class AbstractAlfaFinancialTransactions(AbstractBankTransactions):
     # description: Mapped[str] = mapped_column(String, nullable=True)
     # currencyAmount: Mapped[float] = mapped_column(Float, nullable=False)
     status: Mapped[str] = mapped_column(String, nullable=True)
+    rowFingerprint: Mapped[str] = mapped_column(String, nullable=True)
     
 class AbstractTinkoffFinancialTransactions(AbstractBankTransactions):
     __abstract__ = True
@@ -63,12 +66,43 @@ class AbstractTinkoffFinancialTransactions(AbstractBankTransactions):
     description2: Mapped[str] = mapped_column(String, nullable=True)
     # currencyAmount: Mapped[float] = mapped_column(Float, nullable=True)
     amount: Mapped[float] = mapped_column(Float, nullable=True)
+    rowFingerprint: Mapped[str] = mapped_column(String, nullable=True)
 
 class AbstractCashFinancialTransactions(AbstractBankTransactions):
     __abstract__ = True
     __tablename__ = "bank.abstract_cash_financial_transactions"
     
 
+class AbstractUploadedFilesCatalog(AbstractBaseModel):
+    __abstract__ = True
+    __tablename__ = "bank.abstract_uploaded_files_catalog"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, nullable=False)
+    userID: Mapped[int] = mapped_column(Integer,ForeignKey(f"{AbstractUsers.__tablename__}.id"), nullable=False)
+    slug: Mapped[str] = mapped_column(String, nullable=False)
+    fileHash: Mapped[str] = mapped_column(String, nullable=False)
+    fileName: Mapped[str] = mapped_column(String, nullable=True)
+    loadedRows: Mapped[int] = mapped_column(Integer, nullable=False)
+
+class AbstractUploadJobsCatalog(AbstractBaseModel):
+    __abstract__ = True
+    __tablename__ = "bank.abstract_upload_jobs_catalog"
+
+    id: Mapped[str] = mapped_column(String, primary_key=True, nullable=False)
+    userID: Mapped[int] = mapped_column(Integer,ForeignKey(f"{AbstractUsers.__tablename__}.id"), nullable=False)
+    slug: Mapped[str] = mapped_column(String, nullable=False)
+    fileName: Mapped[str] = mapped_column(String, nullable=True)
+    filePath: Mapped[str] = mapped_column(String, nullable=False)
+    fileHash: Mapped[str] = mapped_column(String, nullable=False)
+    status: Mapped[str] = mapped_column(String, nullable=False)
+    rowsParsed: Mapped[int] = mapped_column(Integer, nullable=True)
+    rowsInserted: Mapped[int] = mapped_column(Integer, nullable=True)
+    duplicatesSkipped: Mapped[int] = mapped_column(Integer, nullable=True)
+    alreadyLoaded: Mapped[bool] = mapped_column(Boolean, nullable=True)
+    error: Mapped[str] = mapped_column(String, nullable=True)
+    createdAt: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    updatedAt: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
 class AbstractGoalsCatalog(AbstractBaseModel):
     __abstract__ = True
     __tablename__ = "goal.abstract_goals_catalog"
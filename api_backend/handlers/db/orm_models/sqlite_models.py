@@ -8,7 +8,8 @@ from sqlalchemy import (
     Date, Float, Column, Integer, Enum, 
     BigInteger, String, Boolean, DateTime, 
     Text, ForeignKey, UniqueConstraint, 
-    PrimaryKeyConstraint, Index, UUID
+    PrimaryKeyConstraint, Index, UUID,
+    inspect, text
 )
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import Mapped, mapped_column, relationship
@@ -19,6 +20,9 @@ from .abstract_models import *
 class Users(AbstractUsers):
     __abstract__ = False
     __tablename__ = "user.users_catalog"
+    __table_args__ = (
+        Index("ix_users_catalog_userName", "userName"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, nullable=False)
     userName: Mapped[int] = mapped_column(String, nullable=False)
@@ -27,6 +31,10 @@ class Users(AbstractUsers):
 class AlfaFinancialTransactions(AbstractAlfaFinancialTransactions):
     __abstract__ = False
     __tablename__ = "bank.alfa_financial_transactions"
+    __table_args__ = (
+        Index("ix_alfa_financial_transactions_userID_operationDate", "userID", "operationDate"),
+        Index("ux_alfa_financial_transactions_rowFingerprint", "rowFingerprint", unique=True),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, nullable=False)
     userID: Mapped[int] = mapped_column(Integer,ForeignKey(f"{Users.__tablename__}.id"), nullable=False) 
@@ -38,10 +46,17 @@ class AlfaFinancialTransactions(AbstractAlfaFinancialTransactions):
     description: Mapped[str] = mapped_column(String, nullable=True)
     currencyAmount: Mapped[float] = mapped_column(Float, nullable=False)
     status: Mapped[str] = mapped_column(String, nullable=True)
+    resolvedCategoryID: Mapped[int] = mapped_column(Integer, ForeignKey("category.user_category_catalog.id"), nullable=True)
+    resolvedCategory: Mapped[str] = mapped_column(String, nullable=True)
+    rowFingerprint: Mapped[str] = mapped_column(String, nullable=True)
     
 class TinkoffFinancialTransactions(AbstractTinkoffFinancialTransactions):
     __abstract__ = False
     __tablename__ = "bank.tinkoff_financial_transactions"
+    __table_args__ = (
+        Index("ix_tinkoff_financial_transactions_userID_operationDate", "userID", "operationDate"),
+        Index("ux_tinkoff_financial_transactions_rowFingerprint", "rowFingerprint", unique=True),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, nullable=False)
     userID : Mapped[int] = mapped_column(Integer,ForeignKey(f"{Users.__tablename__}.id"), nullable=False) 
@@ -52,10 +67,16 @@ class TinkoffFinancialTransactions(AbstractTinkoffFinancialTransactions):
     description2: Mapped[str] = mapped_column(String, nullable=True)
     currencyAmount: Mapped[float] = mapped_column(Float, nullable=True)
     amount: Mapped[float] = mapped_column(Float, nullable=True)
+    resolvedCategoryID: Mapped[int] = mapped_column(Integer, ForeignKey("category.user_category_catalog.id"), nullable=True)
+    resolvedCategory: Mapped[str] = mapped_column(String, nullable=True)
+    rowFingerprint: Mapped[str] = mapped_column(String, nullable=True)
 
 class CashFinancialTransactions(AbstractCashFinancialTransactions):
     __abstract__ = False
     __tablename__ = "bank.cash_financial_transactions"
+    __table_args__ = (
+        Index("ix_cash_financial_transactions_userID_operationDate", "userID", "operationDate"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, nullable=False)
     userID: Mapped[int] = mapped_column(Integer,ForeignKey(f"{Users.__tablename__}.id"), nullable=False) 
@@ -65,7 +86,46 @@ class CashFinancialTransactions(AbstractCashFinancialTransactions):
     currencyAmount: Mapped[float] = mapped_column(Float, nullable=False)
     status: Mapped[str] = mapped_column(String, nullable=True)
     fileName: Mapped[str] = mapped_column(String, nullable=True)
+    resolvedCategoryID: Mapped[int] = mapped_column(Integer, ForeignKey("category.user_category_catalog.id"), nullable=True)
+    resolvedCategory: Mapped[str] = mapped_column(String, nullable=True)
    
+class UploadedFilesCatalog(AbstractUploadedFilesCatalog):
+    __abstract__ = False
+    __tablename__ = "bank.uploaded_files_catalog"
+    __table_args__ = (
+        Index("ux_uploaded_files_catalog_userID_slug_fileHash", "userID", "slug", "fileHash", unique=True),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, nullable=False)
+    userID: Mapped[int] = mapped_column(Integer, ForeignKey(f"{Users.__tablename__}.id"), nullable=False)
+    slug: Mapped[str] = mapped_column(String, nullable=False)
+    fileHash: Mapped[str] = mapped_column(String, nullable=False)
+    fileName: Mapped[str] = mapped_column(String, nullable=True)
+    loadedRows: Mapped[int] = mapped_column(Integer, nullable=False)
+
+class UploadJobsCatalog(AbstractUploadJobsCatalog):
+    __abstract__ = False
+    __tablename__ = "bank.upload_jobs_catalog"
+    __table_args__ = (
+        Index("ix_upload_jobs_catalog_userID_createdAt", "userID", "createdAt"),
+        Index("ix_upload_jobs_catalog_status", "status"),
+    )
+
+    id: Mapped[str] = mapped_column(String, primary_key=True, nullable=False)
+    userID: Mapped[int] = mapped_column(Integer, ForeignKey(f"{Users.__tablename__}.id"), nullable=False)
+    slug: Mapped[str] = mapped_column(String, nullable=False)
+    fileName: Mapped[str] = mapped_column(String, nullable=True)
+    filePath: Mapped[str] = mapped_column(String, nullable=False)
+    fileHash: Mapped[str] = mapped_column(String, nullable=False)
+    status: Mapped[str] = mapped_column(String, nullable=False)
+    rowsParsed: Mapped[int] = mapped_column(Integer, nullable=True)
+    rowsInserted: Mapped[int] = mapped_column(Integer, nullable=True)
+    duplicatesSkipped: Mapped[int] = mapped_column(Integer, nullable=True)
+    alreadyLoaded: Mapped[bool] = mapped_column(Boolean, nullable=True)
+    error: Mapped[str] = mapped_column(String, nullable=True)
+    createdAt: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    updatedAt: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
 class GoalsCatalog(AbstractGoalsCatalog):
     __abstract__ = False
     __tablename__ = "goal.goals_catalog"
@@ -76,6 +136,10 @@ class GoalsCatalog(AbstractGoalsCatalog):
 class GoalsOwnersCatalog(AbstractGoalsOwnersCatalog):
     __abstract__ = False
     __tablename__ = "goal.goals_owners_catalog"
+    __table_args__ = (
+        Index("ix_goals_owners_catalog_userID_goalID", "userID", "goalID"),
+        Index("ix_goals_owners_catalog_goalID", "goalID"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, nullable=False)
     userID : Mapped[int] = mapped_column(Integer,ForeignKey(f"{Users.__tablename__}.id"), nullable=False) 
@@ -84,6 +148,9 @@ class GoalsOwnersCatalog(AbstractGoalsOwnersCatalog):
 class GoalsRule(AbstractGoalsRule):
     __abstract__ = False
     __tablename__ = "goal.goals_rule"
+    __table_args__ = (
+        Index("ix_goals_rule_goalID", "goalID"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, nullable=False)
     goalID: Mapped[int] = mapped_column(Integer,ForeignKey(f"{GoalsCatalog.__tablename__}.id"), nullable=False)
@@ -93,6 +160,10 @@ class GoalsRule(AbstractGoalsRule):
 class GoalTransactionLink(AbstractGoalTransactionLink):
     __abstract__ = False
     __tablename__ = "goal.goal_transaction_links"
+    __table_args__ = (
+        Index("ix_goal_transaction_links_transactionID_transactionSource", "transactionID", "transactionSource"),
+        Index("ix_goal_transaction_links_goalID_contributorUserID", "goalID", "contributorUserID"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, nullable=False)
     goalID: Mapped[int] = mapped_column(Integer,ForeignKey(f"{GoalsCatalog.__tablename__}.id"), nullable=False)
@@ -107,6 +178,9 @@ class GoalTransactionLink(AbstractGoalTransactionLink):
 class FriendsCatalog(AbstractFriendsCatalog):
     __abstract__ = False
     __tablename__ = "user.friends_catalog"
+    __table_args__ = (
+        Index("ix_friends_catalog_userID_friendID", "userID", "friendID"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, nullable=False)
     userID : Mapped[int] = mapped_column(Integer,ForeignKey(f"{Users.__tablename__}.id"), nullable=False)
@@ -115,6 +189,9 @@ class FriendsCatalog(AbstractFriendsCatalog):
 class CastomCategorysCatalog(AbstractCastomCategorysCatalog):
     __abstract__ = False
     __tablename__ = "category.user_category_catalog"
+    __table_args__ = (
+        Index("ix_user_category_catalog_userID", "userID"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, nullable=False)
     userID: Mapped[int] = mapped_column(Integer, ForeignKey(f"{Users.__tablename__}.id"), nullable=False)
@@ -123,15 +200,39 @@ class CastomCategorysCatalog(AbstractCastomCategorysCatalog):
 class CastomCategorysConditions(AbstractCastomCategorysConditions):
     __abstract__ = False
     __tablename__ = "category.user_category_conditions"
+    __table_args__ = (
+        Index("ix_user_category_conditions_categoryID", "categoryID"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, nullable=False)
     categoryID: Mapped[int] = mapped_column(Integer, ForeignKey(f"{CastomCategorysCatalog.__tablename__}.id"), nullable=False)
     conditionValue: Mapped[str] = mapped_column(String, nullable=False)
     isExact: Mapped[str] = mapped_column(Boolean, nullable=False)
 
+def create_indexes(conn):
+    # create_all не добавляет индексы в уже существующие таблицы, поэтому докатываем их отдельно
+    for table in AbstractBaseModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+def add_missing_columns(conn):
+    # create_all не меняет существующие таблицы: новые nullable колонки добавляем через ALTER TABLE
+    inspector = inspect(conn)
+    for table in AbstractBaseModel.metadata.sorted_tables:
+        existingColumns = {x["name"] for x in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existingColumns or not column.nullable:
+                continue
+            columnType = column.type.compile(dialect=conn.dialect)
+            conn.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {columnType}'))
+
 async def init_models():
     async with engine.begin() as conn:
         await conn.run_sync(AbstractBaseModel.metadata.create_all)
+        await conn.run_sync(add_missing_columns)
+        await conn.run_sync(create_indexes)
+    # Иначе поток соединения aiosqlite не дает скрипту миграции завершиться
+    await engine.dispose()
 
 
 if __name__ == "__main__":
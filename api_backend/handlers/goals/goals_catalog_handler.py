@@ -154,17 +154,5 @@ class GoalsCatalogHandler(AbstractGoalsCatalogHandler):
         return valid, skipped
 
     async def update_data(self, goalID:int, updatesData: UpdateGoalCatalog):
-        async with self.dbHandler.create_session()() as sess:
-            try:
-                obj = await sess.get(self.dbt, goalID)  # AsyncSession.get
-                if obj is None:
-                    return None
-                valid, _ = self.__normalize_updates_for_model(updatesData.to_dict())
-                for k, v in valid.items():
-                    setattr(obj, k, v)
-                await sess.commit()
-                await sess.refresh(obj)
-                return obj
-            except (IntegrityError, SQLAlchemyError):
-                await sess.rollback()
-                raise
+        valid, _ = self.__normalize_updates_for_model(updatesData.to_dict())
+        return await self.dbHandler.update_by_id(self.dbt, goalID, valid)
@@ -3,7 +3,7 @@ from decimal import Decimal
 from pydantic import BaseModel
 from datetime import datetime, date
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Mapping, Tuple, List
+from typing import Any, Dict, Mapping, Sequence, Tuple, List
 from sqlalchemy import types as satypes
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
@@ -40,8 +40,11 @@ class UserHandler(AbstractUserHandler):
     def __init__(self, logerHandler, dbHandler, dbt):
         super().__init__(logerHandler, dbHandler, dbt)
 
-    async def get_data(self, columnFilters:List):
-        return await self.dbHandler.get_table_data([self.dbt], columnFilters)
+    async def get_data(self, columnFilters:List, columns:Sequence[str] | None = None):
+        # columns - только нужные колонки словарями, без ORM-объектов
+        if columns is None:
+            return await self.dbHandler.get_table_data([self.dbt], columnFilters)
+        return await self.dbHandler.get_table_data(self.dbHandler.table_columns(self.dbt, columns), columnFilters, asDicts=True)
 
     async def insert_data(self, userName:str, password:str):
         createUserResponse = await self.dbHandler.insert_data(
@@ -161,23 +164,7 @@ class UserHandler(AbstractUserHandler):
         return valid, skipped
 
     async def update_data(self, userID:int, updatesData: UpdateUser):
-        async with self.dbHandler.create_session()() as sess:
-            try:
-                obj = await sess.get(self.dbt, userID)  # AsyncSession.get
-                if obj is None:
-                    return None
-                # print(">>>>>>>>>>>>>>>>>>---------------------------------------")
-                # print(updatesData.to_dict())
-                # print(">>>>>>>>>>>>>>>>>>---------------------------------------")
-
-                valid, _ = self.__normalize_updates_for_model(updatesData.to_dict())
-                for k, v in valid.items():
-                    setattr(obj, k, v)
-                await sess.commit()
-                await sess.refresh(obj)
-                return obj
-            except (IntegrityError, SQLAlchemyError):
-                await sess.rollback()
-                raise
+        valid, _ = self.__normalize_updates_for_model(updatesData.to_dict())
+        return await self.dbHandler.update_by_id(self.dbt, userID, valid)
 
 
@@ -13,15 +13,22 @@ from .handlers.db.orm_models.sqlite_models import (Users,
                                                    GoalTransactionLink,
                                                    CastomCategorysCatalog,
                                                    CastomCategorysConditions,
-                                                   CashFinancialTransactions)
+                                                   CashFinancialTransactions,
+                                                   UploadedFilesCatalog,
+                                                   UploadJobsCatalog)
 
 from .handlers.users.user import UserHandler
 from .services.users.users import UserService
 
 from .handlers.bank_files.bank_slugs import BankSlugs
 from .handlers.bank_files.bank_file_preprocessing import (AlfaPreprocessingDataFileHandler,TinkoffPreprocessingDataFileHandler)
+from .handlers.bank_files.parsing_pool import ProcessParsingPoolHandler
+from .handlers.bank_files.parse_cache import NpzParseCacheHandler
 from .handlers.bank_files.bank_load_handlers import (AlfaBankHandler, TinkoffBankHandler, CashBankHandler)
 from .handlers.bank_files.bank_registry import BankHandlerRegistry
+from .handlers.bank_files.uploaded_files_handler import UploadedFilesHandler
+from .handlers.bank_files.upload_jobs_handler import UploadJobsHandler
+from .handlers.bank_files.bank_transactions_view import BankTransactionsViewHandler
 from .handlers.bank_files.schema import RegistryConstSchema
 
 from .handlers.friends.friends_handler import FriendsCatalogHandler
@@ -45,29 +52,48 @@ from .services.analytics.analytics import AnalyticsService
 
 logerHandler = None
 
-dbHandler = SqliteHandlerAsync(url="sqlite+aiosqlite:///api_backend/database/database_draft.db")
+# pragmas по умолчанию - SqliteHandlerAsync.defaultPragmas (WAL, synchronous=NORMAL, кэш, mmap, busy_timeout)
+dbHandler = SqliteHandlerAsync(url="sqlite+aiosqlite:///api_backend/database/database_draft.db",
+                               pragmas=SqliteHandlerAsync.defaultPragmas)
 
 userHandler = UserHandler(dbHandler=dbHandler, dbt=Users, logerHandler=logerHandler)
 
-alfaPreprocessingDataFileHandler = AlfaPreprocessingDataFileHandler(logerHandler=logerHandler,)
+# Результаты разбора выписок по SHA-256 файла, не больше maxSize байт на диске
+parseCacheHandler = NpzParseCacheHandler(logerHandler=logerHandler,
+                                         cacheDir=os.sep.join(["handlers","bank_files","report_file_catalog","parse_cache"]),
+                                         maxSize=256 * 1024 * 1024)
 
-tinkoffPreprocessingDataFileHandler = TinkoffPreprocessingDataFileHandler(logerHandler=logerHandler,)
+# Выписки Альфы от 10 MiB (streamingMinSize у AlfaBankHandler) читаются потоково кусками по chunkSize строк
+alfaPreprocessingDataFileHandler = AlfaPreprocessingDataFileHandler(logerHandler=logerHandler, parseCacheHandler=parseCacheHandler, chunkSize=5000)
+
+# pageWorkers > 1 делит страницы PDF между процессами; окупается на многоядерной машине и выписках в сотни страниц
+tinkoffPreprocessingDataFileHandler = TinkoffPreprocessingDataFileHandler(logerHandler=logerHandler, pageWorkers=1, pagesPerWorker=200,
+                                                                          parseCacheHandler=parseCacheHandler)
+
+# Разбор выписок вынесен из event loop: не больше maxWorkers процессов, parseTimeout секунд на файл
+parsingPoolHandler = ProcessParsingPoolHandler(logerHandler=logerHandler, maxWorkers=2, parseTimeout=120)
 
 alfaBankHandler = AlfaBankHandler(dbHandler=dbHandler,
                                   dbt=AlfaFinancialTransactions,
                                   logerHandler=logerHandler,
-                                  preprocessingHandler=alfaPreprocessingDataFileHandler)
+                                  preprocessingHandler=alfaPreprocessingDataFileHandler,
+                                  parsingPoolHandler=parsingPoolHandler,
+                                  streamingMinSize=10 * 1024 * 1024)
 
 tinkoffBankHandler = TinkoffBankHandler(dbHandler=dbHandler,
                                         dbt=TinkoffFinancialTransactions,
                                         logerHandler=logerHandler,
-                                        preprocessingHandler=tinkoffPreprocessingDataFileHandler)
+                                        preprocessingHandler=tinkoffPreprocessingDataFileHandler,
+                                        parsingPoolHandler=parsingPoolHandler)
 
 
 cashBankHandler = CashBankHandler(dbHandler=dbHandler,
                                   dbt=CashFinancialTransactions,
                                   logerHandler=logerHandler)
 
+uploadedFilesHandler = UploadedFilesHandler(dbHandler=dbHandler, dbt=UploadedFilesCatalog, logerHandler=logerHandler)
+uploadJobsHandler = UploadJobsHandler(dbHandler=dbHandler, dbt=UploadJobsCatalog, logerHandler=logerHandler)
+
 goalsCatalogHandler = GoalsCatalogHandler(dbHandler=dbHandler, dbt=GoalsCatalog, logerHandler=logerHandler)
 goalOwnersCatalogHandler = GoalOwnersCatalogHandler(dbHandler=dbHandler, dbt=GoalsOwnersCatalog, logerHandler=logerHandler)
 goalsRuleHandler = GoalsRuleHandler(dbHandler=dbHandler, dbt=GoalsRule, logerHandler=logerHandler)
@@ -97,6 +123,11 @@ bankRegistry.register(BankSlugs.ALFA, alfaBankHandler, alfaHandlerConfig)
 tinkoffHandlerConfig = RegistryConstSchema(fileStorageDir=os.sep.join(["handlers","bank_files","report_file_catalog","tinkoff","pdf"]))
 bankRegistry.register(BankSlugs.TINKOFF, tinkoffBankHandler, tinkoffHandlerConfig)
 
+bankTransactionsViewHandler = BankTransactionsViewHandler(dbHandler=dbHandler,
+                                                          logerHandler=logerHandler,
+                                                          bankHandlers={slug: bankRegistry.get_handler(slug) for slug in BankSlugs.all()})
+bankRegistry.register_view(bankTransactionsViewHandler)
+
 # Services
 
 goalsService = GoalsService(logerHandler=logerHandler,
@@ -110,8 +141,6 @@ goalsService = GoalsService(logerHandler=logerHandler,
 
 userService = UserService(userHandler=userHandler, logerHandler=logerHandler)
 
-bankService = BankService(logerHandler=logerHandler,bankHandlerRegisry=bankRegistry)
-
 friendsService = FriendsService(logerHandler=logerHandler, friendsCatalogHandler=friendsCatalogHandler)
 
 categoryService = СategoryService(
@@ -121,6 +150,10 @@ categoryService = СategoryService(
         bankRgistry=bankRegistry,
         logerHandler=logerHandler)
 
+bankService = BankService(logerHandler=logerHandler,bankHandlerRegisry=bankRegistry,categoryService=categoryService,
+                          uploadedFilesHandler=uploadedFilesHandler, uploadJobsHandler=uploadJobsHandler,
+                          uploadMaxSize=50 * 1024 * 1024, uploadJobsConcurrency=2)
+
 analyticsService = AnalyticsService(bankFactory=bankRegistry,
                                     bankSlugsCatalog=BankSlugs,
                                     categoryService=categoryService,
@@ -1,8 +1,9 @@
 from typing import Optional, List, Literal
-from fastapi import FastAPI, Depends, UploadFile, File, Query
+from fastapi import FastAPI, Depends, UploadFile, File, Query, BackgroundTasks
+from fastapi.responses import StreamingResponse
 
 from .services.users.schama import CreateUser
-from .services.load_bank_file_service.schema import CreateServiceBankTransactions,SearchParametrs
+from .services.load_bank_file_service.schema import CreateServiceBankTransactions,SearchParametrs,PageParametrs
 
 
 from .handlers.users.schema import UpdateUser
@@ -11,13 +12,16 @@ from .handlers.castom_category.schema import DeleteCategoryConditionsSchema,AddC
 from .services.friends.schema import AddFriend, DeleteFriend
 from .services.goals.schema import CreatGoal, CreatColabGoal, AddGoalOwner, CreatGoalOperators, GaolParticipant, AddGoalTransactionLink, DeleteGoalTransactionLink
 from .services.category.schema import AddCategoryServiceSchema, UpdateDataServiceSchema
+from .services.ndjson_stream import iter_ndjson, ndjsonMediaType
 
 from .initialization import (userService, 
                              bankService, 
                              friendsService, 
                              goalsService,
                              categoryService,
-                             analyticsService)
+                             analyticsService,
+                             parsingPoolHandler,
+                             dbHandler)
 
 cashFlowPeriod = Literal["day", "month", "year"]
 
@@ -30,6 +34,28 @@ app = FastAPI(
     ]
 )
 
+@app.on_event("startup")
+async def requeue_upload_jobs():
+    await bankService.requeue_upload_jobs()
+
+@app.on_event("startup")
+async def backfill_resolved_categories():
+    # Строки без сохраненной кастомной категории (старые или недосчитанные) досчитываются в фоне
+    categoryService.schedule_resolved_categories_backfill()
+
+@app.on_event("shutdown")
+async def shutdown_parsing_pool():
+    parsingPoolHandler.shutdown()
+
+@app.on_event("shutdown")
+async def stop_resolved_categories_backfill():
+    await categoryService.stop_resolved_categories_backfill()
+
+@app.on_event("shutdown")
+async def shutdown_db_writer():
+    # Дописываем то, что уже стоит в очереди записи
+    await dbHandler.close()
+
 # Users
 
 @app.get('/login', tags=['User'])
@@ -61,8 +87,13 @@ async def delete_user(authUser = Depends(userService.auth_user)):
 # Bank transactions
 
 @app.get('/bank_transactions', tags=['Bank transactions'])
-async def get_bank_transactions(slug:str, getFiletr: SearchParametrs = Depends(), authUser = Depends(userService.auth_user)):
-    insertedData = await bankService.get_bank_transactions(authUser,slug,getFiletr)
+async def get_bank_transactions(slug:str, getFiletr: SearchParametrs = Depends(), pageParametrs: PageParametrs = Depends(),
+                                stream: bool = Query(default=False, description='Вся выборка построчно в NDJSON, pageSize и cursor не учитываются'),
+                                authUser = Depends(userService.auth_user)):
+    if stream:
+        rows = await bankService.stream_bank_transactions(authUser, slug, getFiletr)
+        return StreamingResponse(iter_ndjson(rows), media_type=ndjsonMediaType)
+    insertedData = await bankService.get_bank_transactions(authUser,slug,getFiletr,pageParametrs)
     return insertedData
 
 @app.get('/bank_transactions/user_files_catalog', tags=['Bank transactions'])
@@ -77,10 +108,22 @@ async def create_bank_transactions(addTransactionData: CreateServiceBankTransact
     return insertedData
 
 @app.post('/bank_transactions/file', tags=['Bank transactions'])
-async def create_bank_transactions_by_load_file(slug:str, file: UploadFile = File(...), authUser = Depends(userService.auth_user)):
-    insertFileResponse = await bankService.create_bank_transactions_by_load_file(authUser, slug, file)
+async def create_bank_transactions_by_load_file(slug:str, backgroundTasks: BackgroundTasks, file: UploadFile = File(...), authUser = Depends(userService.auth_user)):
+    insertFileResponse = await bankService.create_bank_transactions_by_load_file(authUser, slug, file, backgroundTasks=backgroundTasks)
     return insertFileResponse
 
+@app.post('/bank_transactions/files', tags=['Bank transactions'])
+async def create_bank_transactions_by_load_files(files: List[UploadFile] = File(...), authUser = Depends(userService.auth_user)):
+    return await bankService.create_bank_transactions_by_load_files(authUser, files)
+
+@app.get('/bank_transactions/jobs', tags=['Bank transactions'])
+async def get_upload_jobs(authUser = Depends(userService.auth_user)):
+    return await bankService.get_upload_jobs(authUser)
+
+@app.get('/bank_transactions/jobs/{jobID}', tags=['Bank transactions'])
+async def get_upload_job(jobID: str, authUser = Depends(userService.auth_user)):
+    return await bankService.get_upload_jobs(authUser, jobID=jobID)
+
 @app.patch('/bank_transactions', tags=['Bank transactions'])
 async def update_bank_transactions(transactionID: int, slug:str, updateData: TinkoffHandlerUpdateData | AlfaHandlerUpdateData, authUser = Depends(userService.auth_user)):
     updatedResponse = await bankService.update_bank_transactions(authUser, transactionID, slug, updateData)
@@ -172,32 +215,49 @@ async def delete_goal_transaction_link(deleteData:DeleteGoalTransactionLink, aut
 
 # Category
 @app.get('/category', tags=['Category'])
-async def get_categorys(authUser = Depends(userService.auth_user)):
-    return await categoryService.get_categorys(userID=authUser.get('id'))
+async def get_categorys(withStats: bool = True, authUser = Depends(userService.auth_user)):
+    return await categoryService.get_categorys(userID=authUser.get('id'), withStats=withStats)
 
 @app.post('/category', tags=['Category'])
-async def add_category(addData: AddCategoryServiceSchema, authUser = Depends(userService.auth_user)):
-    return await categoryService.add_category(userID=authUser.get('id'), addData=addData)
+async def add_category(addData: AddCategoryServiceSchema, backgroundTasks: BackgroundTasks, authUser = Depends(userService.auth_user)):
+    return await categoryService.add_category(userID=authUser.get('id'), addData=addData, backgroundTasks=backgroundTasks)
 
 @app.delete('/category', tags=['Category'])
-async def delete_category(categoryID: int, authUser = Depends(userService.auth_user)):
-    return await categoryService.delete_category(userID=authUser.get('id'), categoryID=categoryID)
+async def delete_category(categoryID: int, backgroundTasks: BackgroundTasks, authUser = Depends(userService.auth_user)):
+    return await categoryService.delete_category(userID=authUser.get('id'), categoryID=categoryID, backgroundTasks=backgroundTasks)
 
 @app.patch('/category', tags=['Category'])
-async def update_category(categoryID: int, updateData: UpdateDataServiceSchema, authUser = Depends(userService.auth_user)):
-    return await categoryService.update_category(userID=authUser.get('id'), categoryID=categoryID, updateData=updateData)
+async def update_category(categoryID: int, updateData: UpdateDataServiceSchema, backgroundTasks: BackgroundTasks, authUser = Depends(userService.auth_user)):
+    return await categoryService.update_category(userID=authUser.get('id'), categoryID=categoryID, updateData=updateData, backgroundTasks=backgroundTasks)
+
+@app.post('/category/recategorize', tags=['Category'])
+async def recategorize_transactions(backgroundTasks: BackgroundTasks, authUser = Depends(userService.auth_user)):
+    return await categoryService.start_recategorization(userID=authUser.get('id'), backgroundTasks=backgroundTasks)
+
+@app.get('/category/recategorize', tags=['Category'])
+async def get_recategorization_jobs(authUser = Depends(userService.auth_user)):
+    return await categoryService.get_recategorization_jobs(userID=authUser.get('id'))
+
+@app.get('/category/recategorize/{jobID}', tags=['Category'])
+async def get_recategorization_job(jobID: str, authUser = Depends(userService.auth_user)):
+    return await categoryService.get_recategorization_jobs(userID=authUser.get('id'), jobID=jobID)
 
 @app.get('/category/transactions', tags=['Category'])
-async def get_category_transactions(slugs:str, authUser = Depends(userService.auth_user)):
-    return await categoryService.get_transactions(slugs, userID=authUser.get('id'))
+async def get_category_transactions(slugs:str, pageParametrs: PageParametrs = Depends(),
+                                    stream: bool = Query(default=False, description='Транзакции построчно в NDJSON (как data[]), pageSize и cursor не учитываются'),
+                                    authUser = Depends(userService.auth_user)):
+    if stream:
+        rows = await categoryService.stream_transactions(slugs, userID=authUser.get('id'))
+        return StreamingResponse(iter_ndjson(rows), media_type=ndjsonMediaType)
+    return await categoryService.get_transactions(slugs, userID=authUser.get('id'), pageSize=pageParametrs.pageSize, cursor=pageParametrs.cursor)
 
 @app.post('/category/conditions', tags=['Category'])
-async def add_category_condition(addContitionData: AddCategoryConditionsSchema, authUser = Depends(userService.auth_user)):
-    return await categoryService.add_category_condition(userID=authUser.get('id'), addContitionData=addContitionData)
+async def add_category_condition(addContitionData: AddCategoryConditionsSchema, backgroundTasks: BackgroundTasks, authUser = Depends(userService.auth_user)):
+    return await categoryService.add_category_condition(userID=authUser.get('id'), addContitionData=addContitionData, backgroundTasks=backgroundTasks)
 
 @app.delete('/category/conditions', tags=['Category'])
-async def delete_category_condition(categoryID:int, deleteContitionData: DeleteCategoryConditionsSchema, authUser = Depends(userService.auth_user)):
-    return await categoryService.delete_category_condition(userID=authUser.get('id'), categoryID=categoryID, deleteContitionData=deleteContitionData)
+async def delete_category_condition(categoryID:int, deleteContitionData: DeleteCategoryConditionsSchema, backgroundTasks: BackgroundTasks, authUser = Depends(userService.auth_user)):
+    return await categoryService.delete_category_condition(userID=authUser.get('id'), categoryID=categoryID, deleteContitionData=deleteContitionData, backgroundTasks=backgroundTasks)
 
 
 
@@ -248,3 +308,11 @@ async def predict_next_month_expenses(authUser = Depends(userService.auth_user))
 @app.get("/ananlytics/predict_category_expenses",tags=['Analytics'])
 async def predict_category_expenses(authUser = Depends(userService.auth_user)):
     return await analyticsService.predict_category_expenses(userID=authUser.get('id'))
+
+@app.get("/analytics/bundle",tags=['Analytics'])
+async def get_analytics_bundle(authUser = Depends(userService.auth_user),
+                               sections: Optional[str] = Query(default=None, description="Comma separated sections, all by default"),
+                               period: cashFlowPeriod = Query(default="month", description="Aggregation period for cash_flow: day | month | year"),
+                               limit: int = Query(default=10, description="Rows per bank for last_transactions")):
+    sectionList = [x.strip() for x in sections.split(",") if x.strip()] if sections else None
+    return await analyticsService.get_analytics_bundle(userID=authUser.get('id'), sections=sectionList, period=period, limit=limit)
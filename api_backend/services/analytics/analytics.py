@@ -2,7 +2,11 @@ from abc import ABC, abstractmethod
 from collections import Counter,defaultdict
 from typing import Any, Dict, List, Optional
 from datetime import date, datetime, timedelta
+import numpy as np
 from fastapi import HTTPException, status
+from sqlalchemy import func, case
+
+from .transaction_frame import TransactionFrame
 
 
 from ..category.category import AbstractСategoryService
@@ -74,73 +78,75 @@ class AbstractAnalyticsService(ABC):
     def predict_category_expenses(self, userID: int) -> List[Dict[str, Any]]:
         pass
 
+    @abstractmethod
+    def get_analytics_bundle(self, userID: int, sections: List[str] | None = None, period: str = "month", limit: int = 10) -> Dict[str, Any]:
+        pass
+
 class AnalyticsService(AbstractAnalyticsService):
+    # Секции /analytics/bundle; balance, cash_flow и last_transactions считаются SQL-агрегатами,
+    # остальные - из одной выборки размеченных транзакций
+    bundleSections: List[str] = [
+        "balance",
+        "cash_flow",
+        "expense_category_distribution",
+        "income_category_distribution",
+        "last_transactions",
+        "anomaly_transactions",
+        "habits_cost",
+        "user_financial_profile",
+        "financial_health_score",
+        "predict_next_month_expenses",
+        "predict_category_expenses",
+    ]
+
     def __init__(self, logerHandler, bankSlugsCatalog, bankFactory, goalCatalogHandler, goalOwnersHandler, goalRuleHandler, friendsHandler, categoryService):
         super().__init__(logerHandler, bankSlugsCatalog, bankFactory, goalCatalogHandler, goalOwnersHandler, goalRuleHandler, friendsHandler, categoryService)
 
+    async def _get_categorized_transactions(self, userID: int) -> Dict[str, Any]:
+        return await self.categoryService.get_transactions(slugs=",".join(self.bankSlugsCatalog.all()), userID=userID)
+
     async def get_balance(self, userID: int) -> Dict[str, float]:
-        balance = 0
-        counterOperations = 0
-        for slug in self.bankSlugsCatalog.all():
-            bankHandler = self.bankFactory.get_handler(slug)
-            slugTransactions = await bankHandler.get_data((bankHandler.dbt.userID == userID,))
-            balance += sum([x.currencyAmount for x in slugTransactions])
-            counterOperations += slugTransactions.__len__()
-        return {"data":balance, "counterOperations":counterOperations}
+        bankView = self.bankFactory.get_view_handler()
+        balanceAggregation = await bankView.get_aggregated_data(
+            aggregations={
+                "balance": func.coalesce(func.sum(bankView.dbt.c.currencyAmount), 0),
+                "counterOperations": func.count(bankView.dbt.c.id),
+            },
+            columnFilters=(bankView.dbt.c.userID == userID,),
+        )
+        return {"data":balanceAggregation[0]["balance"], "counterOperations":balanceAggregation[0]["counterOperations"]}
 
     async def get_cash_flow(self, userID: int, period: str) -> List[Dict[str, Any]]:
-        cashFlow: Dict[str, Dict[str, float]] = defaultdict(lambda: {"income": 0.0,"expense": 0.0,"net": 0.0,})
-
-        for slug in self.bankSlugsCatalog.all():
-            bankHandler = self.bankFactory.get_handler(slug)
-            slugTransactions = await bankHandler.get_data(
-                (bankHandler.dbt.userID == userID,)
-            )
-
-            for transaction in slugTransactions:
-                operationDate = transaction.operationDate
-
-                if isinstance(operationDate, datetime):
-                    operationDate = operationDate.date()
-
-                if not isinstance(operationDate, date):
-                    continue
-                
-                match period:
-                    case "day":
-                        periodKey = operationDate.isoformat()
-
-                    case "month":
-                        periodKey = operationDate.strftime("%Y-%m")
-    
-                    case "year":
-                        periodKey = operationDate.strftime("%Y")
-
-                    case _:
-                        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unsupported period: {period}")
-
-                amount = float(transaction.currencyAmount)
-
-                if amount >= 0:
-                    cashFlow[periodKey]["income"] += amount
-                else:
-                    cashFlow[periodKey]["expense"] += abs(amount)
-
-                cashFlow[periodKey]["net"] += amount
+        bankView = self.bankFactory.get_view_handler()
+        amount = bankView.dbt.c.currencyAmount
+
+        try:
+            periodKey = bankView.dbHandler.period_expression(bankView.dbt.c.operationDate, period)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unsupported period: {period}")
+
+        cashFlow = await bankView.get_aggregated_data(
+            aggregations={
+                "income": func.sum(case((amount >= 0, amount), else_=0)),
+                "expense": func.sum(case((amount < 0, -amount), else_=0)),
+                "net": func.sum(amount),
+            },
+            columnFilters=(bankView.dbt.c.userID == userID, periodKey.is_not(None)),
+            groupBy={"period": periodKey},
+        )
 
         result: List[Dict[str, Any]] = []
-        for periodKey in sorted(cashFlow.keys()):
-            item = cashFlow[periodKey]
-            result.append({"period": periodKey,"income": round(item["income"], 2),"expense": round(item["expense"], 2),"net": round(item["net"], 2),})
+        for item in cashFlow:
+            result.append({"period": item["period"],"income": round(float(item["income"] or 0), 2),"expense": round(float(item["expense"] or 0), 2),"net": round(float(item["net"] or 0), 2),})
 
         return result
 
     async def get_expense_category_distribution(self, userID: int) -> Dict[str, Any]:
-        response = await self.categoryService.get_transactions(
-            slugs=",".join(self.bankSlugsCatalog.all()),
-            userID=userID,
-        )
+        response = await self._get_categorized_transactions(userID)
+        return self._calculate_expense_category_distribution(response)
 
+    @staticmethod
+    def _calculate_expense_category_distribution(response: Dict[str, Any]) -> Dict[str, Any]:
         if response.get("status") != "success":
             return {
                 "status": "error",
@@ -203,13 +209,11 @@ class AnalyticsService(AbstractAnalyticsService):
         }
 
     async def get_income_category_distribution(self, userID: int) -> Dict[str, Any]:
-        slugs = ",".join(self.bankSlugsCatalog.all())
-
-        response = await self.categoryService.get_transactions(
-            slugs=slugs,
-            userID=userID,
-        )
+        response = await self._get_categorized_transactions(userID)
+        return self._calculate_income_category_distribution(response)
 
+    @staticmethod
+    def _calculate_income_category_distribution(response: Dict[str, Any]) -> Dict[str, Any]:
         if response.get("status") != "success":
             return {
                 "status": "error",
@@ -271,106 +275,72 @@ class AnalyticsService(AbstractAnalyticsService):
         }
 
     async def get_last_transactions(self, userID: int, limit: int = 10) -> Dict[str, Any]:
-        transactionsPull = {}
-        for slug in self.bankSlugsCatalog.all():
-            bankHandler = self.bankFactory.get_handler(slug)
-            slugTransactions = await bankHandler.get_data((bankHandler.dbt.userID == userID,))
-            slugTransactions = sorted(slugTransactions, key=lambda x: x.operationDate, reverse=True)
-            transactionsPull.update({slug:slugTransactions[:limit]})
-
+        bankView = self.bankFactory.get_view_handler()
+        transactionsPull = await bankView.get_top_data_by_slug(
+            columnFilters=(bankView.dbt.c.userID == userID,),
+            orderBy=(bankView.dbt.c.operationDate.desc(), bankView.dbt.c.id),
+            limit=limit,
+        )
         return transactionsPull
 
     @staticmethod
-    def _find_most_anomalous_expense(transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
-        expenses = [t for t in transactions if t.get("currencyAmount", 0) < 0]
-        if not expenses:
+    def _find_most_anomalous_expense(frame: TransactionFrame) -> Dict[str, Any]:
+        expenseMask = frame.amounts < 0
+        if not expenseMask.any():
             return None
 
-        from collections import defaultdict
-        categories = defaultdict(list)
-        for t in expenses:
-            cat = t.get("category") or "Без категории"
-            categories[cat].append(t)
-
-        anomaliesWithScore = []
-
-        for _, transList in categories.items():
-            if len(transList) < 3:
-                continue
-
-            amounts = [abs(t["currencyAmount"] if "currencyAmount" in t else t["currencyAmount"]) for t in transList]
-
-            amountsSorted = sorted(amounts)
-            n = len(amountsSorted)
-            q1 = amountsSorted[int(0.25 * (n - 1))]
-            q3 = amountsSorted[int(0.75 * (n - 1))]
-            iqr = q3 - q1
-            threshold = q3 + 1.5 * iqr
-
-            for t in transList:
-                amount = abs(t["currencyAmount"])
-                if amount > threshold:
-                    score = amount - threshold
-                    anomaliesWithScore.append((score, t))
-
-        if not anomaliesWithScore:
+        expenseRows = np.flatnonzero(expenseMask)
+        groupCodes, _ = frame.category_groups(expenseMask, "Без категории")
+        amounts = np.abs(frame.amounts[expenseMask])
+
+        # Квартили внутри каждой категории: сортировка по (категория, сумма) и индексы от начала группы
+        counts = np.bincount(groupCodes)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        sortedAmounts = amounts[np.lexsort((amounts, groupCodes))]
+        q1 = sortedAmounts[starts + (0.25 * (counts - 1)).astype(np.int64)]
+        q3 = sortedAmounts[starts + (0.75 * (counts - 1)).astype(np.int64)]
+        thresholds = q3 + 1.5 * (q3 - q1)
+
+        rowThresholds = thresholds[groupCodes]
+        anomalyMask = (counts[groupCodes] >= 3) & (amounts > rowThresholds)
+        if not anomalyMask.any():
             return {"status":False}
 
-        _, mostAnomalous = max(anomaliesWithScore, key=lambda x: x[0])
-        return {"status":True, "data":mostAnomalous}
+        # max() по списку (категории в порядке появления, строки по порядку) берет первый максимум
+        scores = amounts[anomalyMask] - rowThresholds[anomalyMask]
+        candidates = np.flatnonzero(anomalyMask)
+        candidates = candidates[scores == scores.max()]
+        mostAnomalous = candidates[np.lexsort((candidates, groupCodes[candidates]))[0]]
+        return {"status":True, "data":frame.rows[expenseRows[mostAnomalous]]}
 
     async def get_anomaly_transactions(self, userID: int) -> List[Dict[str, Any]]:
-        slugs = ','.join(self.bankSlugsCatalog.all())
-        transactionsPull = await self.categoryService.get_transactions(slugs=slugs, userID=userID)
-        anomalyTransaction = self._find_most_anomalous_expense(transactionsPull.get("data"))
+        transactionsPull = await self._get_categorized_transactions(userID)
+        anomalyTransaction = self._find_most_anomalous_expense(TransactionFrame.from_transactions(transactionsPull.get("data")))
         return anomalyTransaction
 
     @staticmethod
-    def _calculate_habit_cost(transactions: List[Dict[str, Any]]) -> Dict[str, float]:
+    def _calculate_habit_cost(frame: TransactionFrame) -> Dict[str, float]:
         today = datetime(2025, 12, 22)
         sixMonthsAgo = today - timedelta(days=180)
 
-        expenses = []
-        for t in transactions:
-            amount = t.get("currencyAmount")
-            if amount is None or amount >= 0:
-                continue
+        expenseMask = (frame.amounts < 0) & frame.validDays
+        expenseMask &= (frame.days >= TransactionFrame.day_number(sixMonthsAgo)) & (frame.days <= TransactionFrame.day_number(today))
 
-            try:
-                opDate = datetime.strptime(t["operationDate"], "%Y-%m-%d")
-            except (ValueError, TypeError):
-                continue
-
-            if opDate < sixMonthsAgo or opDate > today:
-                continue
-
-            category = t.get("category") or "Без категории"
-            expenses.append({
-                "category": category,
-                "amount": abs(amount)
-            })
-
-        # from collections import defaultdict
-        categoryTotals = defaultdict(float)
-        categoryCounts = defaultdict(int)
-
-        for exp in expenses:
-            cat = exp["category"]
-            categoryTotals[cat] += exp["amount"]
-            categoryCounts[cat] += 1
+        groupCodes, groupNames = frame.category_groups(expenseMask, "Без категории")
+        categoryTotals = np.bincount(groupCodes, weights=np.abs(frame.amounts[expenseMask]), minlength=len(groupNames))
+        categoryCounts = np.bincount(groupCodes, minlength=len(groupNames))
 
         habitCosts = {
-            cat: round(total, 2)
-            for cat, total in categoryTotals.items()
-            if categoryCounts[cat] >= 2
+            cat: round(float(categoryTotals[i]), 2)
+            for i, cat in enumerate(groupNames)
+            if categoryCounts[i] >= 2
         }
 
         return habitCosts
 
     async def get_habits_cost(self, userID: int) -> List[Dict[str, Any]]:
-        slugs = ','.join(self.bankSlugsCatalog.all())
-        transactionsPull = await self.categoryService.get_transactions(slugs=slugs, userID=userID)
-        habitsCost = self._calculate_habit_cost(transactionsPull.get("data"))
+        transactionsPull = await self._get_categorized_transactions(userID)
+        habitsCost = self._calculate_habit_cost(TransactionFrame.from_transactions(transactionsPull.get("data")))
         return habitsCost
 
     @staticmethod
@@ -472,40 +442,28 @@ class AnalyticsService(AbstractAnalyticsService):
         }
 
     async def get_user_financial_profile(self, userID: int) -> Dict[str, Any]:
-        slugs = ','.join(self.bankSlugsCatalog.all())
-        transactionsPull = await self.categoryService.get_transactions(slugs=slugs, userID=userID)
+        transactionsPull = await self._get_categorized_transactions(userID)
         return self._generate_financial_profile(transactionsPull.get('data'))
     
     @staticmethod
-    def _calculate_financial_literacy_score(transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
-        if not transactions:
+    def _calculate_financial_literacy_score(frame: TransactionFrame) -> Dict[str, Any]:
+        if not len(frame):
             return {"score": 0, "category": "Финансовая бестолочь"}
 
-        income = 0.0
-        expenses = 0.0
-        categoryCounter = []
-        otherCategoryCount = 0
         essentialCategories = {"На квартиру", "Продукты", "Здоровье", "Транспорт", "Коммунальные услуги", "Еда"}
-        essentialExpenses = 0.0
 
-        for t in transactions:
-            amount = t.get("currencyAmount")
-            if amount is None:
-                continue
+        incomeMask = frame.amounts > 0
+        expenseMask = frame.amounts < 0
+        expenseAmounts = np.abs(frame.amounts[expenseMask])
 
-            if amount > 0:
-                income += amount
-            elif amount < 0:
-                expense = abs(amount)
-                expenses += expense
-                categoryCounter.append(t)
+        income = TransactionFrame.sequential_sum(frame.amounts[incomeMask])
+        expenses = TransactionFrame.sequential_sum(expenseAmounts)
 
-                category = t.get("category", "Прочие операции") or "Прочие операции"
-                if category == "Прочие операции":
-                    otherCategoryCount += 1
-
-                if category in essentialCategories:
-                    essentialExpenses += expense
+        groupCodes, groupNames = frame.category_groups(expenseMask, "Прочие операции")
+        otherCategoryCount = int(np.count_nonzero(groupCodes == groupNames.index("Прочие операции"))) if "Прочие операции" in groupNames else 0
+        essentialMask = np.isin(groupCodes, [i for i, x in enumerate(groupNames) if x in essentialCategories])
+        essentialExpenses = TransactionFrame.sequential_sum(expenseAmounts[essentialMask])
+        expensesCount = int(expenseAmounts.size)
 
         if income == 0:
             balanceScore = 0
@@ -518,17 +476,17 @@ class AnalyticsService(AbstractAnalyticsService):
             else:
                 balanceScore = max(0, int(40 * (1 / expenseRatio)))
 
-        smallExpenses = sum(1 for t in categoryCounter if abs(t["currencyAmount"]) < 1000)
-        if len(categoryCounter) == 0:
+        smallExpenses = int(np.count_nonzero(expenseAmounts < 1000))
+        if expensesCount == 0:
             habitScore = 20
         else:
-            smallRatio = smallExpenses / len(categoryCounter)
+            smallRatio = smallExpenses / expensesCount
             habitScore = int(20 * (1 - min(smallRatio, 1.0)))
 
-        if len(categoryCounter) == 0:
+        if expensesCount == 0:
             categorization_score = 15
         else:
-            other_ratio = otherCategoryCount / len(categoryCounter)
+            other_ratio = otherCategoryCount / expensesCount
             categorization_score = int(15 * (1 - min(other_ratio, 1.0)))
         if expenses == 0:
             essentialScore = 0
@@ -564,13 +522,12 @@ class AnalyticsService(AbstractAnalyticsService):
 
     # СКОРИНГ
     async def get_financial_health_score(self, userID: int) -> Dict[str, Any]:
-        slugs = ','.join(self.bankSlugsCatalog.all())
-        transactionsPull = await self.categoryService.get_transactions(slugs=slugs, userID=userID)
-        return self._calculate_financial_literacy_score(transactionsPull.get('data'))
+        transactionsPull = await self._get_categorized_transactions(userID)
+        return self._calculate_financial_literacy_score(TransactionFrame.from_transactions(transactionsPull.get('data')))
     
     @staticmethod
-    def _forecast_next_month_expenses(transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
-        if not transactions:
+    def _forecast_next_month_expenses(frame: TransactionFrame) -> Dict[str, Any]:
+        if not len(frame):
             return {
                 "forecastAmount": 0.0,
                 "confidence": "низкая",
@@ -581,27 +538,15 @@ class AnalyticsService(AbstractAnalyticsService):
         today = datetime(2025, 12, 22)
         currentMonth = today.year * 12 + today.month
 
-        monthlyExpenses = defaultdict(float)
+        monthKeys = TransactionFrame.month_keys(frame.days)
+        expenseMask = (frame.amounts < 0) & frame.validDays & (monthKeys <= currentMonth) & (monthKeys >= currentMonth - 5)
 
-        for t in transactions:
-            amount = t.get("currencyAmount")
-            if amount is None or amount >= 0:
-                continue
-
-            try:
-                opDate = datetime.strptime(t["operationDate"], "%Y-%m-%d")
-            except (ValueError, TypeError):
-                continue
+        # Последние 6 месяцев: смещение от самого раннего как индекс для bincount
+        monthOffsets = monthKeys[expenseMask] - (currentMonth - 5)
+        monthlyExpenses = np.bincount(monthOffsets, weights=np.abs(frame.amounts[expenseMask]), minlength=6)
+        monthlyCounts = np.bincount(monthOffsets, minlength=6)
 
-            monthKey = opDate.year * 12 + opDate.month
-            if monthKey > currentMonth:
-                continue 
-            if monthKey < currentMonth - 5:
-                continue
-
-            monthlyExpenses[monthKey] += abs(amount)
-
-        sortedMonths = sorted(monthlyExpenses.items())
+        sortedMonths = [(currentMonth - 5 + i, float(monthlyExpenses[i])) for i in range(6) if monthlyCounts[i]]
         if not sortedMonths:
             return {
                 "forecastAmount": 0.0,
@@ -649,13 +594,12 @@ class AnalyticsService(AbstractAnalyticsService):
     
     # ПРОГНОЗИРОВАНИЕ (PREDICTION)
     async def predict_next_month_expenses(self, userID: int) -> Dict[str, Any]:
-        slugs = ','.join(self.bankSlugsCatalog.all())
-        transactionsPull = await self.categoryService.get_transactions(slugs=slugs, userID=userID)
-        return self._forecast_next_month_expenses(transactionsPull.get('data'))
+        transactionsPull = await self._get_categorized_transactions(userID)
+        return self._forecast_next_month_expenses(TransactionFrame.from_transactions(transactionsPull.get('data')))
 
     @staticmethod
-    def _forecast_expenses_by_category(transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
-        if not transactions:
+    def _forecast_expenses_by_category(frame: TransactionFrame) -> Dict[str, Any]:
+        if not len(frame):
             return {
                 "forecastByCategory": {},
                 "totalForecast": 0.0,
@@ -666,24 +610,22 @@ class AnalyticsService(AbstractAnalyticsService):
         today = datetime(2025, 12, 22)
         currentmonthKey = today.year * 12 + today.month
 
-        categoryMonthly = defaultdict(lambda: defaultdict(float))
+        monthKeys = TransactionFrame.month_keys(frame.days)
+        expenseMask = (frame.amounts < 0) & frame.validDays & (monthKeys <= currentmonthKey) & (monthKeys >= currentmonthKey - 5)
 
-        for t in transactions:
-            amount = t.get("currencyAmount")
-            if amount is None or amount >= 0:
-                continue
+        groupCodes, groupNames = frame.category_groups(expenseMask, "Без категории")
+        monthOffsets = monthKeys[expenseMask] - (currentmonthKey - 5)
 
-            try:
-                opDate = datetime.strptime(t["operationDate"], "%Y-%m-%d")
-            except (ValueError, TypeError):
-                continue
+        # Матрица категория x месяц: np.add.at накапливает по порядку строк
+        monthlyAmounts = np.zeros((len(groupNames), 6), dtype=np.float64)
+        monthlyCounts = np.zeros((len(groupNames), 6), dtype=np.int64)
+        np.add.at(monthlyAmounts, (groupCodes, monthOffsets), np.abs(frame.amounts[expenseMask]))
+        np.add.at(monthlyCounts, (groupCodes, monthOffsets), 1)
 
-            monthKey = opDate.year * 12 + opDate.month
-            if monthKey > currentmonthKey or monthKey < currentmonthKey - 5:
-                continue
-
-            category = t.get("category") or "Без категории"
-            categoryMonthly[category][monthKey] += abs(amount)
+        categoryMonthly = {
+            category: {currentmonthKey - 5 + i: float(monthlyAmounts[code, i]) for i in range(6) if monthlyCounts[code, i]}
+            for code, category in enumerate(groupNames)
+        }
 
         if not categoryMonthly:
             return {
@@ -738,8 +680,46 @@ class AnalyticsService(AbstractAnalyticsService):
         }
     
     async def predict_category_expenses(self, userID: int) -> List[Dict[str, Any]]:
-        slugs = ','.join(self.bankSlugsCatalog.all())
-        transactionsPull = await self.categoryService.get_transactions(slugs=slugs, userID=userID)
-        return self._forecast_expenses_by_category(transactionsPull.get('data'))
-
-
+        transactionsPull = await self._get_categorized_transactions(userID)
+        return self._forecast_expenses_by_category(TransactionFrame.from_transactions(transactionsPull.get('data')))
+
+    async def get_analytics_bundle(self, userID: int, sections: List[str] | None = None, period: str = "month", limit: int = 10) -> Dict[str, Any]:
+        sections = self.bundleSections if not sections else sections
+        unknownSections = [x for x in sections if x not in self.bundleSections]
+        if unknownSections:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unsupported analytics sections: {', '.join(unknownSections)}")
+
+        # Транзакции грузятся, размечаются и раскладываются по колонкам один раз на все секции
+        response: Dict[str, Any] = {}
+        if any(x not in ("balance", "cash_flow", "last_transactions") for x in sections):
+            response = await self._get_categorized_transactions(userID)
+        transactions = response.get("data")
+        frame = TransactionFrame.from_transactions(transactions)
+
+        bundle: Dict[str, Any] = {}
+        for section in sections:
+            match section:
+                case "balance":
+                    bundle[section] = await self.get_balance(userID)
+                case "cash_flow":
+                    bundle[section] = await self.get_cash_flow(userID, period)
+                case "last_transactions":
+                    bundle[section] = await self.get_last_transactions(userID, limit)
+                case "expense_category_distribution":
+                    bundle[section] = self._calculate_expense_category_distribution(response)
+                case "income_category_distribution":
+                    bundle[section] = self._calculate_income_category_distribution(response)
+                case "anomaly_transactions":
+                    bundle[section] = self._find_most_anomalous_expense(frame)
+                case "habits_cost":
+                    bundle[section] = self._calculate_habit_cost(frame)
+                case "user_financial_profile":
+                    bundle[section] = self._generate_financial_profile(transactions)
+                case "financial_health_score":
+                    bundle[section] = self._calculate_financial_literacy_score(frame)
+                case "predict_next_month_expenses":
+                    bundle[section] = self._forecast_next_month_expenses(frame)
+                case "predict_category_expenses":
+                    bundle[section] = self._forecast_expenses_by_category(frame)
+
+        return bundle
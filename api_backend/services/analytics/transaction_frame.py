@@ -0,0 +1,95 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+class TransactionFrame:
+    """Колоночное представление размеченных транзакций для аналитики.
+
+    Строится один раз на запрос: даты - int64 номера дней от 1970-01-01, суммы - float64 (None -> nan),
+    категории - int32 коды в порядке первого появления. rows хранит исходные словари.
+    """
+
+    def __init__(self, rows: List[Dict[str, Any]], days: np.ndarray, amounts: np.ndarray,
+                 categoryCodes: np.ndarray, categoryNames: List[Any]):
+        self.rows = rows
+        self.days = days
+        self.amounts = amounts
+        self.categoryCodes = categoryCodes
+        self.categoryNames = categoryNames
+        self.validDays = days != np.iinfo(np.int64).min
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @classmethod
+    def from_transactions(cls, transactions: Optional[List[Dict[str, Any]]]) -> "TransactionFrame":
+        rows = list(transactions or [])
+
+        amounts = np.array([np.nan if x.get("currencyAmount") is None else x.get("currencyAmount") for x in rows], dtype=np.float64)
+        categoryCodes, categoryNames = cls._encode([x.get("category") for x in rows])
+        return cls(rows, cls._parse_days([x.get("operationDate") for x in rows]), amounts, categoryCodes, categoryNames)
+
+    @staticmethod
+    def _encode(values: List[Any]):
+        codes: Dict[Any, int] = {}
+        encoded = np.array([codes.setdefault(x, len(codes)) for x in values], dtype=np.int32)
+        return encoded, list(codes)
+
+    @staticmethod
+    def _parse_days(values: List[Any]) -> np.ndarray:
+        # Даты из БД уже в ISO: строки вида YYYY-MM-DD парсим массивом, остальные (и весь массив,
+        # если в нем есть несуществующая дата) разбираем как раньше через strptime, ошибка -> NaT
+        days = np.full(len(values), np.datetime64("NaT"), dtype="datetime64[D]")
+        chars = np.array([x if isinstance(x, str) and len(x) == 10 else "" for x in values], dtype="U10")
+        chars = chars.view(np.uint32).reshape(-1, 10)
+        isDigit = (chars >= ord("0")) & (chars <= ord("9"))
+        isIso = (isDigit[:, [0, 1, 2, 3, 5, 6, 8, 9]].all(axis=1)
+                 & (chars[:, 4] == ord("-")) & (chars[:, 7] == ord("-"))
+                 & (chars[:, :4] != ord("0")).any(axis=1))
+
+        isoIndex = np.flatnonzero(isIso)
+        try:
+            days[isoIndex] = np.array([values[i] for i in isoIndex], dtype="datetime64[D]")
+        except ValueError:
+            isIso[:] = False
+
+        for i in np.flatnonzero(~isIso):
+            try:
+                days[i] = np.datetime64(datetime.strptime(values[i], "%Y-%m-%d").date(), "D")
+            except (ValueError, TypeError):
+                days[i] = np.datetime64("NaT")
+        return days.astype(np.int64)
+
+    @staticmethod
+    def day_number(value: datetime) -> int:
+        return int(np.datetime64(value.date(), "D").astype(np.int64))
+
+    @staticmethod
+    def month_keys(days: np.ndarray) -> np.ndarray:
+        # year * 12 + month, как в исходных прогнозах
+        return days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64) + 1970 * 12 + 1
+
+    @staticmethod
+    def sequential_sum(values: np.ndarray) -> float:
+        # bincount складывает строго по порядку, как цикл с +=, в отличие от попарного np.sum
+        if values.size == 0:
+            return 0.0
+        return float(np.bincount(np.zeros(values.size, dtype=np.intp), weights=values, minlength=1)[0])
+
+    def category_groups(self, mask: np.ndarray, fallback: str):
+        """Коды групп по подписи категории (пустая -> fallback) для строк mask в порядке первого появления."""
+        labels = [x if x else fallback for x in self.categoryNames]
+        labelCodes: Dict[str, int] = {}
+        codeToLabel = np.array([labelCodes.setdefault(x, len(labelCodes)) for x in labels] or [0], dtype=np.int64)
+
+        rowLabels = codeToLabel[self.categoryCodes[mask]]
+        uniqueLabels, firstIndex, groupCodes = np.unique(rowLabels, return_index=True, return_inverse=True)
+        order = np.argsort(firstIndex, kind="stable")
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+
+        labelNames = list(labelCodes)
+        groupNames = [labelNames[x] for x in uniqueLabels[order]]
+        return rank[groupCodes.reshape(-1)], groupNames
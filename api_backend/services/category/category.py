@@ -1,4 +1,7 @@
-from sqlalchemy import select, delete as sa_delete
+import uuid
+import asyncio
+from sqlalchemy import select, or_, false, func
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
     async_sessionmaker,
@@ -7,8 +10,9 @@ from sqlalchemy.ext.asyncio import (
 
 from datetime import date, datetime
 from abc import ABC, abstractmethod
-from fastapi import HTTPException, status
-from typing import List, Dict, Any, Optional
+from fastapi import HTTPException, BackgroundTasks, status
+from collections import defaultdict
+from typing import List, Dict, Any, Optional, Callable, Tuple, AsyncIterator
 
 from .schema import *
 from ...handlers.castom_category.schema import *
@@ -16,7 +20,9 @@ from ...handlers.logers.loger_handlers import LogerHandler
 from ...handlers.bank_files.bank_registry import BankHandlerRegistry
 from ...handlers.castom_category.category_catalog_handler import AbstractTransactionCategoryHandler
 from ...handlers.castom_category.category_conditions_handler import AbstractTransactionCategoryConditionsHandler
+from ...handlers.castom_category.category_matcher import CategoryRulesMatcher, CategoryRulesCache
 from ...handlers.bank_files.bank_slugs import BankSlugs
+from ...handlers.db.keyset_pagination import KeysetPaginator
 
 class AbstractСategoryService(ABC):
     @abstractmethod
@@ -29,28 +35,68 @@ class AbstractСategoryService(ABC):
         self.categoryConditionsHandler: AbstractTransactionCategoryConditionsHandler = categoryConditionsHandler
 
     @abstractmethod
-    def get_transactions(self, slugs:str, userID:int):
+    def get_transactions(self, slugs:str, userID:int, pageSize:int | None = None, cursor:str | None = None):
         pass
 
     @abstractmethod
-    def get_categorys(self, userID: int):
+    def stream_transactions(self, slugs:str, userID:int):
         pass
 
     @abstractmethod
-    def add_category(self, userID:int, addData: AddCategoryServiceSchema):
+    def get_categorys(self, userID: int, withStats: bool = True):
         pass
 
     @abstractmethod
-    def delete_category(self, userID: int, categoryID: int):
+    def get_category_resolver(self, userID: int):
         pass
 
     @abstractmethod
-    def update_category(self, userID: int, categoryID: int, updateData: UpdateDataServiceSchema):
+    def recategorize_transactions(self, userID: int, categoryIDs: List[int] | None = None, conditionValues: List[str] | None = None):
+        pass
+
+    @abstractmethod
+    def backfill_resolved_categories(self):
+        pass
+
+    @abstractmethod
+    def start_recategorization(self, userID: int, backgroundTasks: BackgroundTasks | None = None, categoryIDs: List[int] | None = None, conditionValues: List[str] | None = None):
+        pass
+
+    @abstractmethod
+    def get_recategorization_jobs(self, userID: int, jobID: str | None = None):
+        pass
+
+    @abstractmethod
+    def add_category(self, userID:int, addData: AddCategoryServiceSchema, backgroundTasks: BackgroundTasks | None = None):
+        pass
+
+    @abstractmethod
+    def delete_category(self, userID: int, categoryID: int, backgroundTasks: BackgroundTasks | None = None):
+        pass
+
+    @abstractmethod
+    def update_category(self, userID: int, categoryID: int, updateData: UpdateDataServiceSchema, backgroundTasks: BackgroundTasks | None = None):
         pass
 
 class СategoryService(AbstractСategoryService):
+    recategorizeChunkSize: int = 500
+    recategorizeJobsLimit: int = 200
+    categoryRulesCacheSize: int = 256
+    # Колонки представления банков, которые читаются для ответа и для перекатегоризации
+    transactionColumns: Tuple[str, ...] = ("id", "userID", "fileName", "operationDate", "postingDate", "code", "category",
+                                           "description", "description2", "currencyAmount", "amount", "status",
+                                           "resolvedCategory", "slug")
+    recategorizeColumns: Tuple[str, ...] = ("id", "slug", "description", "description2", "code",
+                                            "resolvedCategoryID", "resolvedCategory")
+    # Страница транзакций, если клиент прислал только cursor
+    transactionsPageSize: int = 100
+
     def __init__(self, categoryCatalogHandler, categoryConditionsHandler, bankRgistry, logerHandler,bankSlugsCatalog):
         super().__init__(categoryCatalogHandler, categoryConditionsHandler, bankRgistry, logerHandler,bankSlugsCatalog)
+        self.categoryRulesCache = CategoryRulesCache(maxSize=self.categoryRulesCacheSize)
+        self.recategorizeJobs: Dict[str, Dict[str, Any]] = {}
+        self.recategorizeLocks: Dict[int, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self.backfillTask: asyncio.Task | None = None
 
     async def _is_category_exists(self, userID: int, categoryID: int):
         # Проверка на наличее категории у пользователя
@@ -122,7 +168,7 @@ class СategoryService(AbstractСategoryService):
             "code": codeValue,
             "slug": slugValue,
             "bankCategory": bankCategoryValue,     # исходная категория банка/БД (может быть None)
-            "customCategory": None,               # сюда проставим кастомную категорию (если совпадет правило)
+            "customCategory": transaction.get("resolvedCategory"),  # кастомная категория, проставленная при вставке
             "category": bankCategoryValue,       # итоговая категория (кастомная имеет приоритет)
 
             "description": descriptionValue,
@@ -132,75 +178,58 @@ class СategoryService(AbstractСategoryService):
             "status": statusValue,
         }
 
-    def _is_condition_match(self, haystack: str, conditionValue: str, isExact: bool) -> bool:
-        haystackNormalized = self._normalize_text(haystack)
-        needle = self._normalize_text(conditionValue)
-
-        if not needle:
-            return False
-
-        if isExact:
-            return haystackNormalized == needle
-
-        return needle in haystackNormalized
+    def _compile_category_rules(self, categorys: List[Dict[str, Any]], matchFields: List[str]) -> CategoryRulesMatcher:
+        return CategoryRulesMatcher(categorys, matchFields)
 
     def _resolve_custom_category_name(
         self,
         normalizedTransaction: Dict[str, Any],
-        categorys: List[Dict[str, Any]],
-        matchFields: List[str],
+        categoryMatcher: CategoryRulesMatcher,
     ) -> Optional[str]:
-        
-        matchValues = [self._normalize_text(normalizedTransaction.get(fieldName)) for fieldName in matchFields]
-        joinedHaystack = " | ".join([v for v in matchValues if v])
-
-        for categoryItem in categorys:
-            categoryName = self._normalize_text(categoryItem.get("categoryName"))
-            conditions = categoryItem.get("categoryConditions") or []
-
-            for condition in conditions:
-                conditionValue = self._normalize_text(condition.get("conditionValue"))
-                isExact = bool(condition.get("isExact", False))
-
-                if isExact:
-                    for fieldValue in matchValues:
-                        if self._is_condition_match(fieldValue, conditionValue, True):
-                            return categoryName
-                else:
-                    if self._is_condition_match(joinedHaystack, conditionValue, False):
-                        return categoryName
+        categoryItem = categoryMatcher.match(normalizedTransaction)
+        if categoryItem is None:
+            return None
+        return self._normalize_text(categoryItem.get("categoryName"))
 
-        return None
+    def _categorize_transaction(
+        self,
+        transaction: Dict[str, Any],
+        categoryMatcher: Optional[CategoryRulesMatcher] = None,
+    ) -> Tuple[Dict[str, Any], bool]:
+        normalizedTx = self._normalize_transaction(transaction)
+
+        if categoryMatcher is None:
+            customCategoryName = self._normalize_text(normalizedTx["customCategory"]) or None
+        else:
+            customCategoryName = self._resolve_custom_category_name(normalizedTx, categoryMatcher)
+
+        if customCategoryName:
+            normalizedTx["customCategory"] = customCategoryName
+            normalizedTx["category"] = customCategoryName
+            return normalizedTx, True
+
+        normalizedTx["customCategory"] = None
+        if normalizedTx["category"] is None:
+            normalizedTx["category"] = "Прочие операции"
+        return normalizedTx, False
 
     def group_by_category(
         self,
-        categorys: List[Dict[str, Any]],
+        categorys: Optional[List[Dict[str, Any]]],
         transactions: List[Dict[str, Any]],
         matchFields: Optional[List[str]] = None,
     ) -> Dict[str, Any]:
+        # categorys=None: кастомная категория уже сохранена в строке (resolvedCategory)
         if matchFields is None:
             matchFields = ["description", "description2", "code"]
 
         processed: List[Dict[str, Any]] = []
         matchedCount = 0
+        categoryMatcher = None if categorys is None else self._compile_category_rules(categorys, matchFields)
 
         for transaction in transactions:
-            normalizedTx = self._normalize_transaction(transaction)
-
-            customCategoryName = self._resolve_custom_category_name(
-                normalizedTransaction=normalizedTx,
-                categorys=categorys,
-                matchFields=matchFields,
-            )
-
-            if customCategoryName:
-                normalizedTx["customCategory"] = customCategoryName
-                normalizedTx["category"] = customCategoryName
-                matchedCount += 1
-            else:
-                if normalizedTx["category"] is None:
-                    normalizedTx["category"] = "Прочие операции"
-
+            normalizedTx, isMatched = self._categorize_transaction(transaction, categoryMatcher)
+            matchedCount += isMatched
             processed.append(normalizedTx)
 
         return {
@@ -214,102 +243,84 @@ class СategoryService(AbstractСategoryService):
             },
         }
 
-    async def get_transactions(self, slugs: str, userID: int):
-        transactionsPull = []
-
-        for slug in slugs.split(","):
-            slugValue = slug.strip()
-            if not slugValue:
-                continue
-
-            bankHandler = self.bankRgistry.get_handler(slugValue)
-            getBankTransactionFilter = (bankHandler.dbt.userID == userID,)
-            bankData = await bankHandler.get_data(getBankTransactionFilter)
-
-            # Важно: ставим slug на транзакции конкретного банка до merge в общий пул
-            for item in bankData:
-                transactionDict = item.to_dict()
-                transactionDict["slug"] = slugValue
-                transactionsPull.append(transactionDict)
-
-        categoryCatalog = await self.get_categorys(userID)
-
+    async def get_transactions(self, slugs: str, userID: int, pageSize: int | None = None, cursor: str | None = None):
+        slugList = [slug.strip() for slug in slugs.split(",") if slug.strip()]
+        self.bankRgistry.error_if_slugs_does_not_registered(slugList)
+
+        # Один запрос по объединенному представлению всех банков, slug уже в строке.
+        # Только колонки, которые попадают в ответ (без отпечатка строки и id категории)
+        bankView = self.bankRgistry.get_view_handler()
+        columnFilters = (bankView.dbt.c.userID == userID, bankView.dbt.c.slug.in_(slugList))
+        isPaged = pageSize is not None or cursor is not None
+        if not isPaged:
+            transactionsPull = await bankView.get_data(
+                columnFilters,
+                orderBy=(bankView.slug_order(slugList), bankView.dbt.c.id),
+                columns=self.transactionColumns,
+            )
+        else:
+            # Постранично: новые операции первыми. id повторяются между таблицами банков, поэтому slug - в конце ключа
+            paginator = KeysetPaginator((bankView.dbt.c.operationDate, bankView.dbt.c.id, bankView.dbt.c.slug))
+            pageSize = pageSize or self.transactionsPageSize
+            transactionsPull, nextCursor = paginator.page(await bankView.get_data(
+                (*columnFilters, *paginator.after_filter(cursor)),
+                orderBy=paginator.order_by(),
+                limit=pageSize + 1,
+                columns=self.transactionColumns,
+            ), pageSize)
+
+        # Кастомная категория уже лежит в resolvedCategory, правила не перебираем
         result = self.group_by_category(
-            categorys=categoryCatalog,
+            categorys=None,
             transactions=transactionsPull,
             matchFields=["description", "description2", "code"],
         )
+        if isPaged:
+            result["nextCursor"] = nextCursor
 
         return result
 
-    async def _get_all_transactions_pull(self, userID: int) -> List[Dict[str, Any]]:
-        transactionsPull: List[Dict[str, Any]] = []
-
-        for slugValue in self.bankSlugsCatalog.all():
-            bankHandler = self.bankRgistry.get_handler(slugValue)
-            bankData = await bankHandler.get_data((bankHandler.dbt.userID == userID,))
-            transactionsPull.extend([x.to_dict() for x in bankData])
-
-        return transactionsPull
-
-    def _calc_category_stats(
-        self,
-        categorys: List[Dict[str, Any]],
-        transactions: List[Dict[str, Any]],
-        matchFields: Optional[List[str]] = None,
-    ) -> Dict[str, Dict[str, Any]]:
-        if matchFields is None:
-            matchFields = ["description", "description2", "code"]
-
-        stats: Dict[str, Dict[str, Any]] = {}
-
-        for tx in transactions:
-            normalizedTx = self._normalize_transaction(tx)
-
-            customCategoryName = self._resolve_custom_category_name(
-                normalizedTransaction=normalizedTx,
-                categorys=categorys,
-                matchFields=matchFields,
-            )
-
-            if customCategoryName:
-                finalCategory = customCategoryName
-            else:
-                finalCategory = normalizedTx.get("bankCategory") or "Прочие операции"
-
-            amountValue = normalizedTx.get("currencyAmount")
-            if amountValue is None:
-                amountValue = 0.0
-
-            if finalCategory not in stats:
-                stats[finalCategory] = {"transactionsCount": 0, "amountSum": 0.0}
-
-            stats[finalCategory]["transactionsCount"] += 1
-            stats[finalCategory]["amountSum"] += float(amountValue or 0.0)
-
-        return stats
-
-    async def get_categorys(self, userID: int):
-        getCategoryCatalogFilter = (self.categoryCatalogHandler.dbt.userID == userID,)
-        userCategoryCatalog = await self.categoryCatalogHandler.get_category(getCategoryCatalogFilter)
+    async def stream_transactions(self, slugs: str, userID: int) -> AsyncIterator[Dict[str, Any]]:
+        # Те же строки, что в data у get_transactions, но по одной из курсора - без списка на всю историю.
+        # slug проверяется до начала ответа: ошибка посреди потока дошла бы до клиента только обрывом
+        slugList = [slug.strip() for slug in slugs.split(",") if slug.strip()]
+        self.bankRgistry.error_if_slugs_does_not_registered(slugList)
+
+        bankView = self.bankRgistry.get_view_handler()
+        transactionsStream = bankView.stream_data(
+            (bankView.dbt.c.userID == userID, bankView.dbt.c.slug.in_(slugList)),
+            orderBy=(bankView.slug_order(slugList), bankView.dbt.c.id),
+            columns=self.transactionColumns,
+        )
+        return (self._categorize_transaction(transaction)[0] async for transaction in transactionsStream)
+
+    async def _get_category_stats(self, userID: int) -> Dict[str, Dict[str, Any]]:
+        # Итоговая категория строки: сохраненная кастомная, иначе банковская, иначе "Прочие операции"
+        bankView = self.bankRgistry.get_view_handler()
+        finalCategory = func.coalesce(
+            func.nullif(bankView.dbt.c.resolvedCategory, ""),
+            func.nullif(bankView.dbt.c.category, ""),
+            "Прочие операции",
+        )
+        statsData = await bankView.get_aggregated_data(
+            aggregations={
+                "transactionsCount": func.count(),
+                "amountSum": func.coalesce(func.sum(bankView.dbt.c.currencyAmount), 0.0),
+            },
+            columnFilters=(bankView.dbt.c.userID == userID,),
+            groupBy={"finalCategory": finalCategory},
+        )
+        return {x["finalCategory"]: x for x in statsData}
 
-        categoryData = []
-        for categoryID in userCategoryCatalog:
-            getCategoryConditionFilter = (self.categoryConditionsHandler.dbt.categoryID == categoryID.id,)
-            categoryConditionsCatalog = await self.categoryConditionsHandler.get_category_conditions(getCategoryConditionFilter)
+    async def get_categorys(self, userID: int, withStats: bool = True):
+        categoryMatcher = await self._get_category_matcher(userID)
+        categoryData = [dict(x, categoryConditions=list(x["categoryConditions"])) for x in categoryMatcher.categorys]
 
-            categoryData.append({
-                "id": categoryID.id,
-                "categoryName": categoryID.categoryName,
-                "categoryConditions": [x.to_dict() for x in categoryConditionsCatalog]
-            })
+        if not withStats:
+            return categoryData
 
-        transactionsPull = await self._get_all_transactions_pull(userID=userID)
-        statsMap = self._calc_category_stats(
-            categorys=categoryData,
-            transactions=transactionsPull,
-            matchFields=["description", "description2", "code"],
-        )
+        # Один GROUP BY по сохраненной категории вместо загрузки и разметки всей истории
+        statsMap = await self._get_category_stats(userID)
 
         for c in categoryData:
             name = self._normalize_text(c.get("categoryName"))
@@ -319,7 +330,185 @@ class СategoryService(AbstractСategoryService):
 
         return categoryData
 
-    async def add_category(self, userID:int, addData: AddCategoryServiceSchema):
+    async def _load_category_rules(self, userID: int) -> List[Dict[str, Any]]:
+        # Каталог и все условия двумя запросами вместо запроса условий на каждую категорию
+        userCategoryCatalog = await self.categoryCatalogHandler.get_category(
+            (self.categoryCatalogHandler.dbt.userID == userID,),
+            orderBy=(self.categoryCatalogHandler.dbt.id,),
+            columns=("id", "categoryName"))
+
+        categoryConditions: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        if userCategoryCatalog:
+            categoryConditionsCatalog = await self.categoryConditionsHandler.get_category_conditions(
+                (self.categoryConditionsHandler.dbt.categoryID.in_([x["id"] for x in userCategoryCatalog]),),
+                orderBy=(self.categoryConditionsHandler.dbt.id,),
+                columns=self.categoryConditionsHandler.dbt.__table__.columns.keys())
+            for condition in categoryConditionsCatalog:
+                categoryConditions[condition["categoryID"]].append(condition)
+
+        return [{
+            "id": categoryItem["id"],
+            "categoryName": categoryItem["categoryName"],
+            "categoryConditions": categoryConditions[categoryItem["id"]],
+        } for categoryItem in userCategoryCatalog]
+
+    async def _get_category_matcher(self, userID: int) -> CategoryRulesMatcher:
+        categoryMatcher = self.categoryRulesCache.get(userID)
+        if categoryMatcher is None:
+            cacheVersion = self.categoryRulesCache.version(userID)
+            categoryMatcher = self._compile_category_rules(await self._load_category_rules(userID), ["description", "description2", "code"])
+            self.categoryRulesCache.put(userID, categoryMatcher, cacheVersion)
+        return categoryMatcher
+
+    async def get_category_resolver(self, userID: int) -> Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        # Скомпилированные правила берутся из кэша, дальше резолвер вызывается на каждую строку
+        categoryMatcher = await self._get_category_matcher(userID)
+
+        def resolve(transaction: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            categoryItem = categoryMatcher.match(transaction)
+            if categoryItem is None:
+                return None
+            return {"id": categoryItem.get("id"), "categoryName": self._normalize_text(categoryItem.get("categoryName"))}
+
+        return resolve
+
+    def _affected_transactions_filter(self, bankView, categoryIDs: List[int] | None, conditionValues: List[str] | None):
+        # Какие строки может задеть изменение правил:
+        #  - уже отнесенные к измененным категориям (могли потерять совпадение или имя),
+        #  - содержащие текст новых/измененных условий (могли получить совпадение).
+        # LIKE шире, чем проверка в CategoryRulesMatcher, поэтому точный пересчет делает резолвер.
+        if categoryIDs is None and conditionValues is None:
+            return None
+
+        affectedFilters = []
+        if categoryIDs:
+            affectedFilters.append(bankView.dbt.c.resolvedCategoryID.in_(categoryIDs))
+
+        for conditionValue in conditionValues or []:
+            needle = self._normalize_text(conditionValue)
+            if not needle:
+                continue
+            if "|" in needle:
+                # Условие может совпасть на стыке полей в склеенной строке - пересчитываем все
+                return None
+            pattern = "%" + needle.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            for fieldName in ("description", "description2", "code"):
+                affectedFilters.append(bankView.dbt.c[fieldName].like(pattern, escape="\\"))
+
+        return or_(*affectedFilters) if affectedFilters else false()
+
+    async def recategorize_transactions(
+        self,
+        userID: int,
+        categoryIDs: List[int] | None = None,
+        conditionValues: List[str] | None = None,
+        job: Dict[str, Any] | None = None,
+        unresolvedOnly: bool = False,
+    ) -> Dict[str, Any]:
+        # Пересчет сохраненной кастомной категории после изменения правил.
+        # categoryIDs/conditionValues не заданы - полный пересчет; unresolvedOnly - только строки без сохраненной категории
+        job = {} if job is None else job
+        async with self.recategorizeLocks[userID]:
+            job["status"] = "running"
+            categoryResolver = await self.get_category_resolver(userID)
+            bankView = self.bankRgistry.get_view_handler()
+
+            columnFilters = [bankView.dbt.c.userID == userID]
+            affectedFilter = self._affected_transactions_filter(bankView, categoryIDs, conditionValues)
+            if affectedFilter is not None:
+                columnFilters.append(affectedFilter)
+            if unresolvedOnly:
+                columnFilters.append(bankView.dbt.c.resolvedCategoryID.is_(None))
+            transactionsPull = await bankView.get_data(columnFilters, orderBy=(bankView.dbt.c.slug, bankView.dbt.c.id),
+                                                       columns=self.recategorizeColumns)
+
+            job.update({"total": len(transactionsPull), "processed": 0, "updated": 0})
+            for i in range(0, len(transactionsPull), self.recategorizeChunkSize):
+                changedGroups: Dict[tuple, List[int]] = defaultdict(list)
+                for tx in transactionsPull[i:i + self.recategorizeChunkSize]:
+                    categoryItem = categoryResolver(tx)
+                    resolvedID = None if categoryItem is None else categoryItem.get("id")
+                    resolvedName = None if categoryItem is None else categoryItem.get("categoryName")
+                    if (tx.get("resolvedCategoryID"), tx.get("resolvedCategory")) != (resolvedID, resolvedName):
+                        changedGroups[(tx.get("slug"), resolvedID, resolvedName)].append(tx.get("id"))
+
+                for (slug, resolvedID, resolvedName), transactionIDs in changedGroups.items():
+                    bankHandler = self.bankRgistry.get_handler(slug)
+                    job["updated"] += await bankHandler.update_resolved_category(
+                        (bankHandler.dbt.id.in_(transactionIDs),), resolvedID, resolvedName)
+
+                job["processed"] += len(transactionsPull[i:i + self.recategorizeChunkSize])
+
+            job["status"] = "done"
+        return job
+
+    async def backfill_resolved_categories(self) -> int:
+        # Бэкфилл сохраненной категории: строки, загруженные до появления resolvedCategoryID, и строки, которые
+        # не досчитал прошлый запуск. Смотрятся только строки без категории у пользователей с кастомными категориями;
+        # строки без совпадения остаются NULL и просто проверяются заново при следующем запуске
+        updatedRows = 0
+        try:
+            categoryUsers = await self.categoryCatalogHandler.get_category((), columns=("userID",))
+            for userID in sorted({x["userID"] for x in categoryUsers}):
+                job = await self.recategorize_transactions(userID, unresolvedOnly=True)
+                updatedRows += job["updated"]
+        except SQLAlchemyError:
+            # База еще не мигрирована init_models - досчитывать нечего, остаток досчитается при следующем старте
+            pass
+        return updatedRows
+
+    def schedule_resolved_categories_backfill(self):
+        # Бэкфилл идет в фоне после старта приложения: держим ссылку на task, чтобы его не собрал GC
+        self.backfillTask = asyncio.create_task(self.backfill_resolved_categories())
+
+    async def stop_resolved_categories_backfill(self):
+        # Недосчитанные строки остаются NULL и подхватываются при следующем старте
+        if self.backfillTask is not None and not self.backfillTask.done():
+            self.backfillTask.cancel()
+            try:
+                await self.backfillTask
+            except asyncio.CancelledError:
+                pass
+        self.backfillTask = None
+
+    async def _run_recategorization_job(self, job: Dict[str, Any], categoryIDs: List[int] | None, conditionValues: List[str] | None):
+        try:
+            await self.recategorize_transactions(job["userID"], categoryIDs, conditionValues, job=job)
+        except Exception as e:
+            job.update({"status": "failed", "error": str(e)})
+
+    async def start_recategorization(
+        self,
+        userID: int,
+        backgroundTasks: BackgroundTasks | None = None,
+        categoryIDs: List[int] | None = None,
+        conditionValues: List[str] | None = None,
+    ) -> Dict[str, Any]:
+        job = {"jobID": uuid.uuid4().hex, "userID": userID, "status": "queued",
+               "total": None, "processed": 0, "updated": 0, "error": None}
+
+        # Храним только последние задачи, старые завершенные вытесняются
+        while len(self.recategorizeJobs) >= self.recategorizeJobsLimit:
+            self.recategorizeJobs.pop(next(iter(self.recategorizeJobs)))
+        self.recategorizeJobs[job["jobID"]] = job
+
+        if backgroundTasks is None:
+            await self._run_recategorization_job(job, categoryIDs, conditionValues)
+        else:
+            backgroundTasks.add_task(self._run_recategorization_job, job, categoryIDs, conditionValues)
+        return job
+
+    async def get_recategorization_jobs(self, userID: int, jobID: str | None = None):
+        if jobID is None:
+            return [job for job in self.recategorizeJobs.values() if job["userID"] == userID]
+
+        job = self.recategorizeJobs.get(jobID)
+        if job is None or job["userID"] != userID:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                                detail=f"Recategorization job {jobID} not found for user {userID}.")
+        return job
+
+    async def add_category(self, userID:int, addData: AddCategoryServiceSchema, backgroundTasks: BackgroundTasks | None = None):
         newCategory = await self.categoryCatalogHandler.add_category(AddCategoryCatalogSchema(userID=userID, categoryName=addData.categoryName))
         newCategory = newCategory[0]
         newCategory.update({"conditionsValues": []})
@@ -332,9 +521,13 @@ class СategoryService(AbstractСategoryService):
 
             newCategory.get("conditionsValues").append(newCategoryConditions[0])
 
+        self.categoryRulesCache.invalidate(userID)
+        recategorizeJob = await self.start_recategorization(
+            userID, backgroundTasks, categoryIDs=[], conditionValues=[x.conditionValue for x in addData.conditionValues])
+        newCategory.update({"recategorizeJobID": recategorizeJob["jobID"]})
         return newCategory
         
-    async def delete_category(self, userID: int, categoryID: int):
+    async def delete_category(self, userID: int, categoryID: int, backgroundTasks: BackgroundTasks | None = None):
         # Это что бизнес логика? лол
         await self.__error_if_category_not_found(userID, categoryID)
 
@@ -351,9 +544,12 @@ class СategoryService(AbstractСategoryService):
             deletedConditions = await self.categoryConditionsHandler.delete_category_conditions(condition.id)
             conditionsData.append({"id":condition.id,"status":deletedConditions})
 
-        return {"deleteCategoryID":categoryID, "deleteCategoryStatus":deleteCategory, "deleteCategoryCondtitions":conditionsData}
+        self.categoryRulesCache.invalidate(userID)
+        recategorizeJob = await self.start_recategorization(userID, backgroundTasks, categoryIDs=[categoryID], conditionValues=[])
+        return {"deleteCategoryID":categoryID, "deleteCategoryStatus":deleteCategory, "deleteCategoryCondtitions":conditionsData,
+                "recategorizeJobID":recategorizeJob["jobID"]}
 
-    async def update_category(self, userID: int, categoryID: int, updateData: UpdateDataServiceSchema):
+    async def update_category(self, userID: int, categoryID: int, updateData: UpdateDataServiceSchema, backgroundTasks: BackgroundTasks | None = None):
         await self.__error_if_category_not_found(userID, categoryID)
 
         if updateData.categoryName is not None:
@@ -371,9 +567,15 @@ class СategoryService(AbstractСategoryService):
                 ))
                 conditionUpdateData.append(updatedConditions)
 
-        return {"updatedCategoryID":categoryID, "updatedCategoryCondtitions":conditionUpdateData}
+        self.categoryRulesCache.invalidate(userID)
+        # Старые значения условий покрываются строками, уже отнесенными к этой категории
+        recategorizeJob = await self.start_recategorization(
+            userID, backgroundTasks, categoryIDs=[categoryID],
+            conditionValues=[x.conditionValue for x in updateData.conditionValues or []])
+        return {"updatedCategoryID":categoryID, "updatedCategoryCondtitions":conditionUpdateData,
+                "recategorizeJobID":recategorizeJob["jobID"]}
 
-    async def add_category_condition(self, userID: int, addContitionData:AddCategoryConditionsSchema):
+    async def add_category_condition(self, userID: int, addContitionData:AddCategoryConditionsSchema, backgroundTasks: BackgroundTasks | None = None):
         await self.__error_if_category_not_found(userID, addContitionData.categoryID)
 
         newCategoryConditions = await self.categoryConditionsHandler.add_category_conditions(AddCategoryConditionsSchema(
@@ -381,14 +583,19 @@ class СategoryService(AbstractСategoryService):
             conditionValue=addContitionData.conditionValue, 
             isExact=addContitionData.isExact,))
         
-        return newCategoryConditions
+        self.categoryRulesCache.invalidate(userID)
+        recategorizeJob = await self.start_recategorization(
+            userID, backgroundTasks, categoryIDs=[], conditionValues=[addContitionData.conditionValue])
+        newCategoryCondition = newCategoryConditions[0]
+        newCategoryCondition.update({"recategorizeJobID": recategorizeJob["jobID"]})
+        return newCategoryCondition
     
-    async def delete_category_condition(self, userID: int, categoryID:int, deleteContitionData:DeleteCategoryConditionsSchema):
+    async def delete_category_condition(self, userID: int, categoryID:int, deleteContitionData:DeleteCategoryConditionsSchema, backgroundTasks: BackgroundTasks | None = None):
         await self.__error_if_category_not_found(userID, categoryID)
 
-        async with self.categoryConditionsHandler.dbHandler.Session() as sess:
-            stmt = sa_delete(self.categoryConditionsHandler.dbt)
-            stmt = stmt.where(self.categoryConditionsHandler.dbt.id == deleteContitionData.conditionID)
-            result = await sess.execute(stmt)
-            await sess.commit()
-            return {"status": result.rowcount or 0}
+        deletedRows = await self.categoryConditionsHandler.dbHandler.delete_data(
+            self.categoryConditionsHandler.dbt, (self.categoryConditionsHandler.dbt.id == deleteContitionData.conditionID,))
+
+        self.categoryRulesCache.invalidate(userID)
+        recategorizeJob = await self.start_recategorization(userID, backgroundTasks, categoryIDs=[categoryID], conditionValues=[])
+        return {"status": deletedRows, "recategorizeJobID": recategorizeJob["jobID"]}
@@ -1,15 +1,28 @@
 import os
-from typing import Type, Any
+import shutil
+import asyncio
+import hashlib
+import zipfile
+import tempfile
+from contextlib import aclosing
+from typing import Type, Any, Tuple, List, Dict, AsyncIterator
 from abc import ABC, abstractmethod
-from fastapi import File, UploadFile, HTTPException, status
+from fastapi import File, UploadFile, HTTPException, status, BackgroundTasks
 from collections import Counter
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
 
-from .schema import CreateServiceBankTransactions, SearchParametrs
+from .schema import CreateServiceBankTransactions, SearchParametrs, PageParametrs
 from ..users.schama import AuthUser
 from ...handlers.logers.loger_handlers import LogerHandler
 from ...handlers.bank_files.schema import TinkoffHandlerUpdateData,AlfaHandlerUpdateData, CreateHandlerBankTransactions, CashHandlerUpdateData,DeleteTransactionSchema
 from ...handlers.bank_files.bank_registry import BankHandlerRegistry
 from ...handlers.bank_files.bank_load_handlers import AbstractBankFileHandler
+from ...handlers.bank_files.frame_spool import FrameSpool
+from ...handlers.bank_files.uploaded_files_handler import AbstractUploadedFilesHandler
+from ...handlers.bank_files.upload_jobs_handler import AbstractUploadJobsHandler
+from ...handlers.db.keyset_pagination import KeysetPaginator
+from ..category.category import AbstractСategoryService
 
 
 
@@ -22,6 +35,10 @@ class AbstractBankService(ABC):
     @abstractmethod
     def get_bank_transactions(self):
         pass
+
+    @abstractmethod
+    def stream_bank_transactions(self, authUser:AuthUser, slug:str, getFiletr:SearchParametrs):
+        pass
     
     @abstractmethod
     def create_bank_transactions(self):
@@ -31,6 +48,18 @@ class AbstractBankService(ABC):
     def create_bank_transactions_by_load_file(self):
         pass
 
+    @abstractmethod
+    def create_bank_transactions_by_load_files(self, authUser:AuthUser, files:List[UploadFile]):
+        pass
+
+    @abstractmethod
+    def get_upload_jobs(self, authUser:AuthUser, jobID:str | None = None):
+        pass
+
+    @abstractmethod
+    def requeue_upload_jobs(self):
+        pass
+
     @abstractmethod
     def get_loaded_files_catalog(self, authUser:AuthUser, slugs:str):
         pass
@@ -44,20 +73,37 @@ class AbstractBankService(ABC):
         pass
 
 class BankService(AbstractBankService):
-    def __init__(self, logerHandler, bankHandlerRegisry):
+    uploadChunkSize: int = 1024 * 1024
+    # Поля задачи, которые видит клиент (путь к временному файлу и хэш - внутренние)
+    uploadJobFields: Tuple[str, ...] = ("slug", "fileName", "status", "rowsParsed", "rowsInserted", "duplicatesSkipped",
+                                        "alreadyLoaded", "error", "createdAt", "updatedAt")
+    # Лимит файлов в пакетной загрузке, включая файлы внутри zip-архивов
+    uploadBatchMaxFiles: int = 100
+    # Страница транзакций, если клиент прислал только cursor
+    transactionsPageSize: int = 100
+
+    def __init__(self, logerHandler, bankHandlerRegisry, categoryService, uploadedFilesHandler, uploadJobsHandler,
+                 uploadMaxSize:int = 50 * 1024 * 1024, uploadJobsConcurrency:int = 2):
         super().__init__(logerHandler)
         self.bankHandlerRegisry:BankHandlerRegistry = bankHandlerRegisry
+        self.categoryService:AbstractСategoryService = categoryService
+        self.uploadedFilesHandler:AbstractUploadedFilesHandler = uploadedFilesHandler
+        self.uploadJobsHandler:AbstractUploadJobsHandler = uploadJobsHandler
+        self.uploadMaxSize:int = uploadMaxSize
+        self.uploadJobsConcurrency:int = uploadJobsConcurrency
+        self.uploadJobsSlots:asyncio.Semaphore | None = None
+        self.uploadJobsTasks:set = set()
 
 
     async def _is_transaction_exist(self,bankHandler:AbstractBankFileHandler,transactionID:int):
-        getTrans = await bankHandler.get_data((bankHandler.dbt.id == transactionID,))
+        getTrans = await bankHandler.get_data((bankHandler.dbt.id == transactionID,), columns=("id",))
         if getTrans.__len__():
             return True
         return False
     
     async def _is_user_transaction_exist(self,bankHandler:AbstractBankFileHandler, transactionID:int, userID):
-        getTrans = await bankHandler.get_data((bankHandler.dbt.id == transactionID,))
-        if (getTrans[0].to_dict().get('userID') == userID):
+        getTrans = await bankHandler.get_data((bankHandler.dbt.id == transactionID,), columns=("userID",))
+        if (getTrans[0].get('userID') == userID):
             return True
         return False
 
@@ -99,11 +145,31 @@ class BankService(AbstractBankService):
 
         return filterPull
  
-    async def get_bank_transactions(self, authUser:AuthUser, slug:str, getFiletr:SearchParametrs):
+    async def get_bank_transactions(self, authUser:AuthUser, slug:str, getFiletr:SearchParametrs, pageParametrs:PageParametrs | None = None):
         bankHandler = self.bankHandlerRegisry.get_handler(slug)
         getfilter = self._get_sarch_filetr(authUser, bankHandler, getFiletr)
-        gotData = await bankHandler.get_data(getfilter)
-        return gotData
+        if pageParametrs is None or (pageParametrs.pageSize is None and pageParametrs.cursor is None):
+            gotData = await bankHandler.get_data(getfilter, orderBy=(bankHandler.dbt.id,), columns=bankHandler.client_columns())
+            return gotData
+
+        # Постранично: новые операции первыми, следующая страница - строки после ключа из курсора
+        table = bankHandler.dbt.__table__
+        paginator = KeysetPaginator((table.c.operationDate, table.c.id))
+        pageSize = pageParametrs.pageSize or self.transactionsPageSize
+        gotData = await bankHandler.get_data(
+            (*getfilter, *paginator.after_filter(pageParametrs.cursor)),
+            orderBy=paginator.order_by(),
+            columns=bankHandler.client_columns(),
+            limit=pageSize + 1,
+        )
+        pageData, nextCursor = paginator.page(gotData, pageSize)
+        return {"data": pageData, "nextCursor": nextCursor}
+
+    async def stream_bank_transactions(self, authUser:AuthUser, slug:str, getFiletr:SearchParametrs) -> AsyncIterator[Dict[str, Any]]:
+        # Вся выборка строками из курсора, без списка в памяти. Банк и фильтр проверяются до начала ответа
+        bankHandler = self.bankHandlerRegisry.get_handler(slug)
+        getfilter = self._get_sarch_filetr(authUser, bankHandler, getFiletr)
+        return bankHandler.stream_data(getfilter, orderBy=(bankHandler.dbt.id,), columns=bankHandler.client_columns())
     
     async def create_bank_transactions(self, authUser:AuthUser, slug:str, addData:CreateServiceBankTransactions):
         bankHandler = self.bankHandlerRegisry.get_handler(slug)
@@ -112,36 +178,266 @@ class BankService(AbstractBankService):
                                       currencyAmount=addData.currencyAmount,
                                       description=addData.description,
                                       operationDate=addData.operationDate)
-        insertingData = await bankHandler.insert_data(addTransactionData)
+        categoryResolver = await self.categoryService.get_category_resolver(authUser.get('id'))
+        insertingData = await bankHandler.insert_data(addTransactionData, categoryResolver=categoryResolver)
         return {"loaded rows":insertingData.__len__()}
 
-    async def save_uploaded_file(self, file: UploadFile, slug:str) -> str:
-        # Write file
-        safeFilename, fileExtension = os.path.splitext(file.filename)  # .pdf, .xlsx ...
-        # safeFilename = f"{uuid.uuid4().hex}{fileExtension}"
-        handlerConstantConfig = self.bankHandlerRegisry.get_const(slug).fileStorageDir
-        filePath = os.path.join(handlerConstantConfig, safeFilename)
+    async def save_uploaded_file(self, file: UploadFile, slug:str | None) -> Tuple[str, str]:
+        # Файл пишется кусками во временный файл с уникальным именем: в памяти не больше uploadChunkSize,
+        # имя от клиента в путь не попадает. При любой ошибке временный файл удаляется.
+        # SHA-256 содержимого считается по тем же кускам. slug None - банк еще не известен (пакетная загрузка),
+        # файл ложится во временный каталог системы
+        _, fileExtension = os.path.splitext(os.path.basename(file.filename or ""))
+        handlerConstantConfig = self.bankHandlerRegisry.get_const(slug).fileStorageDir if slug is not None else None
+        fileDescriptor, filePath = tempfile.mkstemp(prefix="upload_", suffix=fileExtension, dir=handlerConstantConfig)
 
-        with open(filePath, "wb") as f:
-            content = await file.read()
-            f.write(content)
+        try:
+            fileSize = 0
+            fileHash = hashlib.sha256()
+            with os.fdopen(fileDescriptor, "wb") as f:
+                while chunk := await file.read(self.uploadChunkSize):
+                    fileSize += len(chunk)
+                    if fileSize > self.uploadMaxSize:
+                        raise HTTPException(status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+                                            detail=f"File is larger than {self.uploadMaxSize} bytes")
+                    fileHash.update(chunk)
+                    f.write(chunk)
+        except BaseException:
+            os.remove(filePath)
+            raise
 
-        return handlerConstantConfig, safeFilename
+        return filePath, fileHash.hexdigest()
 
-    async def create_bank_transactions_by_load_file(self, authUser:AuthUser, slug:str, file: UploadFile) -> dict:
-        handlerConstantConfig, safeFilename = await self.save_uploaded_file(file,slug)
+    def _upload_job_response(self, job:dict) -> dict:
+        return {"jobID": job["id"], **{name: job.get(name) for name in self.uploadJobFields}}
+
+    def _get_upload_jobs_slots(self) -> asyncio.Semaphore:
+        # Не больше uploadJobsConcurrency разборов одновременно, остальные задачи ждут в статусе queued
+        if self.uploadJobsSlots is None:
+            self.uploadJobsSlots = asyncio.Semaphore(self.uploadJobsConcurrency)
+        return self.uploadJobsSlots
+
+    async def _run_upload_job(self, jobID:str):
+        async with self._get_upload_jobs_slots():
+            job = (await self.uploadJobsHandler.get_jobs((self.uploadJobsHandler.dbt.id == jobID,)))[0]
+            try:
+                await self.uploadJobsHandler.update_job(jobID, {"status": "running"})
+
+                # Этот файл уже загружали - без разбора
+                if await self.uploadedFilesHandler.get_file(job["userID"], job["slug"], job["fileHash"]) is not None:
+                    await self.uploadJobsHandler.update_job(jobID, {"status": "done", "rowsParsed": 0, "rowsInserted": 0,
+                                                                    "duplicatesSkipped": 0, "alreadyLoaded": True})
+                    return
+
+                bankHandler = self.bankHandlerRegisry.get_handler(job["slug"])
+                categoryResolver = await self.categoryService.get_category_resolver(job["userID"])
+
+                # Файл приходит одним или несколькими кусками (потоковое чтение больших выгрузок). Куски готовятся к вставке
+                # по мере разбора и копятся в буфере, а вставляются после разбора одной транзакцией - файл целиком или ничего.
+                # Строки, которые уже есть в базе (пересекающиеся периоды), отсекаются по отпечатку
+                rowsParsed, seenRowKeys = 0, Counter()
+                with FrameSpool() as insertFrames:
+                    async with aclosing(bankHandler.iter_file_chunks(job["filePath"], job["fileHash"])) as parsedChunks:
+                        async for parsedFrame in parsedChunks:
+                            rowsParsed += len(parsedFrame)
+                            await self.uploadJobsHandler.update_job(jobID, {"rowsParsed": rowsParsed})
+                            insertFrames.append(bankHandler.prepare_insert_frame(job["userID"], parsedFrame, job["fileName"],
+                                                                                 categoryResolver, seenRowKeys))
+                    rowsInserted = len(await bankHandler.insert_frames(insertFrames))
+
+                await self.uploadedFilesHandler.add_file(job["userID"], job["slug"], job["fileHash"], job["fileName"], rowsInserted)
+                await self.uploadJobsHandler.update_job(jobID, {"status": "done", "rowsInserted": rowsInserted,
+                                                                "duplicatesSkipped": rowsParsed - rowsInserted,
+                                                                "alreadyLoaded": False})
+            except Exception as e:
+                await self.uploadJobsHandler.update_job(jobID, {"status": "failed", "error": str(e) or type(e).__name__})
+            finally:
+                if os.path.exists(job["filePath"]):
+                    os.remove(job["filePath"])
+
+    def _schedule_upload_job(self, jobID:str):
+        # Задача вне запроса (перезапуск после рестарта): держим ссылку, чтобы task не собрал GC
+        task = asyncio.create_task(self._run_upload_job(jobID))
+        self.uploadJobsTasks.add(task)
+        task.add_done_callback(self.uploadJobsTasks.discard)
+
+    async def create_bank_transactions_by_load_file(self, authUser:AuthUser, slug:str, file: UploadFile, backgroundTasks: BackgroundTasks | None = None) -> dict:
+        # Файл сохраняется и ставится в очередь, ответ - id задачи; разбор и вставка идут в фоне
+        self.bankHandlerRegisry.get_handler(slug)
+        safeFilename, _ = os.path.splitext(os.path.basename(file.filename or ""))
+        filePath, fileHash = await self.save_uploaded_file(file, slug)
+        try:
+            job = await self.uploadJobsHandler.add_job(authUser.get("id"), slug, safeFilename, filePath, fileHash)
+        except BaseException:
+            os.remove(filePath)
+            raise
+
+        if backgroundTasks is None:
+            await self._run_upload_job(job["id"])
+            return await self.get_upload_jobs(authUser, job["id"])
+        backgroundTasks.add_task(self._run_upload_job, job["id"])
+        return self._upload_job_response(job)
+
+    def _extract_archive(self, archivePath:str) -> List[Tuple[str, str, str]]:
+        # Файлы архива распаковываются по одному во временные файлы с тем же лимитом размера, что и у загрузки.
+        # Размер считается по распакованным байтам, а не по заголовку zip
+        extractedFiles = []
+        try:
+            with zipfile.ZipFile(archivePath) as zf:
+                members = [x for x in zf.infolist() if not x.is_dir() and not x.filename.startswith("__MACOSX/")
+                           and not os.path.basename(x.filename).startswith(".")]
+                if len(members) > self.uploadBatchMaxFiles:
+                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                        detail=f"Archive contains more than {self.uploadBatchMaxFiles} files")
+                for member in members:
+                    _, fileExtension = os.path.splitext(os.path.basename(member.filename))
+                    fileDescriptor, filePath = tempfile.mkstemp(prefix="upload_", suffix=fileExtension)
+                    extractedFiles.append((member.filename, filePath, None))
+
+                    fileSize = 0
+                    fileHash = hashlib.sha256()
+                    with os.fdopen(fileDescriptor, "wb") as f, zf.open(member) as memberFile:
+                        while chunk := memberFile.read(self.uploadChunkSize):
+                            fileSize += len(chunk)
+                            if fileSize > self.uploadMaxSize:
+                                raise HTTPException(status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+                                                    detail=f"File {member.filename} is larger than {self.uploadMaxSize} bytes")
+                            fileHash.update(chunk)
+                            f.write(chunk)
+                    extractedFiles[-1] = (member.filename, filePath, fileHash.hexdigest())
+        except BaseException:
+            for _, filePath, _ in extractedFiles:
+                os.remove(filePath)
+            raise
+        return extractedFiles
+
+    def _sniff_batch_file(self, fileName:str, filePath:str, fileHash:str) -> List[Dict[str, Any]]:
+        # Банк определяется по содержимому; zip, который не xlsx, считается архивом выписок (без вложенных архивов)
+        slug = self.bankHandlerRegisry.detect_slug(filePath)
+        if slug is not None:
+            return [{"file": fileName, "filePath": filePath, "fileHash": fileHash, "slug": slug, "error": None}]
+
+        batchFiles = []
+        if zipfile.is_zipfile(filePath):
+            try:
+                for memberName, memberPath, memberHash in self._extract_archive(filePath):
+                    memberSlug = self.bankHandlerRegisry.detect_slug(memberPath)
+                    batchFiles.append({"file": memberName, "filePath": memberPath, "fileHash": memberHash, "slug": memberSlug,
+                                       "error": None if memberSlug is not None else "Unsupported statement format"})
+            except HTTPException as e:
+                batchFiles.append({"file": fileName, "filePath": None, "fileHash": None, "slug": None, "error": e.detail})
+            except zipfile.BadZipFile as e:
+                batchFiles.append({"file": fileName, "filePath": None, "fileHash": None, "slug": None, "error": f"Broken archive: {e}"})
+        else:
+            batchFiles.append({"file": fileName, "filePath": None, "fileHash": None, "slug": None, "error": "Unsupported statement format"})
 
-        bankHandler = self.bankHandlerRegisry.get_handler(slug)
-        filePath = os.sep.join([handlerConstantConfig,safeFilename])
-        insertedFileResponse = await bankHandler.insert_file(filePath=filePath, userID=authUser.get("id"))
         os.remove(filePath)
-        return {"file":safeFilename,"loaded rows":insertedFileResponse.__len__()}
+        return [x if x["slug"] is not None else self._drop_batch_file(x) for x in batchFiles]
+
+    @staticmethod
+    def _drop_batch_file(batchFile:Dict[str, Any]) -> Dict[str, Any]:
+        if batchFile["filePath"] is not None and os.path.exists(batchFile["filePath"]):
+            os.remove(batchFile["filePath"])
+        return {**batchFile, "filePath": None}
+
+    def _move_to_storage(self, filePath:str, slug:str) -> str:
+        # Файл с определенным банком переезжает в каталог банка, как при обычной загрузке
+        _, fileExtension = os.path.splitext(filePath)
+        fileDescriptor, storagePath = tempfile.mkstemp(prefix="upload_", suffix=fileExtension,
+                                                       dir=self.bankHandlerRegisry.get_const(slug).fileStorageDir)
+        os.close(fileDescriptor)
+        shutil.move(filePath, storagePath)
+        return storagePath
+
+    async def create_bank_transactions_by_load_files(self, authUser:AuthUser, files:List[UploadFile]) -> dict:
+        # Пакетная загрузка: несколько выписок и/или zip-архивы с ними. Каждый файл - отдельная задача загрузки,
+        # задачи идут параллельно (не больше uploadJobsConcurrency разборов в пуле), вставка - одна транзакция на файл.
+        # Ответ - итог по каждому файлу
+        if len(files) > self.uploadBatchMaxFiles:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"More than {self.uploadBatchMaxFiles} files in one upload")
+
+        batchFiles = []
+        for file in files:
+            fileName = os.path.basename(file.filename or "")
+            try:
+                filePath, fileHash = await self.save_uploaded_file(file, None)
+            except HTTPException as e:
+                batchFiles.append({"file": fileName, "filePath": None, "fileHash": None, "slug": None, "error": e.detail})
+                continue
+            batchFiles.extend(await asyncio.to_thread(self._sniff_batch_file, fileName, filePath, fileHash))
+
+        try:
+            for batchFile in batchFiles:
+                if batchFile["slug"] is None:
+                    continue
+                batchFile["filePath"] = await asyncio.to_thread(self._move_to_storage, batchFile["filePath"], batchFile["slug"])
+                safeFilename, _ = os.path.splitext(os.path.basename(batchFile["file"]))
+                batchFile["job"] = await self.uploadJobsHandler.add_job(
+                    authUser.get("id"), batchFile["slug"], safeFilename, batchFile["filePath"], batchFile["fileHash"])
+        except BaseException:
+            for batchFile in batchFiles:
+                if "job" not in batchFile:
+                    self._drop_batch_file(batchFile)
+            raise
+
+        jobIDs = [x["job"]["id"] for x in batchFiles if "job" in x]
+        await asyncio.gather(*(self._run_upload_job(x) for x in jobIDs))
+
+        dbt = self.uploadJobsHandler.dbt
+        gotJobs = {x["id"]: x for x in await self.uploadJobsHandler.get_jobs((dbt.id.in_(jobIDs),))} if jobIDs else {}
+
+        filesSummary = []
+        for batchFile in batchFiles:
+            if "job" in batchFile:
+                filesSummary.append({"file": batchFile["file"], **self._upload_job_response(gotJobs[batchFile["job"]["id"]])})
+            else:
+                filesSummary.append({"file": batchFile["file"], "jobID": None, **{name: None for name in self.uploadJobFields},
+                                     "status": "failed", "error": batchFile["error"]})
+        return {"status": True, "data": filesSummary}
+
+    async def get_upload_jobs(self, authUser:AuthUser, jobID:str | None = None):
+        dbt = self.uploadJobsHandler.dbt
+        if jobID is None:
+            gotJobs = await self.uploadJobsHandler.get_jobs((dbt.userID == authUser.get("id"),), orderBy=(dbt.createdAt.desc(),))
+            return [self._upload_job_response(x) for x in gotJobs]
+
+        gotJobs = await self.uploadJobsHandler.get_jobs((dbt.id == jobID, dbt.userID == authUser.get("id")))
+        if not gotJobs:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Upload job {jobID} not found")
+        return self._upload_job_response(gotJobs[0])
+
+    async def requeue_upload_jobs(self) -> int:
+        # После рестарта незавершенные задачи запускаются заново: временный файл еще на диске,
+        # а уже вставленные строки повторно не попадут благодаря отпечаткам
+        dbt = self.uploadJobsHandler.dbt
+        try:
+            unfinishedJobs = await self.uploadJobsHandler.get_jobs((dbt.status.in_(("queued", "running")),), orderBy=(dbt.createdAt,))
+        except SQLAlchemyError:
+            # Таблицы задач еще нет (база не мигрирована init_models) - перезапускать нечего
+            return 0
+
+        for job in unfinishedJobs:
+            if os.path.exists(job["filePath"]):
+                await self.uploadJobsHandler.update_job(job["id"], {"status": "queued"})
+                self._schedule_upload_job(job["id"])
+            else:
+                await self.uploadJobsHandler.update_job(job["id"], {"status": "failed", "error": "Uploaded file is missing after restart"})
+        return len(unfinishedJobs)
 
     async def update_bank_transactions(self, authUser:AuthUser, transactionID:int, slug:str, updateData:TinkoffHandlerUpdateData|AlfaHandlerUpdateData|CashHandlerUpdateData):
         bankHandler = self.bankHandlerRegisry.get_handler(slug)
         await self._raise_transaction(bankHandler=bankHandler, userID=authUser.get('id'), transactionID=transactionID)
 
         updatedData = await bankHandler.update_data(transactionID, updateData)
+
+        # Описание могло поменяться: пересчитываем сохраненную кастомную категорию строки
+        categoryResolver = await self.categoryService.get_category_resolver(authUser.get('id'))
+        resolvedValues = bankHandler._resolved_category_values(
+            categoryResolver, **{k: getattr(updatedData, k, None) for k in ("description", "description2", "code")})
+        await bankHandler.update_resolved_category((bankHandler.dbt.id == transactionID,),
+                                                   resolvedValues["resolvedCategoryID"], resolvedValues["resolvedCategory"])
+        for k, v in resolvedValues.items():
+            setattr(updatedData, k, v)
         return updatedData
 
     async def delete_bank_transactions(self, authUser:AuthUser, slug:str, transactionID:int):
@@ -151,28 +447,20 @@ class BankService(AbstractBankService):
         deleteData = await bankHandler.delete_data(DeleteTransactionSchema(transactionID=transactionID))
         return {"msg":"Transaction deleted successfully","status":deleteData}
 
-    @staticmethod
-    def _build_files_stats_response(rowsList: list[Any]) -> dict:
-        counter = {}
-
-        for transaction in rowsList:
-            if transaction.fileName not in counter and not (transaction.fileName is None):
-               counter.update({transaction.fileName:1})
-            if transaction.fileName in counter and not (transaction.fileName is None): 
-               counter[transaction.fileName] += 1
+    async def get_loaded_files_catalog(self, authUser:AuthUser, slugs:str):
+        slugList = slugs.split(",")
+        self.bankHandlerRegisry.error_if_slugs_does_not_registered(slugList)
 
-        return counter
+        bankView = self.bankHandlerRegisry.get_view_handler()
+        filesStats = await bankView.get_aggregated_data(
+            aggregations={"rows": func.count(bankView.dbt.c.id), "firstID": func.min(bankView.dbt.c.id)},
+            columnFilters=(bankView.dbt.c.userID == authUser.get('id'),
+                           bankView.dbt.c.slug.in_(slugList),
+                           bankView.dbt.c.fileName.is_not(None)),
+            groupBy={"slug": bankView.dbt.c.slug, "fileName": bankView.dbt.c.fileName},
+        )
+        filesStats = sorted(filesStats, key=lambda x: (slugList.index(x["slug"]), x["firstID"]))
 
-    async def get_loaded_files_catalog(self, authUser:AuthUser, slugs:str):
-        
-        filesPull = []
-        for slug in slugs.split(","): 
-            bankHandler = self.bankHandlerRegisry.get_handler(slug)
-            
-            getfilter = (bankHandler.dbt.userID == authUser.get('id'),)
-            gotData = await bankHandler.get_data(getfilter)
-            filesPull.append(self._build_files_stats_response(gotData))
-
-        loadedFiles = [{"fileName":k, "rows":y} for x in filesPull for k,y in x.items()]
+        loadedFiles = [{"fileName":x["fileName"], "rows":x["rows"]} for x in filesStats]
 
         return {"status":True, "data":loadedFiles}
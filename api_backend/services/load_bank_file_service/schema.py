@@ -28,4 +28,8 @@ class SearchParametrs(BaseTools):
     ge_currencyAmount: float | None = Field(default=None, description='операция на сумму больше чем указаное хчисло')
     le_currencyAmount: float | None = Field(default=None, description='операция на сумму меньше чем указаное хчисло')
 
+class PageParametrs(BaseTools):
+    pageSize: int | None = Field(default=None, ge=1, le=500, description='Размер страницы. Без pageSize и cursor - все строки одним ответом')
+    cursor: str | None = Field(default=None, description='nextCursor из предыдущей страницы')
+
     
\ No newline at end of file
@@ -0,0 +1,18 @@
+import json
+from typing import Any, AsyncIterator, Dict
+from fastapi.encoders import jsonable_encoder
+
+ndjsonMediaType = "application/x-ndjson"
+
+
+async def iter_ndjson(rows: AsyncIterator[Dict[str, Any]], chunkRows: int = 500) -> AsyncIterator[str]:
+    # Одна строка JSON на запись; строки склеиваются по chunkRows, чтобы не слать ASGI-сообщение на каждую.
+    # Даты и прочее, что json не знает, кодируются как в обычных ответах FastAPI
+    lines = []
+    async for row in rows:
+        lines.append(json.dumps(row, ensure_ascii=False, default=jsonable_encoder))
+        if len(lines) >= chunkRows:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
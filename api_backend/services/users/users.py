@@ -52,11 +52,12 @@ class UserService(AbstractUserService):
             self.userHandler.dbt.userName == auth.userName,
             self.userHandler.dbt.password == auth.password,
         )
-        data = await self.userHandler.get_data(columnFilters = filter_)
+        # Проверяется на каждом запросе: колонки пользователя словарем, без ORM-объекта
+        data = await self.userHandler.get_data(columnFilters = filter_, columns=self.userHandler.dbt.__table__.columns.keys())
         dataLenth = data.__len__()
         
         if dataLenth == 1:
-            return [x.to_dict() for x in data][0]
+            return data[0]
         elif dataLenth > 1:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="INTERNAL SERVER ERROR. More then 1 users")
         elif dataLenth == 0:
@@ -12,7 +12,7 @@ from app.services.api_client import ApiClient
 from app.services.session_service import SessionService
 from app.widgets.bottom_nav_mixin import BottomNavMixin
 from app.widgets.donut_chart_widget import DonutChartWidget
-from app.services.schema import GetAnalyticsCashFlow, GetAnalyticsLastTransactions
+from app.services.schema import GetAnalyticsCashFlow, GetAnalyticsLastTransactions, GetAnalyticsBundle
 
 
 class AnalyticsScreen(BottomNavMixin, Screen):
@@ -147,29 +147,45 @@ class AnalyticsScreen(BottomNavMixin, Screen):
         userName = self._sessionService._sessionData.userName
         password = self._sessionService._sessionData.password
 
-        payload: dict[str, Any] = {}
-
-        payload["balance"] = self._apiClient.get_analytics_balans(userName, password)
-
-        payload["flow"] = self._apiClient.get_analytics_cash_flow(
+        # Один запрос вместо десяти: сервер размечает транзакции один раз на все секции
+        bundle = self._apiClient.get_analytics_bundle(
             userName,
             password,
-            GetAnalyticsCashFlow(period="month"),
+            GetAnalyticsBundle(
+                sections=",".join([
+                    "balance",
+                    "cash_flow",
+                    "expense_category_distribution",
+                    "income_category_distribution",
+                    "anomaly_transactions",
+                    "habits_cost",
+                    "user_financial_profile",
+                    "financial_health_score",
+                    "predict_next_month_expenses",
+                    "predict_category_expenses",
+                ]),
+                period="month",
+            ),
         )
 
-        payload["pie_expense"] = self._apiClient.get_analytics_expense_category_distribution(userName, password)
-        payload["pie_income"] = self._apiClient.get_analytics_income_category_distribution(userName, password)
+        payload: dict[str, Any] = {}
+
+        payload["balance"] = bundle.get("balance")
+        payload["flow"] = bundle.get("cash_flow")
+
+        payload["pie_expense"] = bundle.get("expense_category_distribution")
+        payload["pie_income"] = bundle.get("income_category_distribution")
 
-        payload["anomaly"] = self._apiClient.get_analytics_anomaly_transactions(userName, password)
+        payload["anomaly"] = bundle.get("anomaly_transactions")
 
-        payload["habit_cost"] = self._apiClient.get_analytics_habits_cost(userName, password)
+        payload["habit_cost"] = bundle.get("habits_cost")
 
-        payload["profile"] = self._apiClient.get_analytics_user_financial_profile(userName, password)
+        payload["profile"] = bundle.get("user_financial_profile")
 
-        payload["literacy"] = self._apiClient.get_analytics_financial_health_score(userName, password)
+        payload["literacy"] = bundle.get("financial_health_score")
 
-        payload["forecast"] = self._apiClient.get_analytics_predict_next_month_expenses(userName, password)
-        payload["forecast_by_category"] = self._apiClient.get_analytics_predict_category_expenses(userName, password)
+        payload["forecast"] = bundle.get("predict_next_month_expenses")
+        payload["forecast_by_category"] = bundle.get("predict_category_expenses")
 
         return payload
 
@@ -31,6 +31,8 @@ class TransactionsScreen(BottomNavMixin, Screen):
     rvData = ListProperty([])
 
     TRANSACTION_SLUGS = "alfa,tinkoff,cash"
+    # Транзакции приходят страницами (новые первыми), следующая грузится, когда видимые кончились
+    TRANSACTIONS_PAGE_SIZE = 50
 
     def __init__(self, apiClient: ApiClient, sessionService: SessionService, **kwargs) -> None:
         super().__init__(**kwargs)
@@ -39,6 +41,7 @@ class TransactionsScreen(BottomNavMixin, Screen):
 
         self._allTransactions: list[dict] = []
         self._filteredTransactions: list[dict] = []
+        self._nextCursor: Optional[str] = None
 
     def on_pre_enter(self, *args) -> None:
         super().on_pre_enter(*args)
@@ -122,6 +125,9 @@ class TransactionsScreen(BottomNavMixin, Screen):
             return
 
         self.visibleLimit += 15
+        if self.visibleLimit > len(self._filteredTransactions) and self._nextCursor is not None:
+            self._request_transactions_page(self._nextCursor)
+            return
         self._apply_filters_and_refresh()
 
     def on_upload_transactions_click(self) -> None:
@@ -139,24 +145,32 @@ class TransactionsScreen(BottomNavMixin, Screen):
             self.canLoadMore = False
             return
 
-        self.isLoading = True
         self.statusText = "Загрузка транзакций..."
         self.rvData = []
         self._allTransactions = []
         self._filteredTransactions = []
+        self._nextCursor = None
+
+        self._request_transactions_page(None)
+
+    def _request_transactions_page(self, cursor: Optional[str]) -> None:
+        self.isLoading = True
 
         userName = self._sessionService._sessionData.userName
         password = self._sessionService._sessionData.password
 
-        query = GetCategoryTransactionsQeury(slugs=self.TRANSACTION_SLUGS)
+        if cursor is None:
+            query = GetCategoryTransactionsQeury(slugs=self.TRANSACTION_SLUGS, pageSize=self.TRANSACTIONS_PAGE_SIZE)
+        else:
+            query = GetCategoryTransactionsQeury(slugs=self.TRANSACTION_SLUGS, pageSize=self.TRANSACTIONS_PAGE_SIZE, cursor=cursor)
 
         self._run_request_in_thread(
             request_func=lambda: self._apiClient.get_category_transactions(userName, password, query),
-            on_success=self._on_transactions_loaded,
+            on_success=lambda payload: self._on_transactions_loaded(payload, isNextPage=cursor is not None),
             on_error=self._handle_transactions_error,
         )
 
-    def _on_transactions_loaded(self, payload: Any) -> None:
+    def _on_transactions_loaded(self, payload: Any, isNextPage: bool = False) -> None:
         self.isLoading = False
 
         if not isinstance(payload, dict):
@@ -172,7 +186,11 @@ class TransactionsScreen(BottomNavMixin, Screen):
             self.canLoadMore = False
             return
 
-        self._allTransactions = self._normalize_api_transactions(data)
+        nextCursor = payload.get("nextCursor")
+        self._nextCursor = nextCursor if isinstance(nextCursor, str) else None
+
+        pageTransactions = self._normalize_api_transactions(data)
+        self._allTransactions = self._allTransactions + pageTransactions if isNextPage else pageTransactions
 
         if not self._allTransactions:
             self.statusText = "Нет транзакций"
@@ -250,7 +268,7 @@ class TransactionsScreen(BottomNavMixin, Screen):
         self._filteredTransactions = items
 
         visible = items[: int(self.visibleLimit)]
-        self.canLoadMore = len(items) > len(visible)
+        self.canLoadMore = len(items) > len(visible) or self._nextCursor is not None
 
         self.rvData = [self._map_to_rv_item(t) for t in visible]
 
@@ -20,6 +20,9 @@ from app.services.session_service import SessionService
 
 
 class TransactionsUploadScreen(Screen):
+    # Загрузка возвращает id задачи, дальше статус опрашивается с этим интервалом
+    uploadJobPollSeconds: float = 1.0
+
     recentFilesRvData = ListProperty([])
 
     statusText = StringProperty("")
@@ -232,20 +235,54 @@ class TransactionsUploadScreen(Screen):
         )
 
     def _on_upload_success(self, payload: Any) -> None:
+        if isinstance(payload, dict) and payload.get("jobID"):
+            self._on_upload_job_status(payload)
+            return
+
         self.isLoading = False
+        self.statusText = f"Успешно: {payload}" if isinstance(payload, dict) else "Успешно, но ответ API не JSON"
+        print(f"[TransactionsUploadScreen] upload success => {payload}")
 
-        if isinstance(payload, dict):
-            fileName = payload.get("file")
-            loadedRows = payload.get("loaded rows")
+    def _poll_upload_job(self, jobID: str) -> None:
+        userName = self._sessionService._sessionData.userName
+        password = self._sessionService._sessionData.password
 
-            if fileName is not None and loadedRows is not None:
-                self.statusText = f"Успешно: {fileName}, загружено строк: {loadedRows}"
+        self._run_request_in_thread(
+            request_func=lambda: self._apiClient.get_bank_upload_job(
+                userName=userName,
+                password=password,
+                jobID=jobID,
+            ),
+            on_success=self._on_upload_job_status,
+            on_error=self._on_upload_error,
+        )
+
+    def _on_upload_job_status(self, job: Any) -> None:
+        if not isinstance(job, dict):
+            self._on_upload_error(None, {"detail": f"Неожиданный ответ API: {job}"})
+            return
+
+        fileName = job.get("fileName")
+        jobStatus = job.get("status")
+
+        if jobStatus == "done":
+            self.isLoading = False
+            if job.get("alreadyLoaded"):
+                self.statusText = f"Файл {fileName} уже был загружен ранее"
             else:
-                self.statusText = f"Успешно: {payload}"
-        else:
-            self.statusText = "Успешно, но ответ API не JSON"
+                self.statusText = (f"Успешно: {fileName}, загружено строк: {job.get('rowsInserted')}"
+                                   f", дубликатов пропущено: {job.get('duplicatesSkipped')}")
+            self._load_user_files_catalog()
+            return
 
-        print(f"[TransactionsUploadScreen] upload success => {payload}")
+        if jobStatus == "failed":
+            self._on_upload_error(None, {"detail": job.get("error") or "обработка файла завершилась ошибкой"})
+            return
+
+        rowsParsed = job.get("rowsParsed")
+        self.statusText = f"Обработка {fileName}: {'в очереди' if jobStatus == 'queued' else 'разбор'}" + (
+            f", строк в файле: {rowsParsed}" if rowsParsed is not None else "")
+        Clock.schedule_once(lambda *_: self._poll_upload_job(job["jobID"]), self.uploadJobPollSeconds)
 
     def _on_upload_error(self, statusCode: Optional[int], errorPayload: Any) -> None:
         self.isLoading = False
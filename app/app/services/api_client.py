@@ -147,6 +147,16 @@ class ApiClient(AbstractApiClientInterface):
             return response.json()
         return response
 
+    def get_bank_upload_job(self, userName:str, password:str, jobID:str) -> Dict[str,Any]:
+        url = f"{self._apiConfig.baseUrl}/bank_transactions/jobs/{jobID}"
+        headers = {"X-Username": userName,"X-Password": password}
+        response = requests.get(url, headers=headers, timeout=self._apiConfig.timeoutSeconds)
+        response.raise_for_status()
+        contentType = response.headers.get("content-type", "")
+        if "application/json" in contentType:
+            return response.json()
+        return response
+
 
     # Friends
     def get_friends(self, userName: str, password: str) -> Dict:
@@ -443,3 +453,7 @@ class ApiClient(AbstractApiClientInterface):
         url = f"{self._apiConfig.baseUrl}/ananlytics/predict_category_expenses"
         return self._get_analytics(userName, password, url)
 
+    def get_analytics_bundle(self, userName: str, password:str, query:GetAnalyticsBundle):
+        url = f"{self._apiConfig.baseUrl}/analytics/bundle" + query.to_query()
+        return self._get_analytics(userName, password, url)
+
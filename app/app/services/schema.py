@@ -62,6 +62,8 @@ class PatchCategoryQuery(ApiQuery):
 
 class GetCategoryTransactionsQeury(ApiQuery):
     slugs:str = Field()
+    pageSize:int|None = Field(default=None)
+    cursor:str|None = Field(default=None)
 
 
 class GetAnalyticsCashFlow(ApiQuery):
@@ -70,6 +72,11 @@ class GetAnalyticsCashFlow(ApiQuery):
 class GetAnalyticsLastTransactions(ApiQuery):
     limit:int = Field()
 
+class GetAnalyticsBundle(ApiQuery):
+    sections:str|None = Field(default=None)
+    period:Literal["day", "month", "year"]|None = Field(default=None)
+    limit:int|None = Field(default=None)
+
 
 class GetUserLoadedFiles(ApiQuery):
     slugs:str = Field()
@@ -0,0 +1,122 @@
+# Выборки по userID из банковской таблицы на 1M строк: полный скан против индекса (userID, operationDate).
+# python tests/bench_bank_indexes.py [строк]
+import os
+import sys
+import time
+import random
+import tempfile
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, select, func, text
+from api_backend.handlers.bank_files.bank_slugs import BankSlugs
+from api_backend.handlers.bank_files.bank_transactions_view import BankTransactionsViewHandler
+from api_backend.handlers.db.orm_models.abstract_models import AbstractBaseModel
+from api_backend.handlers.db.orm_models.sqlite_models import (
+    AlfaFinancialTransactions, TinkoffFinancialTransactions, CashFinancialTransactions, Users
+)
+
+userCount = 2000
+sampleUsers = 50
+repeatCount = 5
+batchSize = 50000
+indexName = "ix_alfa_financial_transactions_userID_operationDate"
+
+
+def fill_alfa(connection, rowCount: int):
+    rng = random.Random(3)
+    startDate = date(2021, 1, 1)
+    connection.execute(Users.__table__.insert(), [{"id": i, "userName": f"user{i}", "password": "-"} for i in range(1, userCount + 1)])
+
+    rawConnection = connection.connection.driver_connection
+    for batchStart in range(0, rowCount, batchSize):
+        rows = [
+            (rng.randint(1, userCount), "bench.xlsx", (startDate + timedelta(days=rng.randrange(1460))).isoformat(),
+             None, None, rng.choice(["Супермаркеты", "Кафе", "Транспорт", None]), f"операция {i}",
+             round(rng.uniform(-5000, 5000), 2), "Выполнена")
+            for i in range(batchStart, min(batchStart + batchSize, rowCount))
+        ]
+        rawConnection.executemany(
+            f'INSERT INTO "{AlfaFinancialTransactions.__tablename__}" '
+            '(userID, fileName, operationDate, postingDate, code, category, description, currencyAmount, status) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+
+
+def make_queries():
+    table = AlfaFinancialTransactions.__table__
+    monthColumn = func.strftime("%Y-%m", table.c.operationDate)
+    return {
+        "balance SUM/COUNT": lambda userID: select(func.sum(table.c.currencyAmount), func.count())
+            .where(table.c.userID == userID),
+        "cash flow GROUP BY month": lambda userID: select(monthColumn, func.sum(table.c.currencyAmount))
+            .where(table.c.userID == userID).group_by(monthColumn).order_by(monthColumn),
+        "last 10 by date": lambda userID: select(table.c.id, table.c.operationDate, table.c.currencyAmount)
+            .where(table.c.userID == userID).order_by(table.c.operationDate.desc(), table.c.id.desc()).limit(10),
+    }
+
+
+def run_queries(connection, queries, userIDs):
+    timings, results = {}, {}
+    for queryName, makeQuery in queries.items():
+        best = None
+        for _ in range(repeatCount):
+            timeStart = time.perf_counter()
+            rows = [connection.execute(makeQuery(userID)).all() for userID in userIDs]
+            elapsed = (time.perf_counter() - timeStart) / len(userIDs)
+            best = elapsed if best is None else min(best, elapsed)
+        timings[queryName] = best
+        # Порядок суммирования в скане и по индексу разный - сравниваем суммы с округлением
+        results[queryName] = [[tuple(round(v, 2) if isinstance(v, float) else v for v in row) for row in userRows]
+                              for userRows in rows]
+    return timings, results
+
+
+def print_view_plan(connection, userID: int):
+    # Фильтр по userID должен попасть в каждую ветку UNION ALL представления
+    bankHandlers = {
+        BankSlugs.ALFA: SimpleNamespace(dbt=AlfaFinancialTransactions),
+        BankSlugs.TINKOFF: SimpleNamespace(dbt=TinkoffFinancialTransactions),
+        BankSlugs.CASH: SimpleNamespace(dbt=CashFinancialTransactions),
+    }
+    viewTable = BankTransactionsViewHandler(None, None, bankHandlers).dbt
+    query = select(func.sum(viewTable.c.currencyAmount)).where(viewTable.c.userID == userID)
+    compiled = query.compile(connection, compile_kwargs={"literal_binds": True})
+    for row in connection.execute(text(f"EXPLAIN QUERY PLAN {compiled}")):
+        print(f"  {row[-1]}")
+
+
+def main(rowCount: int):
+    with tempfile.TemporaryDirectory() as tmpDir:
+        engine = create_engine(f"sqlite:///{os.path.join(tmpDir, 'bench.db')}")
+        with engine.begin() as connection:
+            AbstractBaseModel.metadata.create_all(connection)
+            timeStart = time.perf_counter()
+            fill_alfa(connection, rowCount)
+            print(f"rows={rowCount} users={userCount} fill {time.perf_counter() - timeStart:.1f}s")
+
+        userIDs = random.Random(5).sample(range(1, userCount + 1), sampleUsers)
+        queries = make_queries()
+        with engine.connect() as connection:
+            connection.execute(text("ANALYZE"))
+            indexTimings, indexResults = run_queries(connection, queries, userIDs)
+            print("view plan:")
+            print_view_plan(connection, userIDs[0])
+
+            connection.execute(text(f'DROP INDEX "{indexName}"'))
+            connection.execute(text("ANALYZE"))
+            scanTimings, scanResults = run_queries(connection, queries, userIDs)
+            connection.commit()
+        engine.dispose()
+
+    print(f"best of {repeatCount}, avg per user over {sampleUsers} users:")
+    for queryName in queries:
+        parity = "parity ok" if indexResults[queryName] == scanResults[queryName] else "PARITY MISMATCH"
+        scanMs, indexMs = scanTimings[queryName] * 1000, indexTimings[queryName] * 1000
+        print(f"{queryName:26s} scan {scanMs:8.2f} ms  index {indexMs:7.2f} ms  (x{scanMs / indexMs:.0f}) {parity}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,47 @@
+# Скорость разметки транзакций правилами категорий: исходный перебор против CategoryRulesMatcher.
+# python tests/bench_category_matcher.py [условий]
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from test_category_matcher import looped_resolve_category, make_random_categorys, make_random_transactions, matchFields
+from api_backend.handlers.castom_category.category_matcher import CategoryRulesMatcher
+
+transactionCount = 10000
+categoryCount = 50
+
+
+def main(conditionCount: int):
+    rng = random.Random(7)
+    alphabet = "абвгдежзиклмнопрстуфхцчшэюя" + "abcdef"
+    words = ["".join(rng.choice(alphabet) for _ in range(rng.randint(3, 9))) for _ in range(3000)]
+    categorys = make_random_categorys(rng, words, conditionCount, categoryCount)
+    transactions = make_random_transactions(rng, words, categorys, transactionCount)
+    print(f"conditions={conditionCount} categorys={categoryCount} transactions={transactionCount}")
+
+    timeStart = time.perf_counter()
+    loopedResult = [looped_resolve_category(t, categorys, matchFields) for t in transactions]
+    loopedElapsed = time.perf_counter() - timeStart
+
+    timeStart = time.perf_counter()
+    categoryMatcher = CategoryRulesMatcher(categorys, matchFields)
+    compileElapsed = time.perf_counter() - timeStart
+
+    timeStart = time.perf_counter()
+    matcherResult = [categoryMatcher.match(t) for t in transactions]
+    matcherElapsed = time.perf_counter() - timeStart
+
+    parity = "parity ok" if all(a is b for a, b in zip(loopedResult, matcherResult)) else "PARITY MISMATCH"
+    matchedCount = sum(c is not None for c in matcherResult)
+    print(f"matched {matchedCount}/{transactionCount} {parity}")
+    print(f"nested loop  {loopedElapsed:6.3f}s {transactionCount / loopedElapsed:9.0f} tx/s")
+    print(f"aho-corasick {matcherElapsed:6.3f}s {transactionCount / matcherElapsed:9.0f} tx/s (compile {compileElapsed * 1000:.1f}ms)")
+    print(f"speedup x{loopedElapsed / matcherElapsed:.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
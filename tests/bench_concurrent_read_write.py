@@ -0,0 +1,107 @@
+# Задержка чтения во время загрузки выписки: профиль PRAGMA по умолчанию sqlite против defaultPragmas (WAL и т.д.).
+# python tests/bench_concurrent_read_write.py [строк в загрузке]
+import os
+import sys
+import time
+import random
+import asyncio
+import tempfile
+import statistics
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import func
+
+from api_backend.handlers.db.db_handlers import SqliteHandlerAsync
+from api_backend.handlers.db.orm_models.abstract_models import AbstractBaseModel
+from api_backend.handlers.db.orm_models.sqlite_models import AlfaFinancialTransactions
+
+existingRows = 50000
+uploadChunkSize = 5000
+readPause = 0.02
+idleReads = 30
+benchProfiles = [("sqlite default", {}), ("defaultPragmas", None)]
+
+
+def make_rows(rowCount: int, userID: int, seed: int):
+    r = random.Random(seed)
+    return [{"userID": userID, "fileName": "bench.xlsx", "operationDate": date(2024, 1, 1) + timedelta(days=r.randint(0, 700)),
+             "postingDate": date(2024, 1, 1), "code": "A1", "category": "Супермаркеты", "description": f"операция {r.randint(0, 5000)}",
+             "currencyAmount": round(r.uniform(-3000, 3000), 2), "status": "Выполнен", "rowFingerprint": f"{seed}-{i}"}
+            for i in range(rowCount)]
+
+
+async def read_once(dbHandler: SqliteHandlerAsync, readerID: int):
+    # Как страница клиента: последние 50 операций и баланс
+    table = AlfaFinancialTransactions
+    await dbHandler.get_table_data([table], (table.userID == readerID,), orderBy=(table.id.desc(),), limit=50)
+    await dbHandler.get_aggregated_data({"balance": func.sum(table.currencyAmount)}, (table.userID == readerID,))
+
+
+async def run_profile(dbPath: str, pragmas, uploadRows):
+    dbHandler = SqliteHandlerAsync(f"sqlite+aiosqlite:///{dbPath}", pragmas=pragmas)
+    try:
+        async with dbHandler.engine.begin() as conn:
+            await conn.run_sync(AbstractBaseModel.metadata.create_all)
+        await dbHandler.insert_bulk_data(AlfaFinancialTransactions, make_rows(existingRows, 2, 1))
+
+        idleLatency = []
+        for _ in range(idleReads):
+            timeStart = time.perf_counter()
+            await read_once(dbHandler, 2)
+            idleLatency.append(time.perf_counter() - timeStart)
+
+        latency, errors, isUploading = [], [], True
+
+        async def reader():
+            while isUploading:
+                timeStart = time.perf_counter()
+                try:
+                    await read_once(dbHandler, 2)
+                except Exception as e:
+                    errors.append(type(e).__name__)
+                latency.append(time.perf_counter() - timeStart)
+                await asyncio.sleep(readPause)
+
+        async def writer():
+            nonlocal isUploading
+            timeStart = time.perf_counter()
+            try:
+                for chunkStart in range(0, len(uploadRows), uploadChunkSize):
+                    await dbHandler.insert_bulk_data(AlfaFinancialTransactions, uploadRows[chunkStart:chunkStart + uploadChunkSize],
+                                                     conflictColumns=("rowFingerprint",))
+            finally:
+                isUploading = False
+            return time.perf_counter() - timeStart
+
+        uploadElapsed, _ = await asyncio.gather(writer(), reader())
+        storedCount = (await dbHandler.get_aggregated_data({"count": func.count()}, (AlfaFinancialTransactions.userID == 1,)))[0]["count"]
+        return idleLatency, latency, errors, uploadElapsed, storedCount
+    finally:
+        await dbHandler.close()
+        await dbHandler.engine.dispose()
+        await dbHandler.readEngine.dispose()
+
+
+async def run(uploadCount: int):
+    uploadRows = make_rows(uploadCount, 1, 2)
+    print(f"existing={existingRows} upload={uploadCount} chunk={uploadChunkSize} cpu={os.cpu_count()}")
+    with tempfile.TemporaryDirectory() as tmpDir:
+        for profileIndex, (name, pragmas) in enumerate(benchProfiles):
+            idleLatency, latency, errors, uploadElapsed, storedCount = await run_profile(
+                os.path.join(tmpDir, f"profile_{profileIndex}.db"), pragmas, uploadRows)
+            quantiles = statistics.quantiles(latency, n=100, method="inclusive") if len(latency) > 1 else latency * 99
+            parity = "rows ok" if storedCount == uploadCount else f"ROWS MISMATCH {storedCount}"
+            print(f"{name:14s} idle p50 {statistics.median(idleLatency) * 1000:6.1f} ms | during upload: reads {len(latency):4d} "
+                  f"p50 {quantiles[49] * 1000:6.1f} ms p99 {quantiles[98] * 1000:7.1f} ms max {max(latency) * 1000:7.1f} ms "
+                  f"errors {len(errors)} | upload {uploadElapsed:5.2f}s {uploadCount / uploadElapsed:7.0f} rows/s {parity}")
+
+
+def main(uploadCount: int):
+    asyncio.run(run(uploadCount))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,93 @@
+# Скорость вставки выписки Альфы (строк/с): построчные ORM-объекты против bulk Core INSERT.
+# python tests/bench_ingest.py [строк]
+import os
+import sys
+import time
+import asyncio
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import select
+
+import statement_fixtures
+from api_backend.handlers.db.db_handlers import SqliteHandlerAsync
+from api_backend.handlers.db.orm_models.abstract_models import AbstractBaseModel
+from api_backend.handlers.db.orm_models.sqlite_models import AlfaFinancialTransactions
+from api_backend.handlers.bank_files.bank_load_handlers import AlfaBankHandler
+from api_backend.handlers.bank_files.bank_file_preprocessing import AlfaPreprocessingDataFileHandler
+from api_backend.handlers.castom_category.category_matcher import CategoryRulesMatcher
+
+userID = 1
+fileName = "alfa_bench.xlsx"
+benchCategorys = [
+    {"id": 1, "categoryName": "Продукты", "categoryConditions": [{"conditionValue": "Пятерочка", "isExact": False},
+                                                                  {"conditionValue": "Магнит", "isExact": False}]},
+    {"id": 2, "categoryName": "Транспорт", "categoryConditions": [{"conditionValue": "Такси", "isExact": False}]},
+    {"id": 3, "categoryName": "Код B2", "categoryConditions": [{"conditionValue": "B2", "isExact": True}]},
+]
+
+
+async def rowwise_insert_frame(bankHandler: AlfaBankHandler, df, categoryResolver):
+    # Путь вставки до bulk INSERT: iterrows, ORM-объект на строку, add_all и to_dict каждой строки
+    fingerprints = bankHandler._row_fingerprints(userID, bankHandler.slug, df)
+    pull = []
+    for (_, row), rowFingerprint in zip(df.iterrows(), fingerprints):
+        pull.append(bankHandler.dbt(
+            userID=userID, fileName=fileName, operationDate=row.operationDate, postingDate=row.postingDate,
+            code=row.code, category=row.category, description=row.description,
+            currencyAmount=row.currencyAmount, status=row.status, rowFingerprint=rowFingerprint,
+            **bankHandler._resolved_category_values(categoryResolver, description=row.description, code=row.code)))
+    return await bankHandler.dbHandler.insert_data(pull)
+
+
+async def bulk_insert_frame(bankHandler: AlfaBankHandler, df, categoryResolver):
+    return await bankHandler.insert_frame(userID, df, fileName, categoryResolver)
+
+
+async def run_insert(dbPath: str, insertFrame, df, categoryResolver):
+    dbHandler = SqliteHandlerAsync(f"sqlite+aiosqlite:///{dbPath}")
+    try:
+        async with dbHandler.engine.begin() as conn:
+            await conn.run_sync(AbstractBaseModel.metadata.create_all)
+        bankHandler = AlfaBankHandler(None, dbHandler, AlfaFinancialTransactions, None)
+
+        timeStart = time.perf_counter()
+        inserted = await insertFrame(bankHandler, df, categoryResolver)
+        elapsed = time.perf_counter() - timeStart
+
+        table = AlfaFinancialTransactions.__table__
+        storedRows = await dbHandler.get_table_data([x for x in table.columns], (), orderBy=(table.c.id,))
+        return elapsed, len(inserted), storedRows
+    finally:
+        await dbHandler.close()
+        await dbHandler.engine.dispose()
+        await dbHandler.readEngine.dispose()
+
+
+async def run(rowCount: int):
+    with tempfile.TemporaryDirectory() as tmpDir:
+        xlsxPath = os.path.join(tmpDir, fileName)
+        statement_fixtures.make_alfa_xlsx(xlsxPath, n=rowCount)
+        df = AlfaPreprocessingDataFileHandler(None).preprocessing_data(xlsxPath)
+        categoryResolver = CategoryRulesMatcher(benchCategorys, ["description", "code"]).match
+        print(f"rows={len(df)}")
+
+        results = {}
+        for name, insertFrame in [("row-wise ORM", rowwise_insert_frame), ("bulk insert", bulk_insert_frame)]:
+            results[name] = await run_insert(os.path.join(tmpDir, f"{name}.db"), insertFrame, df, categoryResolver)
+            elapsed, insertedCount, _ = results[name]
+            print(f"{name:13s} {elapsed:6.2f}s {insertedCount / elapsed:8.0f} rows/s")
+
+    rowwise, bulk = results["row-wise ORM"], results["bulk insert"]
+    parity = "parity ok" if rowwise[2] == bulk[2] else "PARITY MISMATCH"
+    print(f"speedup x{rowwise[0] / bulk[0]:.1f} {parity}")
+
+
+def main(rowCount: int):
+    asyncio.run(run(rowCount))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
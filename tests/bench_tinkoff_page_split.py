@@ -0,0 +1,36 @@
+# Скорость разбора PDF Тинькофф (страниц/с) последовательно и с разбиением страниц по процессам.
+# python tests/bench_tinkoff_page_split.py [страниц]
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import statement_fixtures
+from api_backend.handlers.bank_files.bank_file_preprocessing import TinkoffPreprocessingDataFileHandler
+
+benchConfigs = [(1, 200), (2, 100), (2, 200), (4, 100), (4, 50)]
+
+
+def main(pageCount: int):
+    with tempfile.TemporaryDirectory() as tmpDir:
+        pdfPath = os.path.join(tmpDir, f"tinkoff_{pageCount}_pages.pdf")
+        statement_fixtures.make_tinkoff_pdf(pdfPath, n=pageCount * 12, rowsPerPage=12)
+        print(f"pages={pageCount} cpu={os.cpu_count()}")
+
+        serialRows = None
+        for pageWorkers, pagesPerWorker in benchConfigs:
+            timeStart = time.perf_counter()
+            rows = TinkoffPreprocessingDataFileHandler.extract_tinkoff_pymupdf(
+                pdfPath, None, pageWorkers=pageWorkers, pagesPerWorker=pagesPerWorker)
+            elapsed = time.perf_counter() - timeStart
+
+            serialRows = rows if serialRows is None else serialRows
+            parity = "parity ok" if rows.equals(serialRows) else "PARITY MISMATCH"
+            print(f"workers={pageWorkers} pagesPerWorker={pagesPerWorker:3d} {elapsed:6.2f}s {pageCount / elapsed:7.0f} pages/s {parity}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 600)
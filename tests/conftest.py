@@ -0,0 +1,18 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import statement_fixtures
+
+
+@pytest.fixture(scope="session")
+def tinkoffPdfPath(tmp_path_factory):
+    # Несколько сотен страниц: разбиение по воркерам дает много диапазонов и стыков между ними
+    if statement_fixtures.fontPath is None:
+        pytest.skip("No TTF font with cyrillic and ₽ for the Tinkoff PDF fixture")
+    path = str(tmp_path_factory.mktemp("statements") / "tinkoff_300_pages.pdf")
+    statement_fixtures.make_tinkoff_pdf(path, n=300 * 12, rowsPerPage=12)
+    return path
@@ -0,0 +1,59 @@
+import os
+import random
+import datetime
+import fitz
+import pandas as pd
+
+# Синтетические выписки в формате банков: описания на кириллице, суммы с неразрывным пробелом и ₽
+descriptions = ["Пятерочка магазин", "Яндекс Такси", "Зарплата ООО Ромашка", "Кофейня Starbucks", "Аптека Ригла",
+                "Перевод Иванов", "Магнит у дома", "Лукойл АЗС", "Кинотеатр", "Ozon заказ", "Прочее"]
+
+# Встроенные шрифты PyMuPDF без кириллицы и ₽ - нужен TTF из системы
+fontPaths = ["/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", "/usr/share/fonts/TTF/DejaVuSans.ttf",
+             "/Library/Fonts/Arial Unicode.ttf", "C:/Windows/Fonts/arial.ttf"]
+fontPath = next((x for x in fontPaths if os.path.exists(x)), None)
+
+
+def make_rows(n: int, seed: int) -> list:
+    r = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        operationDate = datetime.date(2025, 6, 1) + datetime.timedelta(days=r.randint(0, 200))
+        amount = round(r.choice([-1, -1, -1, 1]) * r.uniform(50, 30000 if r.random() < 0.1 else 3000), 2)
+        rows.append((operationDate, amount, r.choice(descriptions), r.choice(["A1", "B2", "C3"])))
+    return rows
+
+
+def format_amount(amount: float, withPlus: bool = False) -> str:
+    # -1234.5 -> "-1\xa0234,50"
+    text = f"{abs(amount):,.2f}".replace(",", "\xa0").replace(".", ",")
+    return ("-" if amount < 0 else "+" if withPlus else "") + text
+
+
+def make_alfa_xlsx(path: str, n: int = 60, seed: int = 1, holdEvery: int = 0):
+    # Шапка выписки, таблица с 'Дата операции', пустая строка и итог - как в выгрузке Альфы
+    header = ["Дата операции", "Дата проводки", "Код", "Категория", "Описание", None, "Сумма в валюте счета", "Статус "]
+    data = [[None] * 8, ["Выписка"] + [None] * 7, [None] * 8, header]
+    for ind, (operationDate, amount, description, code) in enumerate(make_rows(n, seed)):
+        isHold = holdEvery and ind % holdEvery == 0
+        data.append(["HOLD" if isHold else operationDate.strftime("%d.%m.%Y"), operationDate.strftime("%d.%m.%Y"), code,
+                     ["Супермаркеты", "Транспорт", None, "Рестораны"][ind % 4], description, None,
+                     format_amount(amount), "Выполнен"])
+    data += [[None] * 8, ["Итого"] + [None] * 7]
+    pd.DataFrame(data).to_excel(path, index=False, header=False)
+
+
+def make_tinkoff_pdf(path: str, n: int = 60, seed: int = 2, rowsPerPage: int = 12, holdEvery: int = 0):
+    # Каждая операция - отдельный текстовый блок: даты, суммы с ₽, описание, доп. описание
+    doc = fitz.open()
+    page = None
+    for ind, (operationDate, amount, description, code) in enumerate(make_rows(n, seed)):
+        if ind % rowsPerPage == 0:
+            page = doc.new_page()
+            page.insert_text((40, 40), "Дата и время операции Описание", fontname="helv")
+        isHold = holdEvery and ind % holdEvery == 0
+        text = "\n".join(["HOLD" if isHold else operationDate.strftime("%d.%m.%y"), operationDate.strftime("%d.%m.%y"),
+                          format_amount(amount, True) + " ₽", format_amount(amount, True) + " ₽", description, code])
+        page.insert_text((40, 80 + (ind % rowsPerPage) * 60), text, fontsize=7, fontfile=fontPath, fontname="F0")
+    doc.save(path)
+    doc.close()
@@ -0,0 +1,418 @@
+import math
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+import pytest
+
+from api_backend.services.analytics.analytics import AnalyticsService
+from api_backend.services.analytics.transaction_frame import TransactionFrame
+
+
+# Хелперы аналитики на списке словарей, какими они были до TransactionFrame: эталон для сравнения
+
+
+def listwise_find_most_anomalous_expense(transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    expenses = [t for t in transactions if t.get("currencyAmount", 0) < 0]
+    if not expenses:
+        return None
+
+    from collections import defaultdict
+    categories = defaultdict(list)
+    for t in expenses:
+        cat = t.get("category") or "Без категории"
+        categories[cat].append(t)
+
+    anomaliesWithScore = []
+
+    for _, transList in categories.items():
+        if len(transList) < 3:
+            continue
+
+        amounts = [abs(t["currencyAmount"] if "currencyAmount" in t else t["currencyAmount"]) for t in transList]
+
+        amountsSorted = sorted(amounts)
+        n = len(amountsSorted)
+        q1 = amountsSorted[int(0.25 * (n - 1))]
+        q3 = amountsSorted[int(0.75 * (n - 1))]
+        iqr = q3 - q1
+        threshold = q3 + 1.5 * iqr
+
+        for t in transList:
+            amount = abs(t["currencyAmount"])
+            if amount > threshold:
+                score = amount - threshold
+                anomaliesWithScore.append((score, t))
+
+    if not anomaliesWithScore:
+        return {"status":False}
+
+    _, mostAnomalous = max(anomaliesWithScore, key=lambda x: x[0])
+    return {"status":True, "data":mostAnomalous}
+
+
+def listwise_calculate_habit_cost(transactions: List[Dict[str, Any]]) -> Dict[str, float]:
+    today = datetime(2025, 12, 22)
+    sixMonthsAgo = today - timedelta(days=180)
+
+    expenses = []
+    for t in transactions:
+        amount = t.get("currencyAmount")
+        if amount is None or amount >= 0:
+            continue
+
+        try:
+            opDate = datetime.strptime(t["operationDate"], "%Y-%m-%d")
+        except (ValueError, TypeError):
+            continue
+
+        if opDate < sixMonthsAgo or opDate > today:
+            continue
+
+        category = t.get("category") or "Без категории"
+        expenses.append({
+            "category": category,
+            "amount": abs(amount)
+        })
+
+    # from collections import defaultdict
+    categoryTotals = defaultdict(float)
+    categoryCounts = defaultdict(int)
+
+    for exp in expenses:
+        cat = exp["category"]
+        categoryTotals[cat] += exp["amount"]
+        categoryCounts[cat] += 1
+
+    habitCosts = {
+        cat: round(total, 2)
+        for cat, total in categoryTotals.items()
+        if categoryCounts[cat] >= 2
+    }
+
+    return habitCosts
+
+
+def listwise_calculate_financial_literacy_score(transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    if not transactions:
+        return {"score": 0, "category": "Финансовая бестолочь"}
+
+    income = 0.0
+    expenses = 0.0
+    categoryCounter = []
+    otherCategoryCount = 0
+    essentialCategories = {"На квартиру", "Продукты", "Здоровье", "Транспорт", "Коммунальные услуги", "Еда"}
+    essentialExpenses = 0.0
+
+    for t in transactions:
+        amount = t.get("currencyAmount")
+        if amount is None:
+            continue
+
+        if amount > 0:
+            income += amount
+        elif amount < 0:
+            expense = abs(amount)
+            expenses += expense
+            categoryCounter.append(t)
+
+            category = t.get("category", "Прочие операции") or "Прочие операции"
+            if category == "Прочие операции":
+                otherCategoryCount += 1
+
+            if category in essentialCategories:
+                essentialExpenses += expense
+
+    if income == 0:
+        balanceScore = 0
+    else:
+        expenseRatio = expenses / income
+        if expenseRatio <= 0.7:
+            balanceScore = 40
+        elif expenseRatio <= 1.0:
+            balanceScore = int(40 * (1 - (expenseRatio - 0.7) / 0.3))
+        else:
+            balanceScore = max(0, int(40 * (1 / expenseRatio)))
+
+    smallExpenses = sum(1 for t in categoryCounter if abs(t["currencyAmount"]) < 1000)
+    if len(categoryCounter) == 0:
+        habitScore = 20
+    else:
+        smallRatio = smallExpenses / len(categoryCounter)
+        habitScore = int(20 * (1 - min(smallRatio, 1.0)))
+
+    if len(categoryCounter) == 0:
+        categorization_score = 15
+    else:
+        other_ratio = otherCategoryCount / len(categoryCounter)
+        categorization_score = int(15 * (1 - min(other_ratio, 1.0)))
+    if expenses == 0:
+        essentialScore = 0
+    else:
+        essential_ratio = essentialExpenses / expenses
+        if 0.5 <= essential_ratio <= 0.7:
+            essentialScore = 25
+        elif essential_ratio < 0.3:
+            essentialScore = int(25 * (essential_ratio / 0.3))
+        elif essential_ratio > 0.9:
+            essentialScore = int(25 * (1 - (essential_ratio - 0.7) / 0.2))
+        else:
+            essentialScore = max(0, int(25 * (1 - abs(essential_ratio - 0.6) / 0.2)))
+
+    totalScore = balanceScore + habitScore + categorization_score + essentialScore
+    totalScore = max(0, min(100, totalScore))
+
+    if totalScore <= 30:
+        category = "Финансовая бестолочь"
+    elif totalScore <= 50:
+        category = "Новичок в деньгах"
+    elif totalScore <= 75:
+        category = "Осознанный тратильщик"
+    elif totalScore <= 90:
+        category = "Финансовый стратег"
+    else:
+        category = "Финансовый гений"
+
+    return {
+        "score": totalScore,
+        "category": category
+    }
+
+
+def listwise_forecast_next_month_expenses(transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    if not transactions:
+        return {
+            "forecastAmount": 0.0,
+            "confidence": "низкая",
+            "periodsAnalyzed": 0,
+            "message": "Недостаточно данных для прогноза."
+        }
+
+    today = datetime(2025, 12, 22)
+    currentMonth = today.year * 12 + today.month
+
+    monthlyExpenses = defaultdict(float)
+
+    for t in transactions:
+        amount = t.get("currencyAmount")
+        if amount is None or amount >= 0:
+            continue
+
+        try:
+            opDate = datetime.strptime(t["operationDate"], "%Y-%m-%d")
+        except (ValueError, TypeError):
+            continue
+
+        monthKey = opDate.year * 12 + opDate.month
+        if monthKey > currentMonth:
+            continue 
+        if monthKey < currentMonth - 5:
+            continue
+
+        monthlyExpenses[monthKey] += abs(amount)
+
+    sortedMonths = sorted(monthlyExpenses.items())
+    if not sortedMonths:
+        return {
+            "forecastAmount": 0.0,
+            "confidence": "низкая",
+            "periodsAnalyzed": 0,
+            "message": "Расходы не обнаружены."
+        }
+
+    expenseValues = [v for _, v in sortedMonths]
+    n = len(expenseValues)
+
+    if n == 1:
+        forecast = expenseValues[0]
+        confidence = "низкая"
+    elif n <= 3:
+        forecast = sum(expenseValues) / n
+        confidence = "средняя"
+    else:
+        t = list(range(n))
+        y = expenseValues
+
+        meanT = sum(t) / n
+        meanY = sum(y) / n
+
+        numerator = sum((ti - meanT) * (yi - meanY) for ti, yi in zip(t, y))
+        denominator = sum((ti - meanT) ** 2 for ti in t)
+
+        if denominator == 0:
+            slope = 0
+        else:
+            slope = numerator / denominator
+
+        intercept = meanY - slope * meanT
+
+        forecast = slope * n + intercept
+        forecast = max(0, forecast)
+        confidence = "высокая" if n >= 5 else "средняя"
+
+    return {
+        "forecastAmount": round(forecast, 2),
+        "confidence": confidence,
+        "periodsAnalyzed": n,
+        "message": f"Прогноз основан на данных за {n} {'месяц' if n == 1 else 'месяца' if 2 <= n <= 4 else 'месяцев'}."
+    }
+
+
+def listwise_forecast_expenses_by_category(transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    if not transactions:
+        return {
+            "forecastByCategory": {},
+            "totalForecast": 0.0,
+            "confidence": "низкая",
+            "message": "Недостаточно данных для прогноза по категориям."
+        }
+
+    today = datetime(2025, 12, 22)
+    currentmonthKey = today.year * 12 + today.month
+
+    categoryMonthly = defaultdict(lambda: defaultdict(float))
+
+    for t in transactions:
+        amount = t.get("currencyAmount")
+        if amount is None or amount >= 0:
+            continue
+
+        try:
+            opDate = datetime.strptime(t["operationDate"], "%Y-%m-%d")
+        except (ValueError, TypeError):
+            continue
+
+        monthKey = opDate.year * 12 + opDate.month
+        if monthKey > currentmonthKey or monthKey < currentmonthKey - 5:
+            continue
+
+        category = t.get("category") or "Без категории"
+        categoryMonthly[category][monthKey] += abs(amount)
+
+    if not categoryMonthly:
+        return {
+            "forecastByCategory": {},
+            "totalForecast": 0.0,
+            "confidence": "низкая",
+            "message": "Расходы не обнаружены."
+        }
+
+    forecastByCategory = {}
+    totalForecast = 0.0
+    totalMonthsObserved = 0
+
+    ALPHA = 0.6
+
+    for category, monthlyData in categoryMonthly.items():
+        monthsSorted = sorted(monthlyData.items())
+        amounts = [amt for _, amt in monthsSorted]
+        n = len(amounts)
+        totalMonthsObserved += n
+
+        if n == 1:
+            forecast = amounts[0]
+            conf = 1
+        elif n == 2:
+            forecast = sum(amounts) / 2
+            conf = 2
+        else:
+            smoothed = amounts[0]
+            for i in range(1, n):
+                smoothed = ALPHA * amounts[i] + (1 - ALPHA) * smoothed
+            forecast = smoothed
+            conf = 3
+
+        forecast = max(0, round(forecast, 2))
+        forecastByCategory[category] = forecast
+        totalForecast += forecast
+
+    avgMonthsPerCat = totalMonthsObserved / len(categoryMonthly)
+    if avgMonthsPerCat >= 3:
+        confidence = "высокая"
+    elif avgMonthsPerCat >= 2:
+        confidence = "средняя"
+    else:
+        confidence = "низкая"
+
+    return {
+        "forecastByCategory": forecastByCategory,
+        "totalForecast": round(totalForecast, 2),
+        "confidence": confidence,
+        "message": f"Прогноз по {len(forecastByCategory)} категориям. Уровень уверенности: {confidence}."
+    }
+
+
+helperNames = ["_find_most_anomalous_expense", "_calculate_habit_cost", "_calculate_financial_literacy_score",
+               "_forecast_next_month_expenses", "_forecast_expenses_by_category"]
+
+categories = ["Еда", "Транспорт", "Продукты", "Прочие операции", "Без категории", "На квартиру", "Здоровье", "Кафе", None, ""]
+
+
+def make_transactions(n: int, seed: int, withNoneAmounts: bool = True) -> List[Dict[str, Any]]:
+    # Даты вокруг опорной даты хелперов (2025-12-22), в т.ч. несуществующие, не ISO и пустые; категории с пропусками
+    r = random.Random(seed)
+    transactions = []
+    for i in range(n):
+        x = r.random()
+        if x < 0.03:
+            operationDate = "2025-13-01"
+        elif x < 0.05:
+            operationDate = None
+        elif x < 0.07:
+            operationDate = "2025-7-5"
+        else:
+            operationDate = (datetime(2025, 12, 31) - timedelta(days=r.randint(0, 400))).strftime("%Y-%m-%d")
+        amount = r.choice([round(r.uniform(-5000, 3000), 2), -round(r.uniform(1, 300), 2), float(r.choice([-100, -250, 500, -1000, 0]))])
+        if withNoneAmounts and r.random() < 0.05:
+            amount = None
+        transactions.append({"id": i, "operationDate": operationDate, "currencyAmount": amount,
+                             "category": r.choice(categories), "slug": r.choice(["alfa", "tinkoff", "cash"])})
+    return transactions
+
+
+def assert_same(got, expected):
+    # Совпадение вплоть до типа и порядка ключей: ответы уходят клиенту как есть
+    if isinstance(expected, float) and math.isnan(expected):
+        assert isinstance(got, float) and math.isnan(got)
+    elif isinstance(expected, dict):
+        assert isinstance(got, dict) and list(got) == list(expected)
+        for key in expected:
+            assert_same(got[key], expected[key])
+    elif isinstance(expected, list):
+        assert isinstance(got, list) and len(got) == len(expected)
+        for gotItem, expectedItem in zip(got, expected):
+            assert_same(gotItem, expectedItem)
+    else:
+        assert got == expected and type(got) is type(expected)
+
+
+def run_both(helperName: str, transactions: List[Dict[str, Any]]):
+    expected = globals()[f"listwise{helperName}"](transactions)
+    got = getattr(AnalyticsService, helperName)(TransactionFrame.from_transactions(transactions))
+    return got, expected
+
+
+@pytest.mark.parametrize("helperName", helperNames)
+def test_empty_input(helperName):
+    got, expected = run_both(helperName, [])
+    assert_same(got, expected)
+
+
+@pytest.mark.parametrize("helperName", helperNames)
+def test_rows_without_category(helperName):
+    transactions = [{"id": i, "operationDate": f"2025-{month:02d}-10", "currencyAmount": amount, "category": category, "slug": "alfa"}
+                    for i, (month, amount, category) in enumerate([
+                        (7, -120.5, None), (8, -80.0, ""), (9, -3000.0, None), (10, 15000.0, None),
+                        (11, -95.25, ""), (12, -110.0, None), (12, -40.0, "Еда")])]
+    got, expected = run_both(helperName, transactions)
+    assert_same(got, expected)
+
+
+@pytest.mark.parametrize("helperName", helperNames)
+@pytest.mark.parametrize("rowsCount, seed", [(1, 1), (3, 2), (10, 3), (50, 4), (300, 5), (2000, 6)])
+def test_frame_matches_listwise(helperName, rowsCount, seed):
+    # Эталон падает на None в сумме у аномалий, поэтому там строки без пропусков
+    transactions = make_transactions(rowsCount, seed, withNoneAmounts=helperName != "_find_most_anomalous_expense")
+    got, expected = run_both(helperName, transactions)
+    assert_same(got, expected)
@@ -0,0 +1,179 @@
+import random
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from api_backend.handlers.castom_category.category_matcher import CategoryRulesMatcher
+
+
+# Перебор правил, каким он был в CategoryService до CategoryRulesMatcher: эталон для сравнения
+
+matchFields = ["description", "description2", "code"]
+
+
+def looped_normalize_text(text: Any) -> str:
+    return ("" if text is None else str(text)).strip()
+
+
+def looped_is_condition_match(haystack: str, conditionValue: str, isExact: bool) -> bool:
+    haystackNormalized = looped_normalize_text(haystack)
+    needle = looped_normalize_text(conditionValue)
+
+    if not needle:
+        return False
+
+    if isExact:
+        return haystackNormalized == needle
+
+    return needle in haystackNormalized
+
+
+def looped_resolve_category(
+    transaction: Dict[str, Any],
+    categorys: List[Dict[str, Any]],
+    matchFields: List[str],
+) -> Optional[Dict[str, Any]]:
+    matchValues = [looped_normalize_text(transaction.get(fieldName)) for fieldName in matchFields]
+    joinedHaystack = " | ".join([v for v in matchValues if v])
+
+    for categoryItem in categorys:
+        conditions = categoryItem.get("categoryConditions") or []
+
+        for condition in conditions:
+            conditionValue = looped_normalize_text(condition.get("conditionValue"))
+            isExact = bool(condition.get("isExact", False))
+
+            if isExact:
+                for fieldValue in matchValues:
+                    if looped_is_condition_match(fieldValue, conditionValue, True):
+                        return categoryItem
+            else:
+                if looped_is_condition_match(joinedHaystack, conditionValue, False):
+                    return categoryItem
+
+    return None
+
+
+def make_categorys(*conditionsByCategory) -> List[Dict[str, Any]]:
+    return [
+        {"id": index, "categoryName": f"cat{index}", "categoryConditions": conditions}
+        for index, conditions in enumerate(conditionsByCategory)
+    ]
+
+
+def substring(value: Any) -> Dict[str, Any]:
+    return {"conditionValue": value, "isExact": False}
+
+
+def exact(value: Any) -> Dict[str, Any]:
+    return {"conditionValue": value, "isExact": True}
+
+
+def make_random_categorys(rng: random.Random, words: List[str], conditionCount: int, categoryCount: int) -> List[Dict[str, Any]]:
+    categorys = make_categorys(*[[] for _ in range(categoryCount)])
+    for _ in range(conditionCount):
+        isExact = rng.random() < 0.2
+        if isExact:
+            conditionValue = " ".join(rng.choice(words) for _ in range(rng.randint(1, 3)))
+        else:
+            conditionValue = rng.choice(words)[:rng.randint(1, 6)]
+        if rng.random() < 0.05:
+            conditionValue = f" {conditionValue} "
+        if rng.random() < 0.03:
+            conditionValue = rng.choice(["", "   ", None])
+        rng.choice(categorys)["categoryConditions"].append({"conditionValue": conditionValue, "isExact": isExact})
+    return categorys
+
+
+def make_random_transactions(rng: random.Random, words: List[str], categorys: List[Dict[str, Any]], count: int) -> List[Dict[str, Any]]:
+    exactValues = [
+        condition["conditionValue"]
+        for categoryItem in categorys
+        for condition in categoryItem["categoryConditions"]
+        if condition["isExact"] and condition["conditionValue"]
+    ]
+    transactions = []
+    for _ in range(count):
+        transaction = {
+            "description": " ".join(rng.choice(words) for _ in range(rng.randint(0, 6))),
+            "description2": " ".join(rng.choice(words) for _ in range(3)) if rng.random() < 0.5 else None,
+            "code": rng.choice([None, "", str(rng.randint(10, 99)), rng.randint(100, 999)]),
+        }
+        if exactValues and rng.random() < 0.15:
+            transaction[rng.choice(matchFields)] = rng.choice(exactValues)
+        transactions.append(transaction)
+    return transactions
+
+
+def assert_same(transaction: Dict[str, Any], categorys: List[Dict[str, Any]]):
+    categoryMatcher = CategoryRulesMatcher(categorys, matchFields)
+    assert categoryMatcher.match(transaction) is looped_resolve_category(transaction, categorys, matchFields)
+
+
+@pytest.mark.parametrize("conditions, text", [
+    # Перекрывающиеся шаблоны: "ab" и "bc" оба входят в "abc"
+    ([[substring("ab")], [substring("bc")]], "abc"),
+    ([[substring("bc")], [substring("ab")]], "abc"),
+    ([[substring("abcd")], [substring("bcx")], [substring("cd")]], "xabcx bcd"),
+    ([[substring("aab")], [substring("ab")]], "aaab"),
+    # Один шаблон внутри другого
+    ([[substring("яндекс такси")], [substring("такси")]], "оплата яндекс такси"),
+    ([[substring("такси")], [substring("яндекс такси")]], "оплата яндекс такси"),
+    ([[substring("такси")], [substring("яндекс такси")]], "яндекс такс"),
+    ([[substring("she")], [substring("he")], [substring("hers")]], "ushers"),
+    ([[substring("hers")], [substring("he")]], "ushers"),
+    # Несколько категорий подходят под один текст - побеждает первая
+    ([[substring("кафе")], [substring("кафе")], [substring("кофе")]], "кафе и кофе"),
+    ([[substring("кофе")], [substring("кафе"), substring("кофе")]], "кафе и кофе"),
+    ([[exact("кафе")], [substring("кафе")]], "кафе"),
+    ([[substring("кафе")], [exact("кафе")]], "кафе"),
+    ([[substring("нет")], [exact("кафе")], [substring("ф")]], "кафе"),
+    # Шаблон не должен совпадать через разделитель склеенных полей
+    ([[substring("a | b")]], "a"),
+    # Пустые условия
+    ([[substring("")], [substring("кафе")]], "кафе"),
+    ([[substring("   ")], [exact("")], [substring(None)]], "кафе"),
+    ([[], [substring("кафе")]], "кафе"),
+    ([[exact("  кафе  ")]], "кафе"),
+    ([[substring(" кафе ")]], "мое кафе рядом"),
+    ([], "кафе"),
+])
+def test_matches_looped_rules(conditions, text):
+    categorys = make_categorys(*conditions)
+    assert_same({"description": text}, categorys)
+    assert_same({"description": f"  {text}  ", "description2": text, "code": None}, categorys)
+
+
+def test_none_conditions_list():
+    categorys = [
+        {"id": 0, "categoryName": "cat0", "categoryConditions": None},
+        {"id": 1, "categoryName": "cat1"},
+        {"id": 2, "categoryName": "cat2", "categoryConditions": [substring("кафе")]},
+    ]
+    assert_same({"description": "кафе"}, categorys)
+    assert CategoryRulesMatcher(categorys, matchFields).match({"description": "кафе"}) is categorys[2]
+
+
+def test_empty_fields_do_not_match_empty_exact():
+    categorys = make_categorys([exact("")], [exact(" ")], [exact(None)])
+    assert_same({"description": "", "description2": None, "code": "  "}, categorys)
+    assert CategoryRulesMatcher(categorys, matchFields).match({"description": ""}) is None
+
+
+def test_exact_matches_any_field():
+    categorys = make_categorys([exact("1234")], [substring("12")])
+    for transaction in [{"code": 1234}, {"code": " 1234 "}, {"description": "1234"}, {"description": "12345"}]:
+        assert_same(transaction, categorys)
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_random_rules_match_looped_rules(seed):
+    rng = random.Random(seed)
+    alphabet = "абвгдекмнорст" + "ab"
+    words = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 7))) for _ in range(60)]
+
+    for _ in range(25):
+        categorys = make_random_categorys(rng, words, rng.randint(0, 40), rng.randint(1, 12))
+        categoryMatcher = CategoryRulesMatcher(categorys, matchFields)
+        for transaction in make_random_transactions(rng, words, categorys, 80):
+            assert categoryMatcher.match(transaction) is looped_resolve_category(transaction, categorys, matchFields)
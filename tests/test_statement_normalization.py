@@ -0,0 +1,96 @@
+import re
+from datetime import datetime, date
+
+import pandas as pd
+import pytest
+
+import statement_fixtures
+from api_backend.handlers.bank_files.bank_file_preprocessing import (
+    AlfaPreprocessingDataFileHandler,
+    TinkoffPreprocessingDataFileHandler,
+)
+
+
+# Построчная нормализация, какой она была до векторизации: эталон, с которым сравниваются кадры
+def rowwise_amounts(values, removeChars: str) -> list:
+    amounts = []
+    for x in values:
+        for char in removeChars:
+            x = x.replace(char, "")
+        amounts.append(float(x.replace(",", ".")))
+    return amounts
+
+
+def rowwise_dates(values, dateFormat: str) -> list:
+    return [datetime.strptime(x, dateFormat).date() if x != "HOLD" else date(1970, 1, 1) for x in values]
+
+
+def rowwise_alfa_frame(dataPath: str) -> pd.DataFrame:
+    df = pd.read_excel(dataPath)
+
+    columnsNameIndex = df[df['Unnamed: 0'] == 'Дата операции'].index.to_list()[0]
+    df.columns = [x.replace('\xa0', ' ') if isinstance(x, str) else f"Unnamed {ind}" for ind, x in enumerate(df.iloc[columnsNameIndex].values)]
+    df = df.iloc[columnsNameIndex + 1:].reset_index(drop=True)
+    df = df.iloc[:df[df['Дата операции'].isna()].index.min()]
+    df = df[[x for x in df.columns if 'Unnamed' not in x]]
+
+    df = df.rename(columns={
+        "Дата операции": "operationDate",
+        "Дата проводки": "postingDate",
+        "Код": "code",
+        "Категория": "category",
+        "Описание": "description",
+        "Сумма в валюте счета": "currencyAmount",
+        "Статус ": "status",
+    })
+    df["currencyAmount"] = rowwise_amounts(df["currencyAmount"], "\xa0")
+    df["operationDate"] = rowwise_dates(df["operationDate"], "%d.%m.%Y")
+    df["postingDate"] = rowwise_dates(df["postingDate"], "%d.%m.%Y")
+    return df
+
+
+def rowwise_tinkoff_frame(dataPath: str) -> pd.DataFrame:
+    rawRows = TinkoffPreprocessingDataFileHandler.extract_tinkoff_pymupdf(dataPath, None)
+    datePattern = re.compile(r"^\s*\d{2}\.\d{2}\.\d{2,4}")
+    rows = [x.split('\n') for x in rawRows[0]
+            if isinstance(x, str) and any(datePattern.match(line.strip()) for line in x.split("\n"))]
+
+    df = pd.DataFrame(rows, columns=["operationDate", "postingDate", "amount", "currencyAmount", "description", 'description2'])
+    df["currencyAmount"] = rowwise_amounts(df["currencyAmount"], "\xa0+₽ ")
+    df["amount"] = rowwise_amounts(df["amount"], "\xa0+₽ ")
+    df["operationDate"] = rowwise_dates(df["operationDate"], "%d.%m.%y")
+    df["postingDate"] = rowwise_dates(df["postingDate"], "%d.%m.%y")
+    return df
+
+
+def assert_same_frame(gotFrame: pd.DataFrame, expectedFrame: pd.DataFrame):
+    assert list(gotFrame.columns) == list(expectedFrame.columns)
+    for column in expectedFrame.columns:
+        assert gotFrame[column].tolist() == expectedFrame[column].tolist(), column
+        assert [type(x) for x in gotFrame[column]] == [type(x) for x in expectedFrame[column]], column
+
+
+@pytest.mark.parametrize("rowsCount, seed, holdEvery", [(60, 1, 0), (500, 3, 0), (300, 5, 7)])
+def test_alfa_frame_matches_rowwise(tmp_path, rowsCount, seed, holdEvery):
+    dataPath = str(tmp_path / "alfa.xlsx")
+    statement_fixtures.make_alfa_xlsx(dataPath, n=rowsCount, seed=seed, holdEvery=holdEvery)
+
+    gotFrame = AlfaPreprocessingDataFileHandler(None).preprocessing_data(dataPath)
+
+    assert len(gotFrame) == rowsCount
+    assert_same_frame(gotFrame, rowwise_alfa_frame(dataPath))
+    assert (gotFrame["operationDate"] == date(1970, 1, 1)).sum() == (len(range(0, rowsCount, holdEvery)) if holdEvery else 0)
+
+
+@pytest.mark.parametrize("rowsCount, seed, holdEvery", [(60, 2, 0), (1200, 4, 0), (300, 5, 7)])
+def test_tinkoff_frame_matches_rowwise(tmp_path, rowsCount, seed, holdEvery):
+    if statement_fixtures.fontPath is None:
+        pytest.skip("No TTF font with cyrillic and ₽ for the Tinkoff PDF fixture")
+    dataPath = str(tmp_path / "tinkoff.pdf")
+    statement_fixtures.make_tinkoff_pdf(dataPath, n=rowsCount, seed=seed, holdEvery=holdEvery)
+
+    gotFrame = TinkoffPreprocessingDataFileHandler(None).preprocessing_data(dataPath)
+
+    assert len(gotFrame) == rowsCount
+    assert_same_frame(gotFrame, rowwise_tinkoff_frame(dataPath))
+    assert (gotFrame["operationDate"] == date(1970, 1, 1)).sum() == (len(range(0, rowsCount, holdEvery)) if holdEvery else 0)
@@ -0,0 +1,27 @@
+import fitz
+import pytest
+
+from api_backend.handlers.bank_files.bank_file_preprocessing import TinkoffPreprocessingDataFileHandler
+
+
+def test_fixture_has_hundreds_of_pages(tinkoffPdfPath):
+    with fitz.open(tinkoffPdfPath) as doc:
+        assert doc.page_count == 300
+
+
+@pytest.mark.parametrize("pageWorkers, pagesPerWorker", [(2, 50), (2, 7), (3, 100)])
+def test_page_split_matches_serial_rows(tinkoffPdfPath, pageWorkers, pagesPerWorker):
+    serialRows = TinkoffPreprocessingDataFileHandler.extract_tinkoff_pymupdf(tinkoffPdfPath, None)
+    splitRows = TinkoffPreprocessingDataFileHandler.extract_tinkoff_pymupdf(
+        tinkoffPdfPath, None, pageWorkers=pageWorkers, pagesPerWorker=pagesPerWorker)
+
+    assert len(serialRows) == 300 * 12
+    assert splitRows.equals(serialRows)
+
+
+def test_page_split_matches_serial_statement(tinkoffPdfPath):
+    serialFrame = TinkoffPreprocessingDataFileHandler(None).preprocessing_data(tinkoffPdfPath)
+    splitFrame = TinkoffPreprocessingDataFileHandler(None, pageWorkers=2, pagesPerWorker=40).preprocessing_data(tinkoffPdfPath)
+
+    assert list(splitFrame.dtypes) == list(serialFrame.dtypes)
+    assert splitFrame.equals(serialFrame)